@@ -0,0 +1,16 @@
+"""
+Offline benchmarks of V5 hot paths.
+
+Usage (from the repository root):
+    python -m benchmarks                                    # run micro benchmarks
+    python -m benchmarks --load                             # run load tests too
+    python -m benchmarks -k config                          # run benchmarks whose name contains 'config'
+    python -m benchmarks -o after.json -b before.json       # fail if slower than before.json by over threshold
+"""
+
+from .runner import Benchmark, benchmark, loadTest, Runner, compare
+from . import bench_config, bench_options, bench_routes, bench_resources, bench_access, bench_logging, bench_metrics, \
+    bench_gateway, bench_load
+
+
+__all__ = runner.__all__
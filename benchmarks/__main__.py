@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+from benchmarks.runner import Runner, compare, save, load
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline benchmarks of V5 hot paths.')
+    parser.add_argument('-o', '--output', help='Write results into json file.')
+    parser.add_argument('-b', '--baseline', help='Compare results with results json file of previous run.')
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=0.1,
+        help='Allowed slowdown ratio compared to baseline. (default: 0.1 = 10%%)'
+    )
+    parser.add_argument('-k', '--pattern', help='Run only benchmarks whose name contains the pattern.')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Timed rounds of each benchmark. (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds of a round. (default: 0.2)')
+    parser.add_argument('--load', action='store_true', help='Run load tests too.')
+    args = parser.parse_args()
+
+    runner = Runner(repeat=args.repeat, minTime=args.min_time, load=args.load, pattern=args.pattern)
+    results = runner.run()
+    if args.output:
+        save(results, args.output)
+        print(f'Results are written to {args.output}')
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        if regressions:
+            print(f'{len(regressions)} benchmarks regressed over {args.threshold:.0%} :')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'No regression over {args.threshold:.0%} compared to {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from benchmarks.runner import benchmark
+from v5.util import access_modifier
+from v5.util.access_modifier import modulePrivate
+
+
+def plain(value: int) -> int:
+    return value + 1
+
+
+@modulePrivate
+def private(value: int) -> int:
+    return value + 1
+
+
+def _stripped(value: int) -> int:
+    return value + 1
+
+
+# Decorated like production does, so that the check is stripped.
+_production: bool = access_modifier.isProduction()
+access_modifier.setProduction(True)
+privateProduction = modulePrivate(_stripped)
+access_modifier.setProduction(_production)
+
+
+class Plain:
+    def __init__(self, value: int):
+        self.value: int = value
+
+
+@modulePrivate
+class Private:
+    def __init__(self, value: int):
+        self.value: int = value
+
+
+@benchmark('plain_call', 'access')
+def benchPlainCall():
+    return lambda: plain(1)
+
+
+@benchmark('module_private_call', 'access')
+def benchModulePrivateCall():
+    # Called from the module defining it, so the access check passes.
+    return lambda: private(1)
+
+
+@benchmark('module_private_call_production', 'access')
+def benchModulePrivateCallProduction():
+    return lambda: privateProduction(1)
+
+
+@benchmark('plain_class', 'access')
+def benchPlainClass():
+    return lambda: Plain(1)
+
+
+@benchmark('module_private_class', 'access')
+def benchModulePrivateClass():
+    return lambda: Private(1)
\ No newline at end of file
@@ -0,0 +1,51 @@
+import functools
+import json
+import os
+
+from benchmarks.runner import benchmark
+from v5.util.config import Config
+
+
+def _writeConfig(name: str) -> Config:
+    os.makedirs(Config.root, exist_ok=True)
+    content = {
+        'prefix': '!',
+        'http': {'limit': 100, 'keepalive_timeout': 60},
+        'ext': {f'category{i}': {f'ext{j}': f'v5.ext.c{i}.e{j}' for j in range(10)} for i in range(10)},
+        'deep': {'a': {'b': {'c': {'d': {'e': 1}}}}}
+    }
+    with open(os.path.join(Config.root, f'{name}.json'), 'wt', encoding='utf-8') as f:
+        json.dump(content, f)
+    return Config(name=name)
+
+
+@benchmark('get', 'config')
+def benchGet():
+    return functools.partial(_writeConfig('get').get, 'http.limit')
+
+
+@benchmark('get_deep', 'config')
+def benchGetDeep():
+    return functools.partial(_writeConfig('get_deep').get, 'deep.a.b.c.d.e')
+
+
+@benchmark('get_missing', 'config')
+def benchGetMissing():
+    return functools.partial(_writeConfig('get_missing').get, 'http.missing')
+
+
+@benchmark('get_eval', 'config')
+def benchGetEval():
+    # Reference : Config.get before key paths were compiled, building an expression and eval()ing it on every lookup.
+    content = _writeConfig('get_eval').raw
+
+    def get(key: str = 'http.limit'):
+        return eval('content' + ''.join(f"['{k}']" for k in key.split('.') if k), {'content': content})
+    return get
+
+
+@benchmark('load', 'config')
+def benchLoad():
+    # Loads through marshal snapshot cache after the first load.
+    _writeConfig('load')
+    return functools.partial(Config, name='load')
@@ -0,0 +1,76 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+from typing import List
+
+from benchmarks.runner import benchmark
+from benchmarks.bench_options import Command, Interaction
+from v5.core.gateway import GatewayFilter
+from v5.models.slash import ApplicationCommand, InteractionsAPI
+from v5.util.type_hints import JSON
+
+
+def payloads() -> List[JSON]:
+    """Gateway payloads decoded by discord.py. 1 of every 20 is INTERACTION_CREATE, similar to a busy guild."""
+    others: List[JSON] = [
+        {'op': 0, 's': i, 't': eventType, 'd': {'id': str(i), 'content': 'x' * 200, 'guild_id': '1'}}
+        for i, eventType in enumerate(['MESSAGE_CREATE', 'PRESENCE_UPDATE', 'TYPING_START', 'GUILD_MEMBER_UPDATE'] * 5)
+    ]
+    interaction: JSON = {
+        'op': 0,
+        's': 100,
+        't': 'INTERACTION_CREATE',
+        'd': {
+            'id': '900000000000000001',
+            'application_id': Command['application_id'],
+            'type': 2,
+            'token': 'token',
+            'guild_id': '600000000000000001',
+            'channel_id': '500000000000000001',
+            'data': Interaction
+        }
+    }
+    return others[:19] + [interaction]
+
+
+def _dispatcher() -> GatewayFilter:
+    gatewayFilter = GatewayFilter()
+    interactions = InteractionsAPI(SimpleNamespace(gatewayFilter=gatewayFilter), None, deferAfter=None)
+
+    async def photo(interaction, animal: str, count: int = 1, only_smol: bool = False):
+        return animal
+
+    command = ApplicationCommand(Command)
+    command.handler('photo')(photo)
+    interactions.addCommand(command)
+    return gatewayFilter
+
+
+@benchmark('feed', 'gateway')
+def benchFeed():
+    gatewayFilter = _dispatcher()
+    counter = itertools.count()
+    cycle = itertools.cycle(payloads())
+
+    async def feed():
+        gatewayFilter.feed(next(cycle))
+        if next(counter) % 20 == 0:
+            # Run delivered listeners, so interaction dispatch is measured too.
+            await asyncio.sleep(0)
+    return feed
+
+
+@benchmark('listen_all', 'gateway')
+def benchListenAll():
+    # Reference : listener scheduled for every payload, checking its event type itself. (ex: on_socket_response)
+    counter = itertools.count()
+    cycle = itertools.cycle(payloads())
+
+    async def listener(payload: JSON) -> bool:
+        return payload.get('t') == 'INTERACTION_CREATE'
+
+    async def feed():
+        asyncio.ensure_future(listener(next(cycle)))
+        if next(counter) % 20 == 0:
+            await asyncio.sleep(0)
+    return feed
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, List, Tuple, Callable, Awaitable
+
+import aiohttp
+from discord import ClientUser
+from nacl.signing import SigningKey
+
+from benchmarks.runner import loadTest
+from benchmarks.bench_options import Command, Interaction as InteractionData
+from benchmarks.mockdiscord import MockDiscord
+from benchmarks.replay import syntheticFrames
+from v5.core.gateway import GatewayFilter
+from v5.core.recorder import GatewayRecorder, GatewayRecording, GatewayReplay
+from v5.core.rest import RestClient, HTTPException
+from v5.core.webhook import InteractionServer
+from v5.models.discordAPI import Route
+from v5.models.slash import ApplicationCommand, InteractionsAPI, Interaction
+from v5.util import logging_util
+from v5.util.logging_util import getLogger, enableQueueLogging, disableQueueLogging, loggingStats
+from v5.util.type_hints import JSON
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * q))]
+
+
+@loadTest('webhook')
+async def loadWebhook(requests: int = 5000, concurrency: int = 32, port: int = 18080) -> JSON:
+    """Signed interaction requests to InteractionServer on localhost. Every request is verified and dispatched."""
+    signingKey = SigningKey.generate()
+    interactions = InteractionsAPI(SimpleNamespace(gatewayFilter=GatewayFilter()), None, deferAfter=None)
+
+    async def photo(interaction, animal: str, count: int = 1, only_smol: bool = False):
+        await interaction.respond(content=animal)
+
+    command = ApplicationCommand(Command)
+    command.handler('photo')(photo)
+    interactions.addCommand(command)
+    server = InteractionServer(interactions, signingKey.verify_key.encode().hex(), host='127.0.0.1', port=port)
+    await server.start()
+
+    body: bytes = json.dumps({
+        'id': '900000000000000001',
+        'application_id': Command['application_id'],
+        'type': 2,
+        'token': 'token',
+        'guild_id': '600000000000000001',
+        'channel_id': '500000000000000001',
+        'data': InteractionData
+    }).encode('utf-8')
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def client(session: aiohttp.ClientSession):
+        for _ in remaining:
+            timestamp: str = str(int(time.time()))
+            signature: str = signingKey.sign(timestamp.encode('utf-8') + body).signature.hex()
+            started: float = time.perf_counter()
+            async with session.post(
+                    f'http://127.0.0.1:{port}/interactions',
+                    data=body,
+                    headers={
+                        'Content-Type': 'application/json',
+                        'X-Signature-Ed25519': signature,
+                        'X-Signature-Timestamp': timestamp
+                    }
+            ) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f'Interaction endpoint responded with status {response.status}')
+            latencies.append(time.perf_counter() - started)
+
+    started: float = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+            await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    finally:
+        await server.close()
+    elapsed: float = time.perf_counter() - started
+    return {
+        'ns_per_op': elapsed / requests * 1e9,
+        'requests_per_sec': requests / elapsed,
+        'p50_ms': _percentile(latencies, 0.5) * 1e3,
+        'p99_ms': _percentile(latencies, 0.99) * 1e3
+    }
+
+
+async def _loggingFlood(records: int, queued: bool) -> JSON:
+    """Event loop lag while a coroutine floods logging. Lag is measured by a 1ms sleeping monitor task."""
+    logging_util.stdout = open(os.devnull, 'wt')
+    logger = getLogger('bench.flood')
+    if queued:
+        enableQueueLogging(maxsize=10000)
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    async def monitor():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    task = asyncio.ensure_future(monitor())
+    started: float = time.perf_counter()
+    for i in range(records):
+        logger.debug('payload %s processed with %d items', 'x' * 50, i)
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    elapsed: float = time.perf_counter() - started
+    stop.set()
+    await task
+    stats = loggingStats()
+    if queued:
+        disableQueueLogging()
+    return {
+        'ns_per_op': elapsed / records * 1e9,
+        'lag_p50_ms': _percentile(lags, 0.5) * 1e3,
+        'lag_p99_ms': _percentile(lags, 0.99) * 1e3,
+        'dropped': stats['dropped']
+    }
+
+
+@loadTest('logging_flood')
+async def loadLoggingFlood(records: int = 200000) -> JSON:
+    """Logging flood through queue logging. Records over the queue size are dropped."""
+    return await _loggingFlood(records, queued=True)
+
+
+@loadTest('logging_flood_sync')
+async def loadLoggingFloodSync(records: int = 200000) -> JSON:
+    """Reference : same logging flood, formatted and written on the event loop thread."""
+    return await _loggingFlood(records, queued=False)
+
+
+async def _drive(operations: List[Callable[[], Awaitable[Any]]], concurrency: int) -> Tuple[float, List[float], int]:
+    """Run coroutine functions with bounded concurrency.
+    Returns:
+        Elapsed seconds, latency of each operation, and number of failed operations.
+    """
+    latencies: List[float] = []
+    failed: int = 0
+    remaining = iter(operations)
+
+    async def worker():
+        nonlocal failed
+        for operation in remaining:
+            started: float = time.perf_counter()
+            try:
+                await operation()
+            except HTTPException:
+                failed += 1
+            latencies.append(time.perf_counter() - started)
+
+    started: float = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, failed
+
+
+def _report(server: MockDiscord, elapsed: float, latencies: List[float], failed: int) -> JSON:
+    return {
+        'ns_per_op': elapsed / len(latencies) * 1e9,
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': _percentile(latencies, 0.5) * 1e3,
+        'p95_ms': _percentile(latencies, 0.95) * 1e3,
+        'p99_ms': _percentile(latencies, 0.99) * 1e3,
+        'failed': failed,
+        'server_429': server.limited
+    }
+
+
+@loadTest('rest_callbacks')
+async def loadRestCallbacks(interactions: int = 2000, concurrency: int = 64, port: int = 18081) -> JSON:
+    """Interaction responses (callback + follow-up) through Interaction, RestClient and RateLimiter
+    against the mock api, with 20~30ms of latency and 1% of errors injected."""
+    server = MockDiscord(port=port, latency=0.02, jitter=0.01, errorRate=0.01)
+    await server.start()
+    rest = RestClient(headers={'Authorization': 'Bot token'}, apiBase=server.apiBase, warmup=0)
+
+    def operation(index: int):
+        async def respond():
+            interaction = Interaction({
+                'id': str(900000000000000000 + index),
+                'application_id': Command['application_id'],
+                'type': 2,
+                'token': f'token{index}',
+                'data': InteractionData
+            }, rest)
+            await interaction.respond(content='pong')
+            await interaction.respond(content='follow-up')
+        return respond
+
+    try:
+        result = await _drive([operation(i) for i in range(interactions)], concurrency)
+    finally:
+        await rest.close()
+        await server.close()
+    return _report(server, *result)
+
+
+@loadTest('rest_commands')
+async def loadRestCommands(guilds: int = 10, commands: int = 20, concurrency: int = 32, port: int = 18082) -> JSON:
+    """Guild command registration against the mock api. Each guild allows 5 requests per second,
+    and 50 requests per second are allowed globally, so the test shows how well requests are paced."""
+    server = MockDiscord(port=port, latency=0.02, jitter=0.01)
+    await server.start()
+    rest = RestClient(headers={'Authorization': 'Bot token'}, apiBase=server.apiBase, warmup=0)
+    applicationId: int = int(Command['application_id'])
+
+    def operation(guildId: int, index: int):
+        async def register():
+            await rest.request(
+                Route.command('POST', applicationId, guildId),
+                json={'name': f'command{index}', 'description': 'Load test command'}
+            )
+        return register
+
+    try:
+        result = await _drive(
+            [operation(600000000000000000 + guild, index) for index in range(commands) for guild in range(guilds)],
+            concurrency
+        )
+    finally:
+        await rest.close()
+        await server.close()
+    return _report(server, *result)
+
+
+@loadTest('replay')
+async def loadReplay(frames: int = 20000) -> JSON:
+    """Synthetic gateway recording replayed at maximum speed into Latte, through discord.py parsers,
+    gateway filter and interaction router. Handler latency is from feeding a frame until its listeners finish."""
+    from v5.core import Latte
+    logging_util.stdout = open(os.devnull, 'wt')
+    recorder = GatewayRecorder('recordings/synthetic.jsonl.gz', maxQueue=frames)
+    recorder.start()
+    for frame in syntheticFrames(frames):
+        recorder.record(frame)
+    await recorder.stop()
+
+    os.makedirs('config', exist_ok=True)
+    bot = Latte()
+    bot.command_prefix = '!'
+    # Set by READY when the recording starts from connection.
+    bot._connection.user = ClientUser(
+        state=bot._connection,
+        data={'id': '300000000000000002', 'username': 'V5', 'discriminator': '0002', 'avatar': None, 'bot': True}
+    )
+
+    async def photo(interaction, animal: str, count: int = 1, only_smol: bool = False):
+        return animal
+
+    command = ApplicationCommand(Command)
+    command.handler('photo')(photo)
+    bot.interactions.addCommand(command)
+
+    @bot.command(name='ping')
+    async def ping(ctx):
+        return ctx.message.content
+
+    try:
+        report: JSON = await GatewayReplay(bot, GatewayRecording('recordings/synthetic.jsonl.gz')).run()
+    finally:
+        await bot.close()
+    return {'ns_per_op': report['elapsed'] / report['frames'] * 1e9, **report}
\ No newline at end of file
@@ -0,0 +1,35 @@
+import functools
+import os
+
+from benchmarks.runner import benchmark
+from v5.util import logging_util
+from v5.util.logging_util import getLogger, LogLevels, enableQueueLogging, disableQueueLogging
+
+
+def _silence():
+    # Loggers write to module level stdout of logging_util. Records are formatted, and then discarded.
+    logging_util.stdout = open(os.devnull, 'wt')
+
+
+@benchmark('sync_info', 'logging')
+def benchSyncInfo():
+    _silence()
+    logger = getLogger('bench.sync', LogLevels.DEBUG)
+    return functools.partial(logger.info, 'payload %s processed with %d items', 'x' * 50, 10)
+
+
+@benchmark('filtered_debug', 'logging')
+def benchFilteredDebug():
+    _silence()
+    logger = getLogger('bench.filtered', LogLevels.INFO)
+    return functools.partial(logger.debug, 'payload %s processed with %d items', 'x' * 50, 10)
+
+
+@benchmark('queue_info', 'logging')
+def benchQueueInfo():
+    # Cost on the logging thread only. Records over the queue size are dropped, as in a logging flood.
+    _silence()
+    logger = getLogger('bench.queue', LogLevels.DEBUG)
+    enableQueueLogging(maxsize=10000)
+    yield functools.partial(logger.info, 'payload %s processed with %d items', 'x' * 50, 10)
+    disableQueueLogging()
@@ -0,0 +1,53 @@
+import functools
+
+from benchmarks.runner import benchmark
+from v5.models.slash import InvocationStats
+from v5.util.metrics import MetricsRegistry
+
+
+Route: str = 'PATCH /applications/{application_id}/guilds/{guild_id}/commands/{command_id}'
+
+
+@benchmark('counter_inc', 'metrics')
+def benchCounterInc():
+    return MetricsRegistry().counter('bench_total', 'Counter of benchmark.').inc
+
+
+@benchmark('gauge_set', 'metrics')
+def benchGaugeSet():
+    return functools.partial(MetricsRegistry().gauge('bench_value', 'Gauge of benchmark.').set, 1.5)
+
+
+@benchmark('histogram_observe', 'metrics')
+def benchHistogramObserve():
+    return functools.partial(MetricsRegistry().histogram('bench_seconds', 'Histogram of benchmark.').observe, 0.042)
+
+
+@benchmark('labelled_observe', 'metrics')
+def benchLabelledObserve():
+    # Child is looked up by label values on every sample, as RestClient does per request.
+    histogram = MetricsRegistry().histogram('bench_route_seconds', 'Histogram of benchmark.', ('route',))
+    return lambda: histogram.labels(Route).observe(0.042)
+
+
+@benchmark('labelled_inc', 'metrics')
+def benchLabelledInc():
+    counter = MetricsRegistry().counter('bench_responses_total', 'Counter of benchmark.', ('route', 'status'))
+    return lambda: counter.labels(Route, '200').inc()
+
+
+@benchmark('invocation_stats_record', 'metrics')
+def benchInvocationStatsRecord():
+    return functools.partial(InvocationStats(MetricsRegistry()).record, 'photo', 0.042, False, False)
+
+
+@benchmark('expose', 'metrics')
+def benchExpose():
+    # Text exposition of 50 routes with latency histograms and status counters.
+    metrics = MetricsRegistry()
+    latency = metrics.histogram('bench_route_seconds', 'Histogram of benchmark.', ('route',))
+    responses = metrics.counter('bench_responses_total', 'Counter of benchmark.', ('route', 'status'))
+    for i in range(50):
+        latency.labels(f'{Route}/{i}').observe(0.042)
+        responses.labels(f'{Route}/{i}', '200').inc()
+    return metrics.expose
\ No newline at end of file
@@ -0,0 +1,100 @@
+import functools
+
+from benchmarks.runner import benchmark
+from v5.models.slash import ApplicationCommand, ApplicationCommandOption, ApplicationCommandOptionType, \
+    InteractionRouter
+from v5.util.type_hints import JSON
+
+
+Command: JSON = {
+    'id': '800000000000000001',
+    'application_id': '700000000000000001',
+    'name': 'animal',
+    'description': 'Animal photos',
+    'options': [
+        {
+            'name': 'photo',
+            'description': 'Send a random photo',
+            'type': 1,
+            'options': [
+                {
+                    'name': 'animal',
+                    'description': 'The type of animal',
+                    'type': 3,
+                    'required': True,
+                    'choices': [
+                        {'name': 'Dog', 'value': 'animal_dog'},
+                        {'name': 'Cat', 'value': 'animal_cat'},
+                        {'name': 'Penguin', 'value': 'animal_penguin'}
+                    ]
+                },
+                {'name': 'count', 'description': 'Number of photos', 'type': 4},
+                {'name': 'only_smol', 'description': 'Whether to show only baby animals', 'type': 5}
+            ]
+        }
+    ]
+}
+
+Interaction: JSON = {
+    'id': '800000000000000001',
+    'name': 'animal',
+    'options': [
+        {
+            'name': 'photo',
+            'type': 1,
+            'options': [
+                {'name': 'animal', 'type': 3, 'value': 'animal_cat'},
+                {'name': 'count', 'type': 4, 'value': 3},
+                {'name': 'only_smol', 'type': 5, 'value': True}
+            ]
+        }
+    ]
+}
+
+
+@benchmark('parse_type', 'options')
+def benchParseType():
+    return functools.partial(ApplicationCommandOptionType.parseType, 3)
+
+
+@benchmark('build', 'options')
+def benchBuild():
+    data: JSON = Command['options'][0]
+
+    def build():
+        # Builds nested options, choices and compiled schema, which are materialized lazily.
+        option = ApplicationCommandOption(data)
+        for child in option.options:
+            child.choices
+            child.schema
+    return build
+
+
+@benchmark('resolve_and_convert', 'options')
+def benchResolveAndConvert():
+    router = InteractionRouter()
+    router.add(ApplicationCommand(Command))
+
+    def resolve():
+        node, options = router.resolve(Interaction)
+        return node.plan(options)
+    return resolve
+
+
+@benchmark('reparse_and_convert', 'options')
+def benchReparseAndConvert():
+    # Reference : option dicts of the subcommand are parsed again on every invoke, and values are checked against them.
+    def reparse():
+        given = Interaction['options'][0]
+        subcommand = next(option for option in Command['options'] if option['name'] == given['name'])
+        options = {data['name']: ApplicationCommandOption(data) for data in subcommand['options']}
+        arguments = {}
+        for value in given['options']:
+            option = options[value['name']]
+            if option.type is not ApplicationCommandOptionType.parseType(value['type']):
+                raise TypeError(value['name'])
+            if option.choices and value['value'] not in [choice.value for choice in option.choices]:
+                raise ValueError(value['name'])
+            arguments[value['name']] = value['value']
+        return arguments
+    return reparse
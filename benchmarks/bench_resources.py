@@ -0,0 +1,43 @@
+import functools
+
+from benchmarks.runner import benchmark
+from v5.util.resources import JsonFile
+from v5.util.type_hints import JSON
+
+
+Content: JSON = {
+    'commands': [
+        {'id': str(800000000000000000 + i), 'name': f'command{i}', 'description': 'x' * 50, 'options': []}
+        for i in range(100)
+    ]
+}
+
+
+async def _file(path: str) -> JsonFile:
+    file = JsonFile(path, Content)
+    await file.flush()
+    return file
+
+
+@benchmark('json_read', 'resources')
+async def benchJsonRead():
+    file = await _file('read.json')
+    yield file.read
+
+
+@benchmark('json_read_cached', 'resources')
+async def benchJsonReadCached():
+    # Text is served from ResourceFile.cache, and decoded on every read.
+    file = await _file('read_cached.json')
+    yield functools.partial(file.read, cached=True)
+
+
+@benchmark('json_write', 'resources')
+async def benchJsonWrite():
+    file = await _file('write.json')
+
+    async def write():
+        # Flushed right away, so the debounce delay of FileWriter is not measured.
+        file.submit(Content)
+        await file.flush()
+    yield write
@@ -0,0 +1,43 @@
+import functools
+import itertools
+
+from benchmarks.runner import benchmark
+from v5.models.discordAPI import DiscordAPI, Route
+
+
+ApplicationId: int = 700000000000000001
+GuildId: int = 600000000000000001
+CommandId: int = 800000000000000001
+
+
+@benchmark('discordapi_global_commands', 'routes')
+def benchDiscordAPIGlobal():
+    return functools.partial(DiscordAPI.getGlobalCommandEndpoint, ApplicationId)
+
+
+@benchmark('discordapi_guild_command', 'routes')
+def benchDiscordAPIGuildCommand():
+    return lambda: DiscordAPI().application(ApplicationId).guilds(GuildId).commands(CommandId).url
+
+
+@benchmark('route_global_commands', 'routes')
+def benchRouteGlobal():
+    return functools.partial(Route.command, 'GET', ApplicationId, None, None)
+
+
+@benchmark('route_guild_command', 'routes')
+def benchRouteGuildCommand():
+    return functools.partial(Route.command, 'PATCH', ApplicationId, GuildId, CommandId)
+
+
+@benchmark('route_guild_command_uninterned', 'routes')
+def benchRouteGuildCommandUninterned():
+    # New command id every call, so every route is formatted and interned. (ex: interaction routes)
+    commandIds = itertools.count(CommandId)
+    return lambda: Route.command('PATCH', ApplicationId, GuildId, next(commandIds))
+
+
+@benchmark('route_bucket', 'routes')
+def benchRouteBucket():
+    route = Route.command('PATCH', ApplicationId, GuildId, CommandId)
+    return lambda: route.bucket
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+Local stand-in of discord REST api, implementing application command and interaction response endpoints.
+
+Responds with rate limit headers like discord does, and enforces them : requests over the limit of a bucket,
+or over the global limit, get 429 responses. Latency and error responses can be injected to see how the client
+stack behaves on a slow or failing api.
+
+Usage:
+    python -m benchmarks.mockdiscord --port 8081 --latency 0.05 --error-rate 0.01
+    # then point V5 to it with `"http": {"api_base": "http://127.0.0.1:8081/api/v8/"}` in bot config.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import random
+import time
+from typing import Optional, List, Dict, Tuple, NoReturn
+
+from aiohttp import web
+
+from v5.models.discordAPI import Route
+from v5.util.type_hints import JSON
+
+
+__all__ = (
+    'MockBucket',
+    'MockDiscord'
+)
+
+
+class MockBucket:
+    """Fixed window rate limit bucket of the mock server."""
+
+    def __init__(self, bucketHash: str, limit: int, window: float):
+        self.hash: str = bucketHash
+        self.limit: int = limit
+        self.window: float = window
+        self.remaining: int = limit
+        self.resetAt: float = 0.0
+
+    def take(self, now: float) -> bool:
+        """Consume one request. Returns False if the bucket is exhausted."""
+        if now >= self.resetAt:
+            self.remaining = self.limit
+            self.resetAt = now + self.window
+        if self.remaining == 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def headers(self, now: float) -> Dict[str, str]:
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': f'{time.time() + self.resetAt - now:.3f}',
+            'X-RateLimit-Reset-After': f'{self.resetAt - now:.3f}',
+            'X-RateLimit-Bucket': self.hash
+        }
+
+
+class MockDiscord:
+    """aiohttp application standing in for discord REST api. Commands are kept in memory."""
+
+    # (limit, window seconds) of route templates. Routes not listed use `defaultLimit`.
+    limits: Dict[str, Tuple[int, float]] = {
+        Route.InteractionCallback: (50, 1.0),
+        Route.InteractionFollowup: (50, 1.0),
+        Route.InteractionOriginal: (50, 1.0)
+    }
+    defaultLimit: Tuple[int, float] = (5, 1.0)
+    # Discord limits webhook routes of interactions per token. (V5 keys them by interaction id instead)
+    majorParameters: Tuple[str, ...] = (*Route.MajorParameters, 'interaction_token')
+
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 8081,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            errorRate: float = 0.0,
+            globalLimit: int = 50
+    ):
+        """
+        Args:
+            host (str): Host to bind.
+            port (int): Port to bind.
+            latency (float): Seconds added to every response.
+            jitter (float): Maximum random seconds added on top of latency.
+            errorRate (float): Probability of responding with 500 Internal Server Error instead of handling request.
+            globalLimit (int): Requests per second allowed across routes not authorized by interaction token.
+        """
+        self.host: str = host
+        self.port: int = port
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.errorRate: float = errorRate
+        self.globalLimit: int = globalLimit
+        self._buckets: Dict[str, MockBucket] = {}
+        self._global: MockBucket = MockBucket('global', globalLimit, 1.0)
+        self._commands: Dict[Tuple[str, Optional[str]], Dict[str, JSON]] = {}    # (application, guild) -> commands
+        self._ids = itertools.count(800000000000000000)
+        self._runner: Optional[web.AppRunner] = None
+        self.requests: int = 0      # Number of requests received.
+        self.limited: int = 0       # Number of 429 responses.
+        self.errors: int = 0        # Number of injected error responses.
+
+    @property
+    def apiBase(self) -> str:
+        """API base to configure RestClient with."""
+        return f'http://{self.host}:{self.port}/api/v8/'
+
+    def createApplication(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+
+        def route(template: str) -> str:
+            return '/api/v8/' + template
+
+        app.router.add_get('/api/v8/gateway', self.gateway)
+        for template in (Route.GlobalCommands, Route.GuildCommands):
+            app.router.add_get(route(template), self.listCommands)
+            app.router.add_post(route(template), self.createCommand)
+            app.router.add_put(route(template), self.overwriteCommands)
+        for template in (Route.GlobalCommand, Route.GuildCommand):
+            app.router.add_get(route(template), self.getCommand)
+            app.router.add_patch(route(template), self.editCommand)
+            app.router.add_delete(route(template), self.deleteCommand)
+        app.router.add_post(route(Route.InteractionCallback), self.interactionCallback)
+        app.router.add_post(route(Route.InteractionFollowup), self.followup)
+        app.router.add_patch(route(Route.InteractionOriginal), self.editOriginal)
+        return app
+
+    async def start(self) -> NoReturn:
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.createApplication(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self) -> NoReturn:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> JSON:
+        return {'requests': self.requests, 'limited': self.limited, 'errors': self.errors}
+
+    # Rate limits, latency & errors
+    def _bucket(self, request: web.Request) -> MockBucket:
+        template: str = request.match_info.route.resource.canonical[len('/api/v8/'):]
+        majorParams: str = ':'.join(
+            request.match_info[name] for name in self.majorParameters if name in request.match_info
+        )
+        key: str = f'{request.method} {template}:{majorParams}'
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            limit, window = self.limits.get(template, self.defaultLimit)
+            # Same hash for every major parameter of a route, like discord.
+            bucketHash: str = hashlib.md5(f'{request.method} {template}'.encode()).hexdigest()[:16]
+            bucket = self._buckets[key] = MockBucket(bucketHash, limit, window)
+        return bucket
+
+    @staticmethod
+    def _limited(retryAfter: float, isGlobal: bool, headers: Dict[str, str]) -> web.Response:
+        headers = {**headers, 'Retry-After': f'{retryAfter:.3f}'}
+        if isGlobal:
+            headers['X-RateLimit-Global'] = 'true'
+        return web.json_response(
+            {'message': 'You are being rate limited.', 'retry_after': round(retryAfter, 3), 'global': isGlobal},
+            status=429,
+            headers=headers
+        )
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests += 1
+        delay: float = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if request.match_info.route.resource is None or request.path == '/api/v8/gateway':
+            return await handler(request)
+
+        interactionToken: bool = 'interaction_token' in request.match_info
+        if not interactionToken and not request.headers.get('Authorization', '').startswith('Bot '):
+            return web.json_response({'message': '401: Unauthorized', 'code': 0}, status=401)
+
+        now: float = asyncio.get_event_loop().time()
+        if not interactionToken and not self._global.take(now):
+            self.limited += 1
+            return self._limited(self._global.resetAt - now, True, {})
+        bucket = self._bucket(request)
+        if not bucket.take(now):
+            self.limited += 1
+            return self._limited(bucket.resetAt - now, False, bucket.headers(now))
+        if self.errorRate and random.random() < self.errorRate:
+            self.errors += 1
+            response = web.json_response({'message': '500: Internal Server Error', 'code': 0}, status=500)
+        else:
+            response = await handler(request)
+        response.headers.update(bucket.headers(now))
+        return response
+
+    # Endpoints
+    async def gateway(self, request: web.Request) -> web.Response:
+        return web.json_response({'url': 'wss://gateway.discord.gg'})
+
+    def _scope(self, request: web.Request) -> Dict[str, JSON]:
+        return self._commands.setdefault(
+            (request.match_info['application_id'], request.match_info.get('guild_id')),
+            {}
+        )
+
+    def _command(self, request: web.Request, data: JSON, commandId: Optional[str] = None) -> JSON:
+        command: JSON = {
+            **data,
+            'id': commandId or str(next(self._ids)),
+            'application_id': request.match_info['application_id'],
+            'version': str(next(self._ids))
+        }
+        if 'guild_id' in request.match_info:
+            command['guild_id'] = request.match_info['guild_id']
+        return command
+
+    async def listCommands(self, request: web.Request) -> web.Response:
+        return web.json_response(list(self._scope(request).values()))
+
+    async def createCommand(self, request: web.Request) -> web.Response:
+        data: JSON = await request.json()
+        scope = self._scope(request)
+        existing: Optional[JSON] = next(
+            (command for command in scope.values() if command['name'] == data['name']),
+            None
+        )
+        command = self._command(request, data, existing['id'] if existing else None)
+        scope[command['id']] = command
+        return web.json_response(command, status=200 if existing else 201)
+
+    async def overwriteCommands(self, request: web.Request) -> web.Response:
+        scope = self._scope(request)
+        existing: Dict[str, str] = {command['name']: command['id'] for command in scope.values()}
+        commands: List[JSON] = [
+            self._command(request, data, existing.get(data['name'])) for data in await request.json()
+        ]
+        scope.clear()
+        scope.update((command['id'], command) for command in commands)
+        return web.json_response(commands)
+
+    async def getCommand(self, request: web.Request) -> web.Response:
+        command: Optional[JSON] = self._scope(request).get(request.match_info['command_id'])
+        if command is None:
+            return web.json_response({'message': 'Unknown application command', 'code': 10063}, status=404)
+        return web.json_response(command)
+
+    async def editCommand(self, request: web.Request) -> web.Response:
+        scope = self._scope(request)
+        command: Optional[JSON] = scope.get(request.match_info['command_id'])
+        if command is None:
+            return web.json_response({'message': 'Unknown application command', 'code': 10063}, status=404)
+        command = scope[command['id']] = self._command(request, {**command, **await request.json()}, command['id'])
+        return web.json_response(command)
+
+    async def deleteCommand(self, request: web.Request) -> web.Response:
+        if self._scope(request).pop(request.match_info['command_id'], None) is None:
+            return web.json_response({'message': 'Unknown application command', 'code': 10063}, status=404)
+        return web.Response(status=204)
+
+    async def interactionCallback(self, request: web.Request) -> web.Response:
+        data: JSON = await request.json()
+        if 'type' not in data:
+            return web.json_response({'message': 'Invalid Form Body', 'code': 50035}, status=400)
+        return web.Response(status=204)
+
+    def _message(self, request: web.Request, data: JSON) -> JSON:
+        return {
+            'id': str(next(self._ids)),
+            'channel_id': '500000000000000001',
+            'webhook_id': request.match_info['application_id'],
+            'content': data.get('content', ''),
+            'embeds': data.get('embeds', []),
+            'tts': data.get('tts', False),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime())
+        }
+
+    async def followup(self, request: web.Request) -> web.Response:
+        return web.json_response(self._message(request, await request.json()))
+
+    async def editOriginal(self, request: web.Request) -> web.Response:
+        return web.json_response(self._message(request, await request.json()))
+
+
+async def _serve(server: MockDiscord) -> NoReturn:
+    await server.start()
+    print(f'Mock discord api is running on {server.apiBase}')
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.close()
+
+
+def main() -> NoReturn:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.mockdiscord', description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added on top of latency.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of 500 responses.')
+    parser.add_argument('--global-limit', type=int, default=50, help='Global requests per second.')
+    args = parser.parse_args()
+    server = MockDiscord(args.host, args.port, args.latency, args.jitter, args.error_rate, args.global_limit)
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
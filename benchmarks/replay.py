@@ -0,0 +1,109 @@
+"""
+Replays gateway recording into the bot without network, and reports events/s, handler latency and memory growth.
+
+Recordings are written by the bot while `gateway.record` is set in bot config, or by `V5.startRecording()`.
+Bot config and extensions of the current directory are used, so run it from the bot's root directory.
+
+Usage:
+    python -m benchmarks.replay recordings/gateway.jsonl.gz                 # as fast as possible
+    python -m benchmarks.replay recordings/gateway.jsonl.gz --speed 1       # in recorded timing
+    python -m benchmarks.replay recordings/gateway.jsonl.gz --speed 10 --extensions --trace-memory
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Optional, Iterator, NoReturn
+
+from benchmarks.bench_options import Command, Interaction
+from v5.core.recorder import GatewayRecording, GatewayReplay
+from v5.util.type_hints import JSON
+
+
+__all__ = (
+    'syntheticFrames',
+    'replay'
+)
+
+
+def syntheticFrames(count: int) -> Iterator[JSON]:
+    """Decoded gateway frames shaped like discord's. 1 of every 20 frames is INTERACTION_CREATE."""
+    author: JSON = {'id': '300000000000000001', 'username': 'latte', 'discriminator': '0001', 'avatar': None}
+    for sequence in range(1, count + 1):
+        kind: int = sequence % 20
+        if kind == 0:
+            eventType, data = 'INTERACTION_CREATE', {
+                'id': str(900000000000000000 + sequence),
+                'application_id': Command['application_id'],
+                'type': 2,
+                'token': f'token{sequence}',
+                'channel_id': '500000000000000001',
+                'data': Interaction
+            }
+        elif kind % 2:
+            eventType, data = 'MESSAGE_CREATE', {
+                'id': str(700000000000000000 + sequence),
+                'channel_id': '500000000000000001',
+                'author': author,
+                'content': '!ping' if kind == 1 else 'x' * 200,
+                'timestamp': '2021-03-01T00:00:00.000000+00:00',
+                'edited_timestamp': None,
+                'tts': False,
+                'mention_everyone': False,
+                'mentions': [],
+                'mention_roles': [],
+                'attachments': [],
+                'embeds': [],
+                'pinned': False,
+                'type': 0
+            }
+        else:
+            eventType, data = 'TYPING_START', {
+                'channel_id': '500000000000000001',
+                'user_id': author['id'],
+                'timestamp': 1614556800
+            }
+        yield {'op': 0, 's': sequence, 't': eventType, 'd': data}
+
+
+async def replay(
+        path: str,
+        speed: Optional[float] = None,
+        extensions: bool = False,
+        traceMemory: bool = False
+) -> JSON:
+    """Replay recording into Latte created from bot config of the current directory.
+    Args:
+        path (str): Path of the recording.
+        speed (Optional[float]): Replay speed. Maximum speed if None.
+        extensions (bool): Load every extension in ext map before replaying, so that their listeners run too.
+        traceMemory (bool): Trace python allocations with tracemalloc.
+    """
+    from v5.core import Latte
+    bot = Latte()
+    if extensions:
+        await bot.ext.loadAll()
+    try:
+        return await GatewayReplay(bot, GatewayRecording(path), speed, traceMemory).run()
+    finally:
+        await bot.close()
+
+
+def main() -> NoReturn:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.replay', description=__doc__.split('\n')[1])
+    parser.add_argument('recording', help='Path of the recording. (gzip compressed JSON lines)')
+    parser.add_argument('--speed', default='max', help='Replay speed. 1 is recorded timing, N is N times faster.')
+    parser.add_argument('--extensions', action='store_true', help='Load extensions in ext map before replaying.')
+    parser.add_argument('--trace-memory', action='store_true', help='Trace python allocations with tracemalloc.')
+    args = parser.parse_args()
+    speed: Optional[float] = None if args.speed == 'max' else float(args.speed)
+    report: JSON = asyncio.get_event_loop().run_until_complete(
+        replay(args.recording, speed, args.extensions, args.trace_memory)
+    )
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional, Any, List, Dict, Callable, Awaitable, Union, NoReturn
+
+from v5.util.type_hints import JSON
+
+
+__all__ = (
+    'Benchmark',
+    'benchmark',
+    'loadTest',
+    'Runner',
+    'compare',
+    'save',
+    'load'
+)
+
+# Operation measured by a benchmark. Called (and awaited if it returns awaitable) once per iteration.
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class Benchmark:
+    """Benchmark registered with @benchmark or @loadTest decorator.
+
+    Micro benchmark functions receive nothing and return the operation to measure, after preparing everything
+    the operation needs. Functions needing cleanup are written as (async) generators yielding the operation once,
+    and cleanup after the yield runs when the measurement is done.
+    Load test functions are coroutine functions returning their own metrics, which must contain `ns_per_op`
+    so that results are compared in the same way.
+    """
+
+    __benchmarks__: List[Benchmark] = []
+
+    def __init__(self, name: str, group: str, func: Callable[..., Any], isLoad: bool = False):
+        self.name: str = name
+        self.group: str = group
+        self.func: Callable[..., Any] = func
+        self.isLoad: bool = isLoad
+
+    @property
+    def fullName(self) -> str:
+        return f'{self.group}.{self.name}'
+
+
+def benchmark(name: str, group: str) -> Callable[[Callable[[], Operation]], Callable[[], Operation]]:
+    """Register micro benchmark.
+    Args:
+        name (str): Name of the benchmark.
+        group (str): Group of the benchmark. (ex: 'config')
+    """
+    def wrapper(func: Callable[[], Operation]) -> Callable[[], Operation]:
+        Benchmark.__benchmarks__.append(Benchmark(name, group, func))
+        return func
+    return wrapper
+
+
+LoadTest = Callable[[], Awaitable[JSON]]
+
+
+def loadTest(name: str, group: str = 'load') -> Callable[[LoadTest], LoadTest]:
+    """Register load test. Load tests take seconds, so they run only when requested."""
+    def wrapper(func: LoadTest) -> LoadTest:
+        Benchmark.__benchmarks__.append(Benchmark(name, group, func, isLoad=True))
+        return func
+    return wrapper
+
+
+class Runner:
+    """Runs benchmarks in a temporary working directory, so config & resource files of the bot are never touched."""
+
+    def __init__(self, repeat: int = 5, minTime: float = 0.2, load: bool = False, pattern: Optional[str] = None):
+        """
+        Args:
+            repeat (int): Number of timed rounds of each micro benchmark. The fastest round is reported.
+            minTime (float): Minimum seconds of a round. Number of iterations per round is calibrated to it.
+            load (bool): Run load tests too.
+            pattern (str): Run only benchmarks whose full name contains the pattern.
+        """
+        self.repeat: int = repeat
+        self.minTime: float = minTime
+        self.load: bool = load
+        self.pattern: Optional[str] = pattern
+
+    def selected(self) -> List[Benchmark]:
+        return [
+            bench for bench in Benchmark.__benchmarks__
+            if (self.load or not bench.isLoad) and (self.pattern is None or self.pattern in bench.fullName)
+        ]
+
+    def run(self) -> JSON:
+        """Run selected benchmarks.
+        Returns:
+            {"meta": {...}, "results": {"<group>.<name>": {"ns_per_op": <float>, ...}}}
+        """
+        cwd: str = os.getcwd()
+        results: Dict[str, JSON] = {}
+        with tempfile.TemporaryDirectory(prefix='v5-bench-') as directory:
+            os.chdir(directory)
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                for bench in self.selected():
+                    result = loop.run_until_complete(bench.func() if bench.isLoad else self._run(bench))
+                    results[bench.fullName] = result
+                    print(f'{bench.fullName:45} {_formatResult(result)}', flush=True)
+            finally:
+                # Tasks left by benchmarks (ex: scheduled file I/O) are cancelled, as asyncio.run does.
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+                asyncio.set_event_loop(None)
+                os.chdir(cwd)
+        return {'meta': _meta(), 'results': results}
+
+    async def _run(self, bench: Benchmark) -> JSON:
+        if inspect.isasyncgenfunction(bench.func):
+            setup = bench.func()
+            result = await self._measure(await setup.__anext__())
+            async for _ in setup:
+                pass
+            return result
+        if inspect.isgeneratorfunction(bench.func):
+            setup = bench.func()
+            result = await self._measure(next(setup))
+            for _ in setup:
+                pass
+            return result
+        return await self._measure(bench.func())
+
+    async def _measure(self, operation: Operation) -> JSON:
+        isAsync: bool = asyncio.iscoroutinefunction(operation)
+        run = self._roundAsync if isAsync else self._round
+        # Calibrate iterations per round like timeit.autorange.
+        number: int = 1
+        while True:
+            elapsed: float = await run(operation, number)
+            if elapsed >= self.minTime or number >= 10 ** 8:
+                break
+            number *= 10 if elapsed < self.minTime / 10 else 2
+        rounds: List[float] = [await run(operation, number) / number for _ in range(self.repeat)]
+        best: float = min(rounds)
+        return {
+            'ns_per_op': best * 1e9,
+            'ops_per_sec': 1 / best if best > 0 else float('inf'),
+            'median_ns': statistics.median(rounds) * 1e9,
+            'number': number,
+            'repeat': self.repeat
+        }
+
+    @staticmethod
+    async def _round(operation: Operation, number: int) -> float:
+        iterations = range(number)
+        started: float = time.perf_counter()
+        for _ in iterations:
+            operation()
+        return time.perf_counter() - started
+
+    @staticmethod
+    async def _roundAsync(operation: Operation, number: int) -> float:
+        iterations = range(number)
+        started: float = time.perf_counter()
+        for _ in iterations:
+            await operation()
+        return time.perf_counter() - started
+
+
+def compare(results: JSON, baseline: JSON, threshold: float) -> List[str]:
+    """Compare results with baseline results.
+    Args:
+        results (JSON): Results of current run.
+        baseline (JSON): Results of previous run.
+        threshold (float): Allowed slowdown ratio. (0.1 = 10% slower than baseline)
+    Returns:
+        Descriptions of regressions. Empty if there is no regression.
+    """
+    regressions: List[str] = []
+    for name, result in results['results'].items():
+        before: Optional[JSON] = baseline['results'].get(name)
+        if before is None or not before.get('ns_per_op'):
+            continue
+        ratio: float = result['ns_per_op'] / before['ns_per_op'] - 1
+        if ratio > threshold:
+            regressions.append(
+                f'{name} : {before["ns_per_op"]:.1f} ns -> {result["ns_per_op"]:.1f} ns ({ratio:+.1%})'
+            )
+    return regressions
+
+
+def save(results: JSON, path: str) -> NoReturn:
+    with open(path, 'wt', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+
+
+def load(path: str) -> JSON:
+    with open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_Common = ('ns_per_op', 'ops_per_sec', 'median_ns', 'number', 'repeat')
+
+
+def _formatResult(result: JSON) -> str:
+    ns: float = result['ns_per_op']
+    text: str = f'{ns / 1e3:10.2f} us/op' if ns >= 1e4 else f'{ns:10.1f} ns/op'
+    extra: List[str] = [
+        f'{key}={value:.4g}' if isinstance(value, float) else f'{key}={value}'
+        for key, value in result.items() if key not in _Common
+    ]
+    if extra:
+        text += '  ' + ', '.join(extra)
+    return text
+
+
+def _meta() -> JSON:
+    try:
+        commit: Optional[str] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'argv': sys.argv[1:],
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
@@ -0,0 +1,23 @@
+import os
+import socket
+import sys
+
+import pytest
+
+# Tests import `v5` and `benchmarks` from the repository root, without installing the package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test in a temporary working directory, since config & resource paths are relative."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def port() -> int:
+    """Free local port for mock servers."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
\ No newline at end of file
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import os
+import stat
+
+from v5.util.config import Config
+
+
+def writeConfig(content) -> str:
+    os.makedirs(Config.root, exist_ok=True)
+    path = os.path.join(Config.root, 'bot.json')
+    with open(path, 'w') as f:
+        json.dump(content, f)
+    return path
+
+
+def testSnapshotIsOnlyReadableByOwner(workdir):
+    writeConfig({'token': 'secret', 'prefix': '!'})
+    umask = os.umask(0o022)
+    try:
+        config = Config(name='bot')
+    finally:
+        os.umask(umask)
+    snapshot = os.path.join(Config.cacheRoot, 'bot.marshal')
+    assert config.get('token') == 'secret'
+    assert stat.S_IMODE(os.stat(snapshot).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(Config.cacheRoot).st_mode) == 0o700
+    os.chmod(snapshot, 0o644)
+    os.utime(os.path.join(Config.root, 'bot.json'), ns=(0, 0))     # Make the snapshot stale.
+    Config(name='bot')
+    assert stat.S_IMODE(os.stat(snapshot).st_mode) == 0o600
+
+
+def testWarmStartUsesSnapshot(workdir):
+    path = writeConfig({'ext': {'core': {'ping': 'ext_ping'}}})
+    Config(name='bot')
+    # Snapshot is keyed by mtime and size. Same size content written with the same mtime is not parsed again.
+    stat_ = os.stat(path)
+    writeConfig({'ext': {'core': {'pong': 'ext_pong'}}})
+    os.utime(path, ns=(stat_.st_atime_ns, stat_.st_mtime_ns))
+    assert Config(name='bot').get('ext.core') == {'ping': 'ext_ping'}
+
+
+def testGetCacheIsInvalidatedBySetAndReload(workdir):
+    async def main():
+        writeConfig({'logging': {'queue': False}})
+        config = Config(name='bot')
+        changes = []
+        config.subscribe('logging', lambda key, old, new: changes.append((key, dict(old), dict(new))))
+        assert config.get('logging.queue') is False
+        assert config.get('logging.missing.key') is None
+
+        config.set('logging.queue', True, save=False)
+        assert config.get('logging.queue') is True
+        assert changes == [('logging', {'queue': False}, {'queue': True})]
+
+        writeConfig({'logging': {'queue': True, 'queue_size': 100}})
+        assert await config.reload() == {'logging.queue_size'}
+        assert config.get('logging.queue_size') == 100
+        assert len(changes) == 2
+    asyncio.run(main())
+
+
+def testGetResolvesCompiledKeyPathsOnce(workdir, monkeypatch):
+    async def main():
+        writeConfig({'token': 'secret', 'ext': {'core': {'ping': 'ext_ping'}}, 'prefix': '!'})
+        config = Config(name='bot')
+        assert Config.compileKey('ext.core.ping') is Config.compileKey('ext.core.ping') == ('ext', 'core', 'ping')
+        assert config.get('ext.core.ping') == 'ext_ping'
+        # Paths running into non-dict values, and missing keys, are None.
+        assert config.get('prefix.length') is None
+        assert config.get('ext.missing') is None
+
+        compiled = []
+        original = Config.compileKey.__func__
+
+        def compileKey(cls, key):
+            compiled.append(key)
+            return original(cls, key)
+
+        monkeypatch.setattr(Config, 'compileKey', classmethod(compileKey))
+        for _ in range(3):
+            config.get('token')
+            config.get('ext.missing')
+        assert compiled == ['token']    # ext.missing is already cached as None.
+    asyncio.run(main())
+
+
+def testResolvedValuesAreNotLogged(workdir):
+    async def main():
+        writeConfig({'token': 'secret'})
+        Config(name='bot').get('token')
+
+    records = []
+    handler = logging.Handler(logging.DEBUG)
+    handler.emit = records.append
+    logger = logging.getLogger('utils.config')
+    logger.addHandler(handler)
+    try:
+        asyncio.run(main())
+    finally:
+        logger.removeHandler(handler)
+    assert any('key : token resolved' in record.getMessage() for record in records)
+    assert not any('secret' in record.getMessage() for record in records)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import asyncio
+import textwrap
+
+import pytest
+from discord.ext import commands
+
+from v5.ext.manager import ExtensionManager
+
+
+class DictConfig:
+    """Config returning values of a flat dict."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key):
+        return self.values.get(key)
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Extension modules `ext_ping` (ping command) and `ext_pong` (pong command)."""
+    for name in ('ping', 'pong'):
+        (tmp_path / f'ext_{name}.py').write_text(textwrap.dedent(f'''
+            from discord.ext import commands
+
+            @commands.command()
+            async def {name}(ctx):
+                pass
+
+            def setup(bot):
+                bot.add_command({name})
+        '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+
+def lazyMap(module: str, command: str):
+    return {'core': {'game': {'module': module, 'lazy': True, 'commands': [command]}}}
+
+
+def run(test):
+    async def main():
+        bot = commands.Bot(command_prefix='!')
+        config = DictConfig({})
+        await test(bot, config, ExtensionManager(bot, config))
+    asyncio.run(main())
+
+
+def testConfigChangeRegistersAndRemovesPlaceholders(modules):
+    async def test(bot, config, manager):
+        config.values['ext'] = lazyMap('ext_ping', 'ping')
+        manager.onConfigChange('ext', None, config.values['ext'])
+        assert bot.get_command('ping') is not None
+        assert 'ext_ping' not in bot.extensions
+
+        # Module of the lazy extension is changed : old placeholders are removed before new ones are registered.
+        old, config.values['ext'] = config.values['ext'], lazyMap('ext_pong', 'pong')
+        manager.onConfigChange('ext', old, config.values['ext'])
+        assert bot.get_command('ping') is None
+        assert bot.get_command('pong') is not None
+
+        manager.onConfigChange('ext', config.values['ext'], None)
+        assert bot.get_command('pong') is None
+        assert not bot.extensions
+    run(test)
+
+
+def testLazyExtensionIsLoadedAgainAfterConfigChange(modules):
+    async def test(bot, config, manager):
+        extMap = lazyMap('ext_ping', 'ping')
+        manager.onConfigChange('ext', None, extMap)
+        entry, = manager._entries(extMap)
+        await manager.loadLazy(entry)
+        assert 'ext_ping' in bot.extensions
+
+        manager.onConfigChange('ext', extMap, None)
+        assert 'ext_ping' not in bot.extensions
+        manager.onConfigChange('ext', None, extMap)
+        assert 'ext_ping' not in bot.extensions
+        await manager.loadLazy(entry)
+        assert 'ext_ping' in bot.extensions
+        assert manager.timings['game'].lazy
+    run(test)
+
+
+def testRemovingExtensionCancelsItsLazyLoad(modules):
+    async def test(bot, config, manager):
+        extMap = lazyMap('ext_ping', 'ping')
+        manager.onConfigChange('ext', None, extMap)
+        entry, = manager._entries(extMap)
+        waiter = asyncio.ensure_future(manager.loadLazy(entry))
+        await asyncio.sleep(0)
+        manager.onConfigChange('ext', extMap, None)
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert 'ext_ping' not in bot.extensions
+        assert bot.get_command('ping') is None
+    run(test)
+
+def testOnlyThreadsafeExtensionsAreImportedOffTheLoop(tmp_path, monkeypatch):
+    (tmp_path / 'ext_probe.py').write_text('imports = []\n')
+    for name in ('plain', 'safe'):
+        (tmp_path / f'ext_{name}.py').write_text(textwrap.dedent('''
+            import threading
+            import ext_probe
+
+            ext_probe.imports.append((__name__, threading.current_thread().name))
+
+            def setup(bot):
+                pass
+        '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    async def test(bot, config, manager):
+        config.values['ext'] = {'core': {'plain': 'ext_plain', 'safe': {'module': 'ext_safe', 'threadsafe': True}}}
+        await manager.loadAll()
+        assert set(bot.extensions) == {'ext_plain', 'ext_safe'}
+        import ext_probe
+        # Plain module body runs once, on the loop thread. Threadsafe one is pre-imported, then loaded on the loop.
+        threads = {}
+        for module, thread in ext_probe.imports:
+            threads.setdefault(module, []).append(thread)
+        assert threads['ext_plain'] == ['MainThread']
+        assert threads['ext_safe'][0].startswith('v5-ext-import') and threads['ext_safe'][1:] == ['MainThread']
+        assert manager.timings['plain'].importTime == 0.0
+    run(test)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import asyncio
+
+from v5.core.gateway import GatewayFilter
+
+
+def payload(eventType: str, data):
+    return {'op': 0, 's': 1, 't': eventType, 'd': data}
+
+
+def testOnlySubscribedPayloadsAreDeliveredAndShared():
+    async def main():
+        gatewayFilter = GatewayFilter()
+        received = []
+
+        @gatewayFilter.listen('INTERACTION_CREATE')
+        async def first(payload):
+            received.append(payload)
+
+        @gatewayFilter.listen('INTERACTION_CREATE')
+        async def second(payload):
+            received.append(payload)
+
+        assert not gatewayFilter.feed(payload('TYPING_START', {'channel_id': '1'}))
+        assert not gatewayFilter.feed(payload('MESSAGE_CREATE', {'content': '"t":"INTERACTION_CREATE"'}))
+        interaction = payload('INTERACTION_CREATE', {'id': '2'})
+        assert gatewayFilter.feed(interaction)
+        await asyncio.sleep(0)
+        assert len(received) == 2 and received[0] is received[1] is interaction
+        assert (gatewayFilter.received, gatewayFilter.matched) == (3, 1)
+    asyncio.run(main())
+
+
+def testUnsubscribedEventTypeIsNotMatched():
+    async def main():
+        gatewayFilter = GatewayFilter()
+
+        async def listener(payload):
+            pass
+
+        gatewayFilter.subscribe('INTERACTION_CREATE', listener)
+        assert gatewayFilter.feed({'op': 0, 't': 'INTERACTION_CREATE', 'd': {}})
+        gatewayFilter.unsubscribe('INTERACTION_CREATE', listener)
+        assert gatewayFilter.eventTypes == []
+        assert not gatewayFilter.feed({'op': 0, 't': 'INTERACTION_CREATE', 'd': {}})
+    asyncio.run(main())
\ No newline at end of file
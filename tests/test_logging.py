@@ -0,0 +1,60 @@
+import io
+import logging
+import queue
+import threading
+
+from v5.util import logging_util
+from v5.util.logging_util import BoundedQueueHandler, DropPolicy
+
+
+def record(level: int, msg: str = 'message') -> logging.LogRecord:
+    return logging.LogRecord('test', level, __file__, 0, msg, None, None)
+
+
+def testWarningWaitsForRoomInsteadOfBeingDropped():
+    records: queue.Queue = queue.Queue(2)
+    handler = BoundedQueueHandler(records)
+    handler.enqueue(record(logging.INFO))
+    handler.enqueue(record(logging.INFO))
+    handler.enqueue(record(logging.DEBUG))
+    assert handler.dropped == 1
+
+    drainer = threading.Timer(0.05, records.get)
+    drainer.start()
+    handler.enqueue(record(logging.ERROR, 'kept'))
+    drainer.join()
+    assert handler.dropped == 1
+    assert [r.msg for r in records.queue] == ['message', 'kept']
+
+
+def testOldestPolicyOnlyEvictsRecordsBelowWarning():
+    records: queue.Queue = queue.Queue(2)
+    handler = BoundedQueueHandler(records, DropPolicy.OLDEST)
+    handler.enqueue(record(logging.WARNING, 'warning'))
+    handler.enqueue(record(logging.INFO, 'info'))
+    handler.enqueue(record(logging.DEBUG, 'debug'))     # Oldest is a warning : the new record is dropped.
+    assert [r.msg for r in records.queue] == ['warning', 'info']
+    records.get()
+    handler.enqueue(record(logging.ERROR, 'error'))
+    handler.enqueue(record(logging.DEBUG, 'debug'))     # Oldest is info : it is replaced.
+    assert [r.msg for r in records.queue] == ['error', 'debug']
+    assert handler.dropped == 2
+
+
+def testFloodKeepsEveryWarning(monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr(logging_util, 'stdout', output)
+    logger = logging_util.getLogger('test.flood', logging.DEBUG)
+    logging_util.enableQueueLogging(maxsize=10)
+    try:
+        for index in range(2000):
+            if index % 40 == 0:
+                logger.warning(f'warning {index}')
+            else:
+                logger.debug(f'debug {index}')
+        stats = logging_util.loggingStats()
+    finally:
+        logging_util.disableQueueLogging()
+    warnings = [line for line in output.getvalue().splitlines() if '[WARNING]' in line]
+    assert stats['dropped'] > 0
+    assert len(warnings) == 50
\ No newline at end of file
@@ -0,0 +1,57 @@
+import pytest
+
+from v5.models.slash import InvocationStats
+from v5.util.metrics import Metric, MetricsRegistry
+
+
+def testMetricIsAbstract():
+    with pytest.raises(TypeError):
+        Metric('v5_untyped', 'Metric without samples.')
+
+
+def testLabeledChildrenAreCreatedOnceAndExposed():
+    registry = MetricsRegistry()
+    responses = registry.counter('v5_responses_total', 'Responses.', ('route', 'status'))
+    ok = responses.labels('GET /gateway', '200')
+    ok.inc()
+    responses.labels('GET /gateway', '200').inc(2)
+    assert responses.labels('GET /gateway', '200') is ok
+    assert registry.counter('v5_responses_total', 'Responses.', ('route', 'status')) is responses
+    with pytest.raises(ValueError):
+        responses.labels('GET /gateway')
+    with pytest.raises(TypeError):
+        registry.gauge('v5_responses_total', 'Responses.')
+    assert registry.expose().splitlines() == [
+        '# HELP v5_responses_total Responses.',
+        '# TYPE v5_responses_total counter',
+        'v5_responses_total{route="GET /gateway",status="200"} 3'
+    ]
+
+
+def testHistogramBucketsAreCumulativeAndInclusive():
+    registry = MetricsRegistry()
+    latency = registry.histogram('v5_latency_seconds', 'Latency.', bounds=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+    assert latency.count == 4
+    assert latency.expose()[2:] == [
+        'v5_latency_seconds_bucket{le="0.1"} 2',
+        'v5_latency_seconds_bucket{le="1.0"} 3',
+        'v5_latency_seconds_bucket{le="+Inf"} 4',
+        'v5_latency_seconds_sum 2.65',
+        'v5_latency_seconds_count 4'
+    ]
+
+
+def testInvocationStatsAreSummedFromPerCommandMetrics():
+    registry = MetricsRegistry()
+    stats = InvocationStats(registry)
+    stats.record('photo', 0.02, False)
+    stats.record('photo', 2.5, True, failed=True)
+    stats.record('dice', 0.02, False)
+    assert (stats.invoked, stats.deferred, stats.failed) == (3, 1, 1)
+    assert stats.buckets[1] == 2 and stats.buckets[7] == 1
+    assert stats.percentile(0.5) == 0.05
+    exposed = registry.expose()
+    # Latency is recorded once, per command.
+    assert exposed.count('# TYPE') == 3 and 'v5_command_latency_seconds_count{command="photo"} 2' in exposed
\ No newline at end of file
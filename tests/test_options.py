@@ -0,0 +1,90 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.bench_options import Command, Interaction
+from v5.core.gateway import GatewayFilter
+from v5.models.slash import ApplicationCommand, InteractionRouter, InteractionsAPI, OptionError, OptionSchema, \
+    ApplicationCommandOptionType
+
+
+def resolvePhoto(options):
+    router = InteractionRouter()
+    router.add(ApplicationCommand(Command))
+    data = copy.deepcopy(Interaction)
+    data['options'][0]['options'] = options
+    node, values = router.resolve(data)
+    assert node.path == ('photo',)
+    return node.plan(values)
+
+
+def testPlanConvertsOptionsOfSubcommand():
+    assert resolvePhoto(Interaction['options'][0]['options']) == {'animal': 'animal_cat', 'count': 3, 'only_smol': True}
+    # Optional options not given are omitted, so defaults of the handler apply.
+    assert resolvePhoto([{'name': 'animal', 'type': 3, 'value': 'animal_dog'}]) == {'animal': 'animal_dog'}
+
+
+@pytest.mark.parametrize('options', [
+    [{'name': 'animal', 'type': 3, 'value': 'animal_fox'}],                                         # not a choice
+    [{'name': 'animal', 'type': 3, 'value': 'animal_cat'}, {'name': 'count', 'type': 4, 'value': '3'}],  # not int
+    [{'name': 'animal', 'type': 3, 'value': 'animal_cat'}, {'name': 'size', 'type': 4, 'value': 3}],     # unknown
+    [{'name': 'count', 'type': 4, 'value': 3}]                                                      # missing required
+])
+def testPlanRejectsInvalidOptions(options):
+    with pytest.raises(OptionError):
+        resolvePhoto(options)
+
+
+def testUserOptionResolvesMember():
+    schema = OptionSchema('target', ApplicationCommandOptionType.USER, required=True)
+    user = {'id': '300000000000000001', 'username': 'latte'}
+    resolved = {'users': {user['id']: user}, 'members': {user['id']: {'nick': 'espresso'}}}
+    assert schema.convert(user['id'], resolved) == {'nick': 'espresso', 'user': user}
+    assert schema.convert(user['id'], {'users': {user['id']: user}}) == user
+    assert schema.convert(user['id']) == 300000000000000001
+
+
+def testDispatchInvokesHandlerWithConvertedOptions():
+    async def main():
+        interactions = InteractionsAPI(SimpleNamespace(gatewayFilter=GatewayFilter()), None, deferAfter=None)
+        calls = []
+
+        async def photo(interaction, animal: str, count: int = 1, only_smol: bool = False):
+            calls.append((animal, count, only_smol))
+
+        command = ApplicationCommand(Command)
+        command.handler('photo')(photo)
+        interactions.addCommand(command)
+        data = copy.deepcopy(Interaction)
+        data['options'][0]['options'] = [{'name': 'animal', 'type': 3, 'value': 'animal_penguin'}]
+        payload = {'id': '900000000000000001', 'type': 2, 'token': 'token', 'data': data}
+        await interactions.dispatch(payload)
+        data['options'][0]['options'] = [{'name': 'animal', 'type': 3, 'value': 'animal_fox'}]
+        await interactions.dispatch(payload)    # Invalid options are not dispatched.
+        assert calls == [('animal_penguin', 1, False)]
+    asyncio.run(main())
+
+
+def testRemoveForgetsIdTheCommandWasAddedUnder():
+    router = InteractionRouter()
+    command = ApplicationCommand(Command)
+    router.add(command)
+    # Id changes after the command is added, as synchronization patches it.
+    command._patch({'id': '800000000000000002'})
+    router.remove(command)
+    assert router.resolve(Interaction) is None
+    assert len(router) == 0
+
+
+def testToJsonDoesNotExposeCommandData():
+    command = ApplicationCommand(copy.deepcopy(Command))
+    serialized, contentHash = command.serialized, command.contentHash
+    data = command.toJson()
+    data['description'] = 'changed'
+    data['options'][0]['name'] = 'changed'
+    command.options[0].toJson()['description'] = 'changed'
+    assert command.serialized == serialized and command.contentHash == contentHash
+    assert command.toJson() == command.toJson() and command.toJson() is not command.toJson()
+    assert command.description != 'changed' and command.options[0].name != 'changed'
\ No newline at end of file
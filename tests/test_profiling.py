@@ -0,0 +1,26 @@
+import pytest
+
+from v5.util.profiling import Profiler, CProfiler
+
+
+def work() -> int:
+    return sum(i * i for i in range(20000))
+
+
+def testProfilerIsAbstract():
+    with pytest.raises(TypeError):
+        Profiler()
+
+
+def testNestedStartsProfileUntilOutermostStop():
+    profiler = CProfiler()
+    profiler.start()
+    profiler.start()
+    profiler.stop()
+    assert profiler.isRunning
+    work()
+    profiler.stop()
+    assert not profiler.isRunning
+    profiler.stop()     # Extra stop is ignored.
+    assert any(name == 'work' for _, _, name in profiler.stats())
+    assert any('work (test_profiling.py:' in stack for stack in profiler.collapsed())
\ No newline at end of file
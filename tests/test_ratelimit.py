@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from benchmarks.mockdiscord import MockDiscord
+from v5.core.ratelimit import RateLimiter
+from v5.core.rest import HTTPException, RestClient
+from v5.models.discordAPI import Route
+
+
+def testLearnedBucketHashKeepsInflightBucket():
+    async def main():
+        limiter = RateLimiter()
+        first, second = Route.command('POST', 1, 600), Route.command('POST', 1, 601)
+        firstBucket = await limiter.acquire(first)
+        secondBucket = await limiter.acquire(second)
+        # Response of the first guild teaches the hash while the second guild's request is still in flight.
+        limiter.release(first, firstBucket, {
+            'X-RateLimit-Limit': '5', 'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset-After': '1.0',
+            'X-RateLimit-Bucket': 'abcd'
+        })
+        assert limiter.getBucket(first) is firstBucket
+        assert limiter.getBucket(second) is secondBucket
+    asyncio.run(main())
+
+
+def testIdleInteractionBucketsAreEvicted():
+    async def main():
+        limiter = RateLimiter(sweepSize=8)
+        for interactionId in range(100):
+            route = Route('POST', Route.InteractionCallback, interaction_id=interactionId, interaction_token='token')
+            bucket = await limiter.acquire(route)
+            limiter.release(route, bucket, {})
+        busy = await limiter.acquire(Route.command('POST', 1, 600))
+        assert len(limiter.buckets) <= 16
+        limiter.evictIdle()
+        # Buckets with requests in flight are kept.
+        assert list(limiter.buckets.values()) == [busy]
+    asyncio.run(main())
+
+
+def testNoRateLimitedResponsesAtAdvertisedRate(port):
+    """10 guild buckets of 5 requests per second saturate the global limit of 50 per second, with jittery latency."""
+    async def main():
+        server = MockDiscord(port=port, latency=0.02, jitter=0.01)
+        await server.start()
+        rest = RestClient(headers={'Authorization': 'Bot token'}, apiBase=server.apiBase, warmup=0)
+        semaphore = asyncio.Semaphore(32)
+
+        async def register(guildId: int, index: int):
+            async with semaphore:
+                await rest.request(
+                    Route.command('POST', 1, guildId), json={'name': f'command{index}', 'description': 'Test'}
+                )
+
+        try:
+            await asyncio.gather(*(register(600 + guild, index) for index in range(10) for guild in range(10)))
+        finally:
+            await rest.close()
+            await server.close()
+        assert server.requests == 100
+        assert server.limited == 0
+    asyncio.run(main())
+
+def testErrorsDoNotLeakInteractionToken(port):
+    async def main():
+        server = MockDiscord(port=port, errorRate=1.0)
+        await server.start()
+        rest = RestClient(apiBase=server.apiBase, warmup=0)
+        route = Route('POST', Route.InteractionFollowup, application_id=1, interaction_id=2, interaction_token='secret')
+        try:
+            with pytest.raises(HTTPException) as error:
+                await rest.request(route, json={'content': 'hi'})
+        finally:
+            await rest.close()
+            await server.close()
+        assert error.value.status == 500
+        assert error.value.url == rest.apiBase + 'webhooks/1/{interaction_token}'
+        assert 'secret' not in str(error.value)
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+import builtins
+import sys
+from types import SimpleNamespace
+
+from benchmarks.replay import syntheticFrames
+from v5.core import recorder
+from v5.core.recorder import GatewayRecorder, GatewayRecording, GatewayReplay
+
+
+class ParsingBot:
+    """Bot whose MESSAGE_CREATE parser dispatches an event handled in 1 ms. Other frames spawn no task."""
+
+    def __init__(self):
+        self._connection = SimpleNamespace(parsers={'MESSAGE_CREATE': self.parseMessage})
+        self.handled = 0
+
+    def dispatch(self, event, *args):
+        pass
+
+    def _schedule_event(self, coro, *args):
+        return asyncio.ensure_future(coro)
+
+    def parseMessage(self, data):
+        self._schedule_event(self.onMessage())
+
+    async def onMessage(self):
+        await asyncio.sleep(0.001)
+        self.handled += 1
+
+
+def testRecordingRoundTrip(workdir):
+    async def main():
+        recorder = GatewayRecorder('recordings/gateway.jsonl.gz', eventTypes={'MESSAGE_CREATE'})
+        recorder.start()
+        for frame in syntheticFrames(100):
+            recorder.record(frame)
+        await recorder.stop()
+        frames = [frame async for _, frame in GatewayRecording('recordings/gateway.jsonl.gz').iterFrames()]
+        assert recorder.recorded == len(frames) == 50
+        assert {frame['t'] for frame in frames} == {'MESSAGE_CREATE'}
+    asyncio.run(main())
+
+
+def testQueueIsBounded(workdir):
+    async def main():
+        recorder = GatewayRecorder('recordings/gateway.jsonl.gz', maxQueue=10)
+        recorder.start()
+        # Event loop is not released, so the writer can not drain the queue.
+        for frame in syntheticFrames(25):
+            recorder.record(frame)
+        assert (recorder.recorded, recorder.dropped) == (10, 15)
+        await recorder.stop()
+        frames = [frame async for _, frame in GatewayRecording('recordings/gateway.jsonl.gz').iterFrames()]
+        assert [frame['s'] for frame in frames] == list(range(1, 11))
+    asyncio.run(main())
+
+
+def testReplayMeasuresEveryFrameFromFeeding(workdir):
+    async def main():
+        recorder = GatewayRecorder('recordings/gateway.jsonl.gz')
+        recorder.start()
+        for frame in syntheticFrames(40):
+            recorder.record(frame)
+        await recorder.stop()
+        bot = ParsingBot()
+        report = await GatewayReplay(bot, GatewayRecording('recordings/gateway.jsonl.gz')).run()
+        assert bot.handled == 20
+        assert report['frames'] == report['handled'] == 40
+        assert report['errors'] == 0
+        # Half of the frames wait for the 1 ms handler.
+        assert report['handler_max_ms'] >= 1.0
+    asyncio.run(main())
+
+
+def testRssWorksWithoutProcAndResource(monkeypatch):
+    assert recorder._rss() > 0
+
+    def noProc(*args, **kwargs):
+        raise OSError('no /proc')
+    monkeypatch.setattr(builtins, 'open', noProc)
+    assert recorder._rss() > 0    # Peak RSS of resource module.
+    monkeypatch.setitem(sys.modules, 'resource', None)    # Platform without resource module. (ex: Windows)
+    assert recorder._rss() == 0
\ No newline at end of file
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from v5.util.resources import ResourceFile, ResourceType, JsonFile, FileWriter
+
+
+def testConstructionPrintsNothing(workdir, capsys):
+    async def main():
+        ResourceFile('data.txt', ResourceType.TEXT)
+        JsonFile('data.json', {'key': 'value'})
+        await FileWriter.flushAll()
+
+    asyncio.run(main())
+    assert capsys.readouterr().out == ''
+
+
+def testRapidWritesAreCoalesced(workdir):
+    async def main():
+        file = JsonFile('counter.json', {'count': 0})
+        for count in range(1, 1001):
+            file.submit({'count': count})
+        await FileWriter.flushAll()
+        return file.writer
+
+    writer = asyncio.run(main())
+    assert writer.submitted == 1001
+    # Every submit above happens before the debounce timer fires, so they collapse into one write.
+    assert writer.writes == 1
+    with open('counter.json', encoding='utf-8') as f:
+        assert json.load(f) == {'count': 1000}
+    assert [name for name in os.listdir('.') if name.endswith('.tmp')] == []
+
+
+def testConcurrentFilesOfSamePathShareWriter(workdir):
+    async def main():
+        first = JsonFile('shared.json', {'owner': 'first'})
+        second = JsonFile('shared.json', {'owner': 'second'})
+        assert first.writer is second.writer
+        await FileWriter.flushAll()
+
+    asyncio.run(main())
+    with open('shared.json', encoding='utf-8') as f:
+        assert json.load(f) == {'owner': 'second'}
+
+def testConstructionNeedsNoEventLoop(workdir):
+    # No event loop exists in a worker thread.
+    with ThreadPoolExecutor(1) as executor:
+        executor.submit(JsonFile, 'created.json', {'created': True}).result()
+    with open('created.json', encoding='utf-8') as f:
+        assert json.load(f) == {'created': True}
+
+
+def testWriteDoesNotWaitForDebounce(workdir, monkeypatch):
+    monkeypatch.setattr(FileWriter, 'delay', 60.0)
+
+    async def main():
+        file = JsonFile('now.json', {'count': 0})
+        await asyncio.wait_for(file.write({'count': 1}), timeout=5.0)
+        with open('now.json', encoding='utf-8') as f:
+            assert json.load(f) == {'count': 1}
+
+    asyncio.run(main())
+
+def testReadsAreUncachedBytesUnlessRequested(workdir):
+    async def main():
+        ResourceFile.cache.clear()
+        data = bytes(range(256)) * (ResourceFile.cache.mmapThreshold // 256)
+        file = ResourceFile('large.bin', ResourceType.BYTES, content=data)
+        assert await file.read() == data
+        assert ResourceFile.cache.size == 0
+
+        copied = await file.read(cached=True)
+        assert type(copied) is bytes and copied == data
+        view = await file.read(cached=True, view=True)
+        assert isinstance(view, memoryview) and view.readonly and view == data
+        view.release()
+        ResourceFile.cache.clear()
+
+    asyncio.run(main())
\ No newline at end of file
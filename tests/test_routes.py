@@ -0,0 +1,33 @@
+import pickle
+
+import pytest
+
+from v5.models.discordAPI import Route
+
+
+def testRoutesAreInternedRegardlessOfKeywordOrder():
+    route = Route('PATCH', Route.GuildCommand, application_id=1, guild_id=2, command_id=3)
+    assert Route('PATCH', Route.GuildCommand, command_id=3, guild_id=2, application_id=1) is route
+    assert Route.command('PATCH', 1, 2, 3) is route
+    assert pickle.loads(pickle.dumps(route)) is route
+    assert route.relativeUrl == 'applications/1/guilds/2/commands/3'
+    assert route.bucket == 'PATCH applications/{application_id}/guilds/{guild_id}/commands/{command_id}:1:2'
+    assert route.isGlobal
+    with pytest.raises(AttributeError):
+        route.method = 'GET'
+
+
+def testInteractionRoutesAreNotInterned():
+    route = Route('POST', Route.InteractionCallback, interaction_id=1, interaction_token='secret token')
+    again = Route('POST', Route.InteractionCallback, interaction_id=1, interaction_token='secret token')
+    assert route == again and route is not again
+    assert not route.isGlobal
+    assert route.relativeUrl == 'interactions/1/secret%20token/callback'
+    assert all(interned is not route for interned in Route._interned.values())
+
+
+def testInteractionTokenStaysOutOfKeys():
+    route = Route('POST', Route.InteractionFollowup, application_id=1, interaction_id=2, interaction_token='secret')
+    assert route.relativeUrl == 'webhooks/1/secret'
+    assert route.bucket == 'POST webhooks/{application_id}/{interaction_token}:1:2'
+    assert 'secret' not in repr(route)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import asyncio
+
+from benchmarks.mockdiscord import MockDiscord
+from v5.core.rest import HTTPException, RestClient
+from v5.core.sync import CommandSync
+from v5.models.discordAPI import Route
+from v5.models.slash import ApplicationCommand
+
+ApplicationId: int = 100000000000000001
+GuildId: int = 600000000000000001
+
+
+def testCreateReplacesCommandOfSameScopeAndName(monkeypatch):
+    monkeypatch.setattr(ApplicationCommand, '__commands__', {})
+
+    async def ping(interaction):
+        pass
+
+    first = ApplicationCommand.create(name='ping', guild_id=GuildId)(ping)
+    ApplicationCommand.create(name='ping')(ping)
+    # Same command defined again, as a reloaded extension does.
+    second = ApplicationCommand.create(name='ping', description='Pong!', guild_id=GuildId)(ping)
+    assert len(ApplicationCommand.__commands__) == 2
+    assert ApplicationCommand.__commands__[(GuildId, 'ping')] is second is not first
+
+
+def testGlobalScopeIsOnlySynchronizedWhenOwned(port):
+    async def main():
+        server = MockDiscord(port=port)
+        await server.start()
+        rest = RestClient(headers={'Authorization': 'Bot token'}, apiBase=server.apiBase, warmup=0)
+        sync = CommandSync(rest, ApplicationId)
+        guildCommand = ApplicationCommand({'guild_id': GuildId, 'name': 'ping', 'description': 'Pong!'})
+        try:
+            # Global command registered by another tool.
+            await rest.request(Route.command('POST', ApplicationId), json={'name': 'other', 'description': 'Other'})
+            await sync.sync([guildCommand])
+            assert [command['name'] for command in await sync.fetch()] == ['other']
+            assert [command['name'] for command in await sync.fetch(GuildId)] == ['ping']
+            await sync.sync([guildCommand], pruneGlobal=True)
+            assert await sync.fetch() == []
+        finally:
+            await rest.close()
+            await server.close()
+    asyncio.run(main())
+
+def testFewChangesAreSentOneByOneAndFailedScopesAreSkipped(port, monkeypatch):
+    async def main():
+        server = MockDiscord(port=port)
+        await server.start()
+        rest = RestClient(headers={'Authorization': 'Bot token'}, apiBase=server.apiBase, warmup=0)
+        sync = CommandSync(rest, ApplicationId)
+        overwritten = []
+        overwrite = sync.overwrite
+
+        async def recordOverwrite(guild_id, local):
+            overwritten.append(guild_id)
+            await overwrite(guild_id, local)
+
+        monkeypatch.setattr(sync, 'overwrite', recordOverwrite)
+        local = [
+            ApplicationCommand({'guild_id': GuildId, 'name': f'command{i}', 'description': 'Test'}) for i in range(10)
+        ]
+        try:
+            await sync.sync(local)
+            # Every command is created : scope is overwritten at once.
+            assert overwritten == [GuildId]
+            local[0] = ApplicationCommand({'guild_id': GuildId, 'name': 'command0', 'description': 'Changed'})
+            forbidden = ApplicationCommand({'guild_id': GuildId + 1, 'name': 'ping', 'description': 'Pong!'})
+            fetch = sync.fetch
+
+            async def fetchForbidden(guild_id=None):
+                if guild_id == GuildId + 1:
+                    raise HTTPException(403, 'GET', 'guild commands', {'message': 'Missing Access', 'code': 50001})
+                return await fetch(guild_id)
+
+            monkeypatch.setattr(sync, 'fetch', fetchForbidden)
+            synced = await sync.sync([*local, forbidden])
+            # One changed command of ten is patched alone, and the forbidden guild does not stop the others.
+            assert overwritten == [GuildId]
+            assert synced == local
+            assert [guild_id for guild_id in sync.failed] == [GuildId + 1]
+            assert {command['description'] for command in await fetch(GuildId)} == {'Changed', 'Test'}
+        finally:
+            await rest.close()
+            await server.close()
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import aiohttp
+from nacl.signing import SigningKey
+
+from benchmarks.bench_options import Command, Interaction
+from v5.core.gateway import GatewayFilter
+from v5.core.webhook import InteractionServer
+from v5.models.slash import ApplicationCommand, InteractionsAPI
+
+signingKey = SigningKey.generate()
+
+
+def signed(body: bytes, key: SigningKey = signingKey) -> dict:
+    timestamp = str(int(time.time()))
+    return {
+        'Content-Type': 'application/json',
+        'X-Signature-Ed25519': key.sign(timestamp.encode('utf-8') + body).signature.hex(),
+        'X-Signature-Timestamp': timestamp
+    }
+
+
+def server(port: int = 8080) -> InteractionServer:
+    interactions = InteractionsAPI(SimpleNamespace(gatewayFilter=GatewayFilter()), None, deferAfter=None)
+
+    async def photo(interaction, animal: str, count: int = 1, only_smol: bool = False):
+        await interaction.respond(content=f'{count} {animal}')
+
+    command = ApplicationCommand(Command)
+    command.handler('photo')(photo)
+    interactions.addCommand(command)
+    return InteractionServer(interactions, signingKey.verify_key.encode().hex(), host='127.0.0.1', port=port)
+
+
+def testVerifyAcceptsOnlyValidSignatures():
+    body = b'{"type":1}'
+    headers = signed(body)
+    signature, timestamp = headers['X-Signature-Ed25519'], headers['X-Signature-Timestamp']
+    verifier = server()
+    assert verifier.verify(signature, timestamp, body)
+    assert not verifier.verify(signature, timestamp, b'{"type":2}')
+    assert not verifier.verify(signature, str(int(timestamp) + 1), body)
+    assert not verifier.verify(signed(body, SigningKey.generate())['X-Signature-Ed25519'], timestamp, body)
+    assert not verifier.verify('not hex', timestamp, body)
+    assert not verifier.verify(signature[:-2], timestamp, body)
+    assert not verifier.verify(None, timestamp, body)
+
+
+def testEndpointRejectsUnsignedAndRespondsInline(port):
+    async def main():
+        endpoint = server(port)
+        await endpoint.start()
+        url = f'http://127.0.0.1:{port}/interactions'
+        ping = b'{"type":1}'
+        command = json.dumps({'id': '900000000000000001', 'type': 2, 'token': 'token', 'data': Interaction}).encode()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, data=ping, headers={'Content-Type': 'application/json'}) as response:
+                    assert response.status == 401
+                async with session.post(url, data=ping, headers=signed(b'{"type":2}')) as response:
+                    assert response.status == 401
+                async with session.post(url, data=ping, headers=signed(ping)) as response:
+                    assert (response.status, await response.json()) == (200, {'type': 1})
+                async with session.post(url, data=command, headers=signed(command)) as response:
+                    assert response.status == 200
+                    reply = await response.json()
+        finally:
+            await endpoint.close()
+        assert reply['type'] == 4 and reply['data']['content'] == '3 animal_cat'
+        assert (endpoint.received, endpoint.rejected) == (4, 2)
+    asyncio.run(main())
\ No newline at end of file
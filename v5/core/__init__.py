@@ -1 +1 @@
-from .v5 import Latte
+from .latte import Latte
\ No newline at end of file
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List, Dict, Callable, NoReturn
+
+from v5.util.type_hints import JSON, CoroutineFunction
+from v5.util.logging_util import getLogger, LogLevels
+from v5.util.metrics import Counter, registry
+
+
+__all__ = (
+    'GatewayFilter',
+)
+
+logger = getLogger('core.gateway', LogLevels.DEBUG)
+
+framesReceived: Counter = registry.counter('v5_gateway_frames_total', 'Number of gateway frames received.')
+eventsDelivered: Counter = registry.counter(
+    'v5_gateway_events_delivered_total', 'Number of gateway events delivered to V5 listeners.', ('event',)
+)
+
+
+class GatewayFilter:
+    """Prefilter of gateway events for V5 listeners.
+
+    Listeners subscribe to event types (`t` field of gateway payload), and payloads of other types
+    never reach listener code nor schedule a task. Payloads are fed after discord.py decodes them, since
+    discord.py receives zlib-stream compressed frames and never dispatches them uncompressed.
+    Each payload is shared by every interested listener.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[str, List[CoroutineFunction]] = {}
+        self.received: int = 0      # Number of frames fed into the filter.
+        self.matched: int = 0       # Number of frames delivered to listeners.
+
+    @property
+    def eventTypes(self) -> List[str]:
+        return list(self._listeners.keys())
+
+    def subscribe(self, eventType: str, listener: CoroutineFunction) -> NoReturn:
+        """Subscribe listener to gateway event type.
+        Args:
+            eventType (str): Gateway event type. ex) 'INTERACTION_CREATE'
+            listener (CoroutineFunction): Coroutine function receiving decoded gateway payload.
+        """
+        if not asyncio.iscoroutinefunction(listener):
+            raise TypeError('Listener must be coroutine function')
+        self._listeners.setdefault(eventType, []).append(listener)
+
+    def unsubscribe(self, eventType: str, listener: CoroutineFunction) -> NoReturn:
+        """Remove listener from gateway event type."""
+        listeners = self._listeners.get(eventType)
+        if listeners is None or listener not in listeners:
+            return
+        listeners.remove(listener)
+        if not listeners:
+            del self._listeners[eventType]
+
+    def listen(self, eventType: str) -> Callable[[CoroutineFunction], CoroutineFunction]:
+        """Decorator version of GatewayFilter.subscribe"""
+        def wrapper(listener: CoroutineFunction) -> CoroutineFunction:
+            self.subscribe(eventType, listener)
+            return listener
+        return wrapper
+
+    def feed(self, payload: JSON) -> bool:
+        """Feed gateway payload already decoded by discord.py.
+        Returns:
+            True if the payload is delivered to listeners.
+        """
+        self.received += 1
+        framesReceived.inc()
+        listeners = self._listeners.get(payload.get('t'))
+        if not listeners:
+            return False
+        self._deliver(payload, listeners)
+        return True
+
+    def _deliver(self, payload: JSON, listeners: List[CoroutineFunction]) -> NoReturn:
+        self.matched += 1
+        eventsDelivered.labels(payload['t']).inc()
+        for listener in tuple(listeners):
+            asyncio.ensure_future(self._run(listener, payload))
+
+    @staticmethod
+    async def _run(listener: CoroutineFunction, payload: JSON) -> NoReturn:
+        try:
+            await listener(payload)
+        except Exception:
+            logger.exception(f'Exception in gateway listener {listener.__qualname__} for {payload.get("t")}')
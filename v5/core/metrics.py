@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Optional, NoReturn
+
+from aiohttp import web
+
+from v5.util.metrics import MetricsRegistry, registry
+from v5.util.type_hints import JSON
+from v5.util.logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'MetricsServer',
+)
+
+logger = getLogger('core.metrics', LogLevels.DEBUG)
+
+
+class MetricsServer:
+    """Local HTTP endpoint exposing metrics registry in Prometheus text format.
+    Binds to localhost by default, since metrics are not meant to be public.
+    """
+
+    contentType: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(
+            self,
+            metrics: MetricsRegistry = registry,
+            host: str = '127.0.0.1',
+            port: int = 9100,
+            path: str = '/metrics'
+    ):
+        """
+        Args:
+            metrics (MetricsRegistry): Registry to expose.
+            host (str): Host to bind.
+            port (int): Port to bind.
+            path (str): Path of the endpoint.
+        """
+        self._metrics: MetricsRegistry = metrics
+        self._host: str = host
+        self._port: int = port
+        self._path: str = path
+        self._runner: Optional[web.AppRunner] = None
+
+    @classmethod
+    def fromConfig(cls, config: JSON, metrics: MetricsRegistry = registry) -> MetricsServer:
+        """Create MetricsServer using `metrics.endpoint` section of the config.
+        Args:
+            config (JSON): {"host": <str>, "port": <int>, "path": <str>}
+            metrics (MetricsRegistry): Registry to expose.
+        """
+        return cls(
+            metrics,
+            host=config.get('host', '127.0.0.1'),
+            port=config.get('port', 9100),
+            path=config.get('path', '/metrics')
+        )
+
+    def createApplication(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(self._path, self.handle)
+        return app
+
+    @property
+    def isRunning(self) -> bool:
+        return self._runner is not None
+
+    async def start(self) -> NoReturn:
+        """Start listening on host:port."""
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.createApplication(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        logger.info(f'MetricsServer listening on http://{self._host}:{self._port}{self._path}')
+
+    async def close(self) -> NoReturn:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.debug('MetricsServer closed.')
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self._metrics.expose().encode('utf-8'), headers={'Content-Type': self.contentType})
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Deque, Mapping, NoReturn
+
+from v5.models.discordAPI import Route
+from v5.util.logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'Bucket',
+    'GlobalLimiter',
+    'RateLimiter'
+)
+
+logger = getLogger('core.ratelimit', LogLevels.DEBUG)
+
+
+class Bucket:
+    """Rate limit state of one bucket. (route template + major parameters)
+
+    Requests acquire the bucket in FIFO order. Until the first response tells the real limit,
+    only one request is sent at a time. After that, up to `remaining` requests run concurrently,
+    and the rest wait until the bucket resets.
+    """
+
+    def __init__(self, key: str):
+        self.key: str = key
+        self.limit: int = 1
+        self.remaining: int = 1
+        self.resetAt: float = 0.0       # Loop time when the bucket resets. 0.0 means unknown.
+        self.unlimited: bool = False    # Route responded without rate limit headers.
+        self._known: bool = False       # Whether rate limit headers were received at least once.
+        self._inflight: int = 0
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._updated: asyncio.Event = asyncio.Event()
+
+    def __repr__(self) -> str:
+        return f'<Bucket(key={self.key}, remaining={self.remaining}/{self.limit}, inflight={self._inflight})>'
+
+    def isIdle(self, now: float) -> bool:
+        """Whether no request uses or waits for the bucket, and its window has passed.
+        Such bucket knows nothing that a new bucket would not learn from the next response.
+        Args:
+            now (float): Current loop time.
+        """
+        if self._inflight or self._lock.locked():
+            return False
+        return self.unlimited or (self.resetAt == 0.0 and self.remaining > 0) or 0.0 < self.resetAt <= now
+
+    async def acquire(self) -> NoReturn:
+        """Wait until a request can be sent in this bucket."""
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            while not self.unlimited:
+                now = loop.time()
+                if self.resetAt and now >= self.resetAt:
+                    self.remaining = self.limit
+                    self.resetAt = 0.0
+                if self.remaining > 0:
+                    self.remaining -= 1
+                    break
+                if self.resetAt:
+                    await asyncio.sleep(self.resetAt - now)
+                else:
+                    # Reset time is not known yet. Wait for responses of in-flight requests.
+                    self._updated.clear()
+                    await self._updated.wait()
+            self._inflight += 1
+
+    def release(self, headers: Mapping[str, str]) -> NoReturn:
+        """Update bucket state using rate limit headers of the response.
+        Args:
+            headers (Mapping[str, str]): Response headers.
+        """
+        self._inflight -= 1
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            self._known = True
+            self.limit = int(headers.get('X-RateLimit-Limit', self.limit))
+            # Requests still in flight may not be counted in server's value yet.
+            self.remaining = max(int(remaining) - self._inflight, 0)
+            resetAfter = headers.get('X-RateLimit-Reset-After')
+            if resetAfter is not None:
+                self.resetAt = asyncio.get_event_loop().time() + float(resetAfter)
+        elif not self._known:
+            # No rate limit information at all : treat route as unlimited.
+            self.unlimited = True
+        else:
+            self.cancel(released=True)
+            return
+        self._updated.set()
+
+    def cancel(self, released: bool = False) -> NoReturn:
+        """Give back the slot of a request whose response did not carry rate limit information."""
+        if not released:
+            self._inflight -= 1
+        if not self.unlimited:
+            self.remaining += 1
+        self._updated.set()
+
+    def block(self, retryAfter: float) -> NoReturn:
+        """Block bucket after 429 response.
+        Args:
+            retryAfter (float): Seconds to wait before next request.
+        """
+        self._inflight -= 1
+        self._known = True
+        self.unlimited = False
+        self.remaining = 0
+        self.resetAt = asyncio.get_event_loop().time() + retryAfter
+        self._updated.set()
+
+
+class GlobalLimiter:
+    """Sliding window limiter for global rate limit. (requests per second across every bucket)
+
+    Discord counts requests when they arrive, not when they are sent, so `margin` seconds are added to the window
+    to absorb latency variance between requests. Otherwise requests sent exactly one period apart can arrive
+    within one period of discord's window, and hit the global limit.
+    """
+
+    def __init__(self, limit: int, period: float = 1.0, margin: float = 0.0):
+        self.limit: int = limit
+        self.period: float = period + margin
+        self._sent: Deque[float] = deque(maxlen=limit)
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._unlocked: asyncio.Event = asyncio.Event()
+        self._unlocked.set()
+
+    async def acquire(self) -> NoReturn:
+        """Wait until global rate limit allows one more request."""
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            await self._unlocked.wait()
+            while len(self._sent) == self.limit:
+                wait = self._sent[0] + self.period - loop.time()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self._sent.append(loop.time())
+
+    async def block(self, retryAfter: float) -> NoReturn:
+        """Block every global-limited request after global 429 response.
+        Args:
+            retryAfter (float): Seconds to wait before next request.
+        """
+        if not self._unlocked.is_set():
+            return
+        logger.warning(f'Global rate limit reached. Blocking requests for {retryAfter} seconds.')
+        self._unlocked.clear()
+        try:
+            await asyncio.sleep(retryAfter)
+        finally:
+            self._unlocked.set()
+
+
+class RateLimiter:
+    """Request scheduler keyed by route template plus major parameters.
+
+    Bucket hashes reported by `X-RateLimit-Bucket` are remembered per route,
+    so routes sharing one discord bucket also share one local Bucket object.
+    Requests in different buckets never wait for each other.
+    Interaction routes make one bucket per interaction, so idle buckets are evicted once there are `sweepSize`
+    buckets. (See RateLimiter.evictIdle)
+    """
+
+    def __init__(self, globalLimit: int = 50, globalMargin: float = 0.0, sweepSize: int = 1024):
+        """
+        Args:
+            globalLimit (int): Maximum number of global-limited requests per second.
+            globalMargin (float): Seconds added to the global window to absorb latency variance. See GlobalLimiter.
+            sweepSize (int): Number of buckets which triggers eviction of idle buckets.
+        """
+        self._buckets: Dict[str, Bucket] = {}
+        self._sweepSize: int = sweepSize
+        self._sweepAt: int = sweepSize
+        self._hashes: Dict[str, str] = {}  # route key -> X-RateLimit-Bucket hash
+        self._global: GlobalLimiter = GlobalLimiter(globalLimit, margin=globalMargin)
+
+    @property
+    def buckets(self) -> Dict[str, Bucket]:
+        return self._buckets
+
+    def getBucket(self, route: Route) -> Bucket:
+        bucketHash: Optional[str] = self._hashes.get(route.key)
+        key: str = f'{bucketHash}:{route.majorParams}' if bucketHash is not None else route.bucket
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._sweepAt:
+                self.evictIdle()
+            # Bucket hash was learned from another major parameter, while requests of this one may still be
+            # in flight in the template-keyed bucket. Keep using that bucket, so that one discord bucket
+            # is never spent by two local buckets.
+            bucket = self._buckets.get(route.bucket) if bucketHash is not None else None
+            self._buckets[key] = bucket = bucket or Bucket(key)
+        return bucket
+
+    def evictIdle(self) -> int:
+        """Drop buckets which are idle. (See Bucket.isIdle)
+        Next sweep happens when the number of buckets doubles, so sweeping costs O(1) per new bucket on average.
+        Returns:
+            Number of evicted bucket keys.
+        """
+        now: float = asyncio.get_event_loop().time()
+        idle = [key for key, bucket in self._buckets.items() if bucket.isIdle(now)]
+        for key in idle:
+            del self._buckets[key]
+        self._sweepAt = max(self._sweepSize, 2 * len(self._buckets))
+        if idle:
+            logger.debug(f'Evicted {len(idle)} idle rate limit buckets. {len(self._buckets)} buckets left.')
+        return len(idle)
+
+    async def acquire(self, route: Route) -> Bucket:
+        """Wait until request to the route can be sent.
+        Returns:
+            Bucket which must be released with RateLimiter.release or RateLimiter.block.
+        """
+        bucket = self.getBucket(route)
+        await bucket.acquire()
+        if route.isGlobal:
+            await self._global.acquire()
+        return bucket
+
+    def release(self, route: Route, bucket: Bucket, headers: Mapping[str, str]) -> NoReturn:
+        """Update bucket using response headers, and remember bucket hash of the route."""
+        bucket.release(headers)
+        bucketHash: Optional[str] = headers.get('X-RateLimit-Bucket')
+        if bucketHash is not None:
+            self._hashes.setdefault(route.key, bucketHash)
+            # Keep learned state when requests of this route move to the hash-keyed bucket.
+            self._buckets.setdefault(f'{bucketHash}:{route.majorParams}', bucket)
+
+    async def block(self, bucket: Bucket, retryAfter: float, isGlobal: bool) -> NoReturn:
+        """Handle 429 response.
+        Args:
+            bucket (Bucket): Bucket of the rate limited request.
+            retryAfter (float): Seconds to wait before next request.
+            isGlobal (bool): Whether global rate limit is reached.
+        """
+        if isGlobal:
+            bucket.cancel()
+            await self._global.block(retryAfter)
+        else:
+            logger.debug(f'{bucket!r} is rate limited. Retrying after {retryAfter} seconds.')
+            bucket.block(retryAfter)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tracemalloc
+import zlib
+from typing import Optional, Any, List, Dict, Tuple, Set, AsyncIterator, NoReturn, TYPE_CHECKING
+
+from v5.util.resources import ResourceFile, ResourceType
+from v5.util.type_hints import JSON
+from v5.util.logging_util import getLogger, LogLevels
+
+if TYPE_CHECKING:
+    from v5.core.v5 import V5
+
+
+__all__ = (
+    'GatewayRecorder',
+    'GatewayRecording',
+    'GatewayReplay'
+)
+
+logger = getLogger('core.recorder', LogLevels.DEBUG)
+
+# Recording format : gzip compressed JSON lines of {"ts": <seconds since recording start>, "frame": <payload>}
+_GzipWindowBits = 16 + zlib.MAX_WBITS
+
+
+class GatewayRecorder:
+    """Records gateway frames with timestamps into gzip compressed JSON lines file.
+
+    Frames are queued without blocking the event loop, and compressed & written by ResourceFile.writeStream.
+    The queue is bounded, so memory stays bounded regardless of recording length even if the disk falls behind :
+    frames arriving while the queue is full are dropped, and counted in `dropped`.
+    The file is replaced atomically when recording stops.
+    """
+
+    def __init__(self, path: str, eventTypes: Optional[Set[str]] = None, level: int = 6, maxQueue: int = 10000):
+        """
+        Args:
+            path (str): Path of the recording. (ex: 'recordings/gateway.jsonl.gz')
+            eventTypes (Set[str]): Event types to record. Every frame is recorded if None.
+            level (int): zlib compression level.
+            maxQueue (int): Maximum number of frames waiting to be written.
+        """
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: ResourceFile = ResourceFile(path, ResourceType.BYTES)
+        self._eventTypes: Optional[Set[str]] = eventTypes
+        self._level: int = level
+        self._maxQueue: int = maxQueue
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Future] = None
+        self._startedAt: float = 0.0
+        self.recorded: int = 0
+        self.dropped: int = 0
+
+    @property
+    def path(self) -> str:
+        return self._file.relativePath
+
+    @property
+    def isRecording(self) -> bool:
+        return self._queue is not None
+
+    def start(self) -> NoReturn:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(self._maxQueue)
+        self._startedAt = asyncio.get_event_loop().time()
+        self._writer = asyncio.ensure_future(self._file.writeStream(self._chunks(self._queue)))
+        logger.info(f'Recording gateway frames into {self.path}')
+
+    def record(self, frame: JSON) -> NoReturn:
+        """Queue gateway frame. Called for every decoded frame while recording."""
+        if self._queue is None or (self._eventTypes is not None and frame.get('t') not in self._eventTypes):
+            return
+        try:
+            self._queue.put_nowait((asyncio.get_event_loop().time() - self._startedAt, frame))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self.recorded += 1
+
+    async def stop(self) -> int:
+        """Stop recording, and wait until the recording is written.
+        Returns:
+            Number of compressed bytes written.
+        """
+        if self._queue is None:
+            return 0
+        queue, self._queue = self._queue, None
+        await queue.put(None)
+        written: int = await self._writer
+        logger.info(
+            f'Recorded {self.recorded} gateway frames into {self.path} ({written} bytes, {self.dropped} dropped)'
+        )
+        return written
+
+    async def _chunks(self, queue: asyncio.Queue) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(self._level, zlib.DEFLATED, _GzipWindowBits)
+        while True:
+            item: Optional[Tuple[float, JSON]] = await queue.get()
+            if item is None:
+                break
+            timestamp, frame = item
+            line: str = json.dumps({'ts': round(timestamp, 6), 'frame': frame}, separators=(',', ':'))
+            yield compressor.compress(line.encode('utf-8') + b'\n')
+        yield compressor.flush()
+
+
+class GatewayRecording:
+    """Reads recording written by GatewayRecorder, one frame at a time."""
+
+    def __init__(self, path: str):
+        self._file: ResourceFile = ResourceFile(path, ResourceType.BYTES)
+
+    async def iterFrames(self) -> AsyncIterator[Tuple[float, JSON]]:
+        """Decode (timestamp, frame) of recorded frames in order."""
+        decompressor = zlib.decompressobj(_GzipWindowBits)
+        buffer: bytes = b''
+        async for chunk in self._file.iterChunks():
+            buffer += decompressor.decompress(chunk)
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line:
+                    record: JSON = json.loads(line)
+                    yield record['ts'], record['frame']
+        buffer += decompressor.flush()
+        if buffer.strip():
+            record = json.loads(buffer)
+            yield record['ts'], record['frame']
+
+
+def _rss() -> int:
+    """Current resident set size in bytes. Falls back to peak RSS on platforms without /proc,
+    and 0 where neither is available. (ex: Windows)
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource     # POSIX only.
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+class GatewayReplay:
+    """Feeds recorded gateway frames into V5 without network, the same way DiscordWebSocket does.
+
+    Every frame is dispatched as `socket_response` (V5 gateway filter, interactions), and dispatch frames are
+    parsed by discord.py's connection state, which dispatches events to listeners and cogs.
+    Handler latency of a frame is measured from feeding the frame until every task it spawned is done.
+    Frames spawning no task are measured until they are fed, so every frame has a latency.
+    """
+
+    def __init__(self, bot: V5, recording: GatewayRecording, speed: Optional[float] = None, traceMemory: bool = False):
+        """
+        Args:
+            bot (V5): Bot receiving the frames. Does not need to be logged in.
+            recording (GatewayRecording): Recording to replay.
+            speed (Optional[float]): 1.0 replays in recorded timing, N replays N times faster. Maximum speed if None.
+            traceMemory (bool): Trace python allocations with tracemalloc. Precise, but makes replay slower.
+        """
+        self._bot: V5 = bot
+        self._recording: GatewayRecording = recording
+        self._speed: Optional[float] = speed or None
+        self._traceMemory: bool = traceMemory
+        self._latencies: List[float] = []
+        self._pending: Dict[int, List[Any]] = {}    # frame index -> [fed at, number of unfinished tasks]
+        self._current: Optional[int] = None
+        self.frames: int = 0
+        self.errors: int = 0
+
+    def _track(self, task: asyncio.Future) -> asyncio.Future:
+        index = self._current
+        if index is not None:
+            # Task spawned while the frame is fed. (event listeners, gateway filter listeners)
+            loop = task.get_loop()
+            self._pending[index][1] += 1
+            task.add_done_callback(lambda _: self._onTaskDone(loop, index))
+        return task
+
+    def _taskFactory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+        return self._track(asyncio.Task(coro, loop=loop, **kwargs))
+
+    def _scheduleEvent(self, *args, **kwargs) -> asyncio.Task:
+        # discord.py creates event tasks without the task factory.
+        return self._track(type(self._bot)._schedule_event(self._bot, *args, **kwargs))
+
+    def _onTaskDone(self, loop: asyncio.AbstractEventLoop, index: int) -> NoReturn:
+        state = self._pending[index]
+        state[1] -= 1
+        if state[1] == 0:
+            del self._pending[index]
+            self._latencies.append(loop.time() - state[0])
+
+    def _feed(self, index: int, frame: JSON) -> NoReturn:
+        loop = asyncio.get_event_loop()
+        state = self._pending[index] = [loop.time(), 0]
+        self._current = index
+        try:
+            self._bot.dispatch('socket_response', frame)
+            if frame.get('op') == 0:
+                parser = self._bot._connection.parsers.get(frame.get('t'))
+                if parser is not None:
+                    parser(frame['d'])
+        finally:
+            self._current = None
+            if state[1] == 0:
+                # No task is spawned. Latency is the time parsing the frame.
+                del self._pending[index]
+                self._latencies.append(loop.time() - state[0])
+
+    async def run(self) -> JSON:
+        """Replay every frame, and wait until their handlers finish.
+        Returns:
+            Report of the replay.
+        """
+        loop = asyncio.get_event_loop()
+        previousFactory = loop.get_task_factory()
+        loop.set_task_factory(self._taskFactory)
+        self._bot._schedule_event = self._scheduleEvent
+        if self._traceMemory:
+            tracemalloc.start()
+        rssBefore: int = _rss()
+        behind: List[float] = []
+        started: float = loop.time()
+        firstTimestamp: Optional[float] = None
+        try:
+            async for timestamp, frame in self._recording.iterFrames():
+                if self._speed is not None:
+                    if firstTimestamp is None:
+                        firstTimestamp = timestamp
+                    target: float = started + (timestamp - firstTimestamp) / self._speed
+                    now: float = loop.time()
+                    if target > now:
+                        await asyncio.sleep(target - now)
+                    else:
+                        behind.append(now - target)
+                try:
+                    self._feed(self.frames, frame)
+                except Exception:
+                    self.errors += 1
+                    logger.exception(f'Exception while replaying frame {self.frames} ({frame.get("t")})')
+                self.frames += 1
+                # Let handlers of the frame run before the next frame, as the websocket reader does.
+                await asyncio.sleep(0)
+            while self._pending:
+                await asyncio.sleep(0.001)
+        finally:
+            loop.set_task_factory(previousFactory)
+            del self._bot._schedule_event
+        elapsed: float = loop.time() - started
+        rssAfter: int = _rss()
+        latencies: List[float] = sorted(self._latencies)
+        report: JSON = {
+            'frames': self.frames,
+            'errors': self.errors,
+            'handled': len(latencies),
+            'elapsed': elapsed,
+            'events_per_sec': self.frames / elapsed if elapsed > 0 else 0.0,
+            'handler_p50_ms': _percentile(latencies, 0.5) * 1e3,
+            'handler_p99_ms': _percentile(latencies, 0.99) * 1e3,
+            'handler_max_ms': latencies[-1] * 1e3 if latencies else 0.0,
+            'behind_max_ms': max(behind) * 1e3 if behind else 0.0,
+            'rss_growth_mb': (rssAfter - rssBefore) / 1e6
+        }
+        if self._traceMemory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report['traced_mb'] = current / 1e6
+            report['traced_peak_mb'] = peak / 1e6
+        return report
\ No newline at end of file
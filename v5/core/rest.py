@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from typing import Optional, Any, Dict, NoReturn
+
+import aiohttp
+
+from v5.core.ratelimit import RateLimiter
+from v5.models.discordAPI import DiscordAPI, Route
+from v5.util.config import Config
+from v5.util.type_hints import JSON
+from v5.util.logging_util import getLogger, LogLevels
+from v5.util.metrics import Histogram, Counter, registry
+
+
+__all__ = (
+    'HTTPException',
+    'RestClient'
+)
+
+logger = getLogger('core.rest', LogLevels.DEBUG)
+
+requestLatency: Histogram = registry.histogram(
+    'v5_rest_request_seconds', 'Latency of REST requests including rate limit waits.', ('route',)
+)
+responses: Counter = registry.counter('v5_rest_responses_total', 'Number of REST responses.', ('route', 'status'))
+
+
+class HTTPException(Exception):
+    """Exception raised when discord REST api responds with error status. Interaction tokens are redacted from url."""
+    def __init__(self, status: int, method: str, url: str, data: Any):
+        super(HTTPException, self).__init__(status, method, url, data)
+        self.status: int = status
+        self.method: str = method
+        self.url: str = url
+        self.data: Any = data
+
+    def __repr__(self) -> str:
+        return f'<HTTPException(status={self.status}, method={self.method}, url={self.url})>'
+
+    def __str__(self) -> str:
+        return f'{self.method} {self.url} responded with status {self.status} : {self.data}'
+
+
+class RestClient:
+    """Long-lived HTTP client shared by every V5 REST call.
+
+    Holds one aiohttp.ClientSession (and its TCPConnector) for the whole lifetime of the bot,
+    so that keep-alive connections, DNS cache and TLS sessions are reused through requests.
+    Every request is scheduled by RateLimiter, so bursts are paced instead of hitting 429.
+    """
+
+    # Default connector options. Can be overridden in config with `http.<option>` keys.
+    defaultOptions: Dict[str, int] = {
+        'limit': 100,               # Maximum number of simultaneous connections.
+        'limit_per_host': 0,        # Maximum number of simultaneous connections per host. (0 = no limit)
+        'keepalive_timeout': 60,    # Seconds to keep idle connections in pool.
+        'ttl_dns_cache': 300,       # Seconds to cache resolved DNS entries.
+        'warmup': 2,                # Number of connections to open at startup.
+        'global_limit': 50,         # Maximum number of global-limited requests per second.
+        'global_margin_ms': 50,     # Milliseconds added to the global window, absorbing latency variance.
+        'max_retries': 5            # Maximum number of retries of rate limited request.
+    }
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, apiBase: Optional[str] = None, **options: int):
+        """Initialize RestClient. Session is created lazily in open(), since aiohttp requires running event loop.
+        Args:
+            headers (Dict[str, str]): Default headers attached to every request. (ex: Authorization header)
+            apiBase (str): Base url of discord REST api. Defaults to DiscordAPI.APIBase. (ex: url of a mock server)
+            **options (int): Connector options. See RestClient.defaultOptions.
+        """
+        self._headers: Dict[str, str] = headers or {}
+        apiBase = apiBase or DiscordAPI.APIBase
+        self._apiBase: str = apiBase if apiBase.endswith('/') else apiBase + '/'
+        self._options: Dict[str, int] = {**self.defaultOptions, **options}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._ratelimiter: RateLimiter = RateLimiter(
+            globalLimit=self._options['global_limit'],
+            globalMargin=self._options['global_margin_ms'] / 1e3
+        )
+
+    @classmethod
+    def fromConfig(cls, config: Config, headers: Optional[Dict[str, str]] = None) -> RestClient:
+        """Create RestClient using `http` section of the config.
+        Args:
+            config (Config): Config object which contains `http` section. API base is read from `http.api_base`.
+            headers (Dict[str, str]): Default headers attached to every request.
+        """
+        options: Dict[str, int] = {}
+        for key in cls.defaultOptions:
+            value = config.get(f'http.{key}')
+            if value is not None:
+                options[key] = value
+        return cls(headers=headers, apiBase=config.get('http.api_base'), **options)
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        return self._session
+
+    @property
+    def apiBase(self) -> str:
+        return self._apiBase
+
+    def urlOf(self, route: Route, redacted: bool = False) -> str:
+        """Url of the route on the API base of this client.
+        Args:
+            route (Route): Route of the endpoint.
+            redacted (bool): Leave the interaction token as placeholder. Urls in logs and errors must be redacted.
+        """
+        return self._apiBase + (route.redactedUrl if redacted else route.relativeUrl)
+
+    @property
+    def ratelimiter(self) -> RateLimiter:
+        return self._ratelimiter
+
+    @property
+    def isClosed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def open(self) -> aiohttp.ClientSession:
+        """Create session and connector if it is not opened yet."""
+        async with self._lock:
+            if self.isClosed:
+                connector = aiohttp.TCPConnector(
+                    limit=self._options['limit'],
+                    limit_per_host=self._options['limit_per_host'],
+                    keepalive_timeout=self._options['keepalive_timeout'],
+                    ttl_dns_cache=self._options['ttl_dns_cache']
+                )
+                self._session = aiohttp.ClientSession(connector=connector, headers=self._headers)
+                logger.debug(f'RestClient opened session with options {self._options}')
+        return self._session
+
+    async def warmup(self, count: Optional[int] = None) -> NoReturn:
+        """Pre-open keep-alive connections to discord api, so the first real requests skip DNS lookup & TLS handshake.
+        Args:
+            count (int): Number of connections to open. Defaults to `warmup` option.
+        """
+        count = self._options['warmup'] if count is None else count
+        if count <= 0:
+            return
+        session = await self.open()
+
+        async def touch():
+            # `gateway` endpoint does not require authorization and responds quickly.
+            async with session.get(self._apiBase + 'gateway') as response:
+                await response.read()
+
+        results = await asyncio.gather(*(touch() for _ in range(count)), return_exceptions=True)
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f'RestClient warmup : {len(failed)} of {count} connections failed. ({failed[0]!r})')
+        else:
+            logger.debug(f'RestClient warmup : {count} connections opened.')
+
+    async def close(self) -> NoReturn:
+        """Close session and every pooled connection."""
+        async with self._lock:
+            if not self.isClosed:
+                await self._session.close()
+                logger.debug('RestClient closed session.')
+            self._session = None
+
+    async def request(self, route: Route, **kwargs) -> Optional[JSON]:
+        """Send request through pooled session, waiting for the rate limit bucket of the route.
+        Args:
+            route (Route): Route of the endpoint.
+            **kwargs: Additional arguments passed to aiohttp.ClientSession.request (json, data, headers, ...)
+        Returns:
+            Decoded json body of the response, or None if response has no json body.
+        Raises:
+            HTTPException: Response has error status code, or request is still rate limited after retries.
+        """
+        started: float = perf_counter()
+        try:
+            return await self._request(route, **kwargs)
+        finally:
+            requestLatency.labels(route.key).observe(perf_counter() - started)
+
+    async def _request(self, route: Route, **kwargs) -> Optional[JSON]:
+        session = self._session if not self.isClosed else await self.open()
+        url: str = self.urlOf(route)
+        for tries in range(self._options['max_retries'] + 1):
+            bucket = await self._ratelimiter.acquire(route)
+            try:
+                async with session.request(route.method, url, **kwargs) as response:
+                    if response.content_type == 'application/json':
+                        data = await response.json(encoding='utf-8')
+                    else:
+                        data = await response.text(encoding='utf-8') or None
+            except BaseException:
+                bucket.cancel()
+                raise
+
+            responses.labels(route.key, str(response.status)).inc()
+            if response.status != 429:
+                self._ratelimiter.release(route, bucket, response.headers)
+                if response.status >= 400:
+                    raise HTTPException(response.status, route.method, self.urlOf(route, redacted=True), data)
+                return data
+
+            # Rate limited. Body contains retry_after in seconds. (Retry-After header as fallback)
+            if isinstance(data, dict) and 'retry_after' in data:
+                retryAfter = float(data['retry_after'])
+            else:
+                retryAfter = float(response.headers.get('Retry-After', 1))
+            isGlobal = response.headers.get('X-RateLimit-Global') is not None
+            logger.warning(
+                f'{route!r} is rate limited (global={isGlobal}). Retry {tries + 1} after {retryAfter} seconds.'
+            )
+            await self._ratelimiter.block(bucket, retryAfter, isGlobal)
+
+        raise HTTPException(
+            429, route.method, self.urlOf(route, redacted=True), 'Maximum retries of rate limited request exceeded.'
+        )
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from typing import Optional, List, Dict, Tuple, NamedTuple, ClassVar
+
+from v5.core.rest import RestClient
+from v5.models.discordAPI import Route
+from v5.models.slash import ApplicationCommand, canonicalJson
+from v5.util.resources import JsonFile
+from v5.util.type_hints import JSON
+from v5.util.logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'SyncPlan',
+    'CommandSync',
+    'CommandCache'
+)
+
+logger = getLogger('core.sync', LogLevels.DEBUG)
+
+
+class SyncPlan(NamedTuple):
+    """Requests needed to make remote commands of one scope equal to local definitions."""
+    creates: List[ApplicationCommand]
+    patches: List[Tuple[ApplicationCommand, JSON]]    # (local command, remote json)
+    deletes: List[JSON]                             # remote json
+    unchanged: List[Tuple[ApplicationCommand, JSON]]  # (local command, remote json)
+
+    @property
+    def changes(self) -> int:
+        return len(self.creates) + len(self.patches) + len(self.deletes)
+
+    @property
+    def size(self) -> int:
+        """Number of commands in the scope, local or remote."""
+        return len(self.creates) + len(self.patches) + len(self.deletes) + len(self.unchanged)
+
+    @classmethod
+    def diff(cls, local: List[ApplicationCommand], remote: List[JSON]) -> SyncPlan:
+        """Compare local commands and remote commands by name and canonical json.
+        Args:
+            local (List[ApplicationCommand]): Commands defined in code.
+            remote (List[JSON]): Commands fetched from discord.
+        """
+        remoteByName: Dict[str, JSON] = {command['name']: command for command in remote}
+        plan = cls(creates=[], patches=[], deletes=[], unchanged=[])
+        for command in local:
+            remoteCommand: Optional[JSON] = remoteByName.pop(command.name, None)
+            if remoteCommand is None:
+                plan.creates.append(command)
+            elif canonicalJson(remoteCommand) != command.serialized:
+                plan.patches.append((command, remoteCommand))
+            else:
+                plan.unchanged.append((command, remoteCommand))
+        plan.deletes.extend(remoteByName.values())
+        return plan
+
+
+class CommandSync:
+    """Diff-based synchronizer of application commands.
+
+    Remote commands of each scope (global, or one guild) are fetched once, and only needed
+    creates, patches and deletes are sent. When most commands of the scope are changed, every
+    command of the scope is overwritten with a single bulk request instead.
+    Scopes are synchronized independently : a failed scope (ex: 403 of a guild) does not stop the others.
+    """
+
+    def __init__(self, rest: RestClient, application_id: int, bulkThreshold: int = 5, bulkRatio: float = 0.5):
+        """
+        Args:
+            rest (RestClient): V5's shared REST client.
+            application_id (int): id of the application which owns the commands.
+            bulkThreshold (int): Minimum number of changes in a scope to use bulk overwrite.
+            bulkRatio (float): Minimum ratio of changed commands in a scope to use bulk overwrite.
+        """
+        self._rest: RestClient = rest
+        self._application_id: int = application_id
+        self._bulkThreshold: int = bulkThreshold
+        self._bulkRatio: float = bulkRatio
+        self.failed: Dict[Optional[int], Exception] = {}    # guild_id (None for global) -> error of failed scope
+
+    def _route(self, method: str, guild_id: Optional[int], command_id: Optional[int] = None) -> Route:
+        return Route.command(method, self._application_id, guild_id, command_id)
+
+    async def sync(self, commands: List[ApplicationCommand], pruneGlobal: bool = False) -> List[ApplicationCommand]:
+        """Synchronize commands of every scope having commands defined in code.
+        Global scope without global commands in code is left untouched, since its commands may be owned by
+        other tools, unless `pruneGlobal` is set.
+        Args:
+            commands (List[ApplicationCommand]): Every command defined in code.
+            pruneGlobal (bool): Synchronize global scope even without global commands, deleting every remote one.
+        Returns:
+            Synchronized commands, patched with remote id. Commands of failed scopes (See CommandSync.failed)
+            are not included.
+        """
+        scopes: Dict[Optional[int], List[ApplicationCommand]] = {None: []} if pruneGlobal else {}
+        for command in commands:
+            scopes.setdefault(command.guild_id, []).append(command)
+
+        # Each scope has its own rate limit bucket, so scopes are synchronized concurrently.
+        results = await asyncio.gather(
+            *(self.syncScope(guild_id, local) for guild_id, local in scopes.items()),
+            return_exceptions=True
+        )
+        synced: List[ApplicationCommand] = []
+        for guild_id, result in zip(scopes, results):
+            if isinstance(result, Exception):
+                self.failed[guild_id] = result
+                logger.error(
+                    f'Command sync ({self._scope(guild_id)}) failed. Its commands are not synchronized. ({result!r})'
+                )
+            elif isinstance(result, BaseException):
+                raise result    # Cancellation
+            else:
+                synced.extend(result)
+        return synced
+
+    @staticmethod
+    def _scope(guild_id: Optional[int]) -> str:
+        return 'global' if guild_id is None else f'guild {guild_id}'
+
+    async def fetch(self, guild_id: Optional[int] = None) -> List[JSON]:
+        """Fetch remote commands of the scope."""
+        return await self._rest.request(self._route('GET', guild_id))
+
+    async def syncScope(self, guild_id: Optional[int], local: List[ApplicationCommand]) -> List[ApplicationCommand]:
+        """Synchronize commands of one scope.
+        Args:
+            guild_id (Optional[int]): Guild of the scope. Global scope if None.
+            local (List[ApplicationCommand]): Commands defined in code in this scope.
+        """
+        plan = SyncPlan.diff(local, await self.fetch(guild_id))
+        logger.info(
+            f'Command sync ({self._scope(guild_id)}) : {len(plan.creates)} creates, {len(plan.patches)} patches, '
+            f'{len(plan.deletes)} deletes, {len(plan.unchanged)} unchanged.'
+        )
+
+        for command, remoteCommand in plan.unchanged:
+            command._patch(remoteCommand)
+
+        if plan.changes >= self._bulkThreshold and plan.changes >= plan.size * self._bulkRatio:
+            # Mostly changed scope. One request instead of one per change.
+            await self.overwrite(guild_id, local)
+            return local
+
+        for command in plan.creates:
+            command._patch(await self._rest.request(self._route('POST', guild_id), json=command.canonical))
+        for command, remoteCommand in plan.patches:
+            command._patch(await self._rest.request(
+                self._route('PATCH', guild_id, remoteCommand['id']),
+                json=command.canonical
+            ))
+        for remoteCommand in plan.deletes:
+            await self._rest.request(self._route('DELETE', guild_id, remoteCommand['id']))
+        return local
+
+    async def overwrite(self, guild_id: Optional[int], local: List[ApplicationCommand]) -> None:
+        """Overwrite every command of the scope with a single bulk request."""
+        remote: List[JSON] = await self._rest.request(
+            self._route('PUT', guild_id),
+            json=[command.canonical for command in local]
+        )
+        remoteByName: Dict[str, JSON] = {command['name']: command for command in remote}
+        for command in local:
+            command._patch(remoteByName[command.name])
+
+
+class CommandCache:
+    """On-disk registry of synchronized application commands.
+
+    Stores id and content hash of every synchronized command, and hash of the whole set.
+    When local definitions hash to the cached value, commands are hydrated from the cache
+    without any request to discord.
+
+    # structure
+    {
+        "application_id": <int: id of the application>,
+        "hash": <str: hash of every command in the set>,
+        "commands": [
+            {"guild_id": <Optional[int]>, "name": <str>, "id": <int>, "hash": <str: content hash of the command>}
+        ]
+    }
+    """
+
+    defaultPath: ClassVar[str] = os.path.join('cache', 'commands.json')
+
+    def __init__(self, path: str = defaultPath):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: JsonFile = JsonFile(path=path, content=None)
+
+    @property
+    def file(self) -> JsonFile:
+        return self._file
+
+    @staticmethod
+    def setHash(application_id: int, commands: List[ApplicationCommand]) -> str:
+        """Hash of the command set. Does not depend on definition order of the commands."""
+        entries = sorted(f'{command.guild_id}:{command.name}:{command.contentHash}' for command in commands)
+        return hashlib.sha256('\n'.join([str(application_id), *entries]).encode('utf-8')).hexdigest()
+
+    async def load(self) -> Optional[JSON]:
+        """Read cache file. Returns None if the cache does not exist or is broken."""
+        if not self._file.exists():
+            return None
+        try:
+            return await self._file.read()
+        except ValueError:
+            # Empty or broken file. (json.JSONDecodeError is subclass of ValueError)
+            return None
+
+    async def hydrate(self, application_id: int, commands: List[ApplicationCommand]) -> bool:
+        """Patch commands with cached ids if local definitions are not changed since last synchronization.
+        Returns:
+            True if every command is hydrated from the cache, False if synchronization is needed.
+        """
+        cache: Optional[JSON] = await self.load()
+        if cache is None or cache.get('hash') != self.setHash(application_id, commands):
+            return False
+
+        cached: Dict[Tuple[Optional[int], str], JSON] = {
+            (entry['guild_id'], entry['name']): entry for entry in cache['commands']
+        }
+        try:
+            entries: List[JSON] = [cached[(command.guild_id, command.name)] for command in commands]
+        except KeyError:
+            # Cache file is edited by hand.
+            return False
+        for command, entry in zip(commands, entries):
+            command._patch({'id': entry['id'], 'application_id': application_id})
+        logger.info(f'Command sync : {len(commands)} commands hydrated from cache {self._file.relativePath}.')
+        return True
+
+    async def store(self, application_id: int, commands: List[ApplicationCommand]) -> None:
+        """Write synchronized commands into the cache."""
+        await self._file.write({
+            'application_id': application_id,
+            'hash': self.setHash(application_id, commands),
+            'commands': [
+                {
+                    'guild_id': command.guild_id,
+                    'name': command.name,
+                    'id': command.id,
+                    'hash': command.contentHash
+                }
+                for command in commands
+            ]
+        })
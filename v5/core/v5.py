@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-import aiohttp
 import inspect
-from typing import Optional, List, NamedTuple
+from typing import Optional, Any, List, NamedTuple
 from discord import VersionInfo
 from discord.ext.commands import Bot
 
+from v5.core.gateway import GatewayFilter
+from v5.core.rest import RestClient
+from v5.core.sync import CommandSync, CommandCache
+from v5.core.webhook import InteractionServer
+from v5.core.metrics import MetricsServer
+from v5.core.recorder import GatewayRecorder
 from v5.ext.manager import ExtensionManager
 from v5.models.discordAPI import *
 from v5.models.slash import *
 from v5.util.type_hints import JSON
 from v5.util.config import Config
-from v5.util.logging_util import getLogger, Logger, LogLevels
+from v5.util.resources import FileWriter
+from v5.util.logging_util import getLogger, Logger, LogLevels, enableQueueLogging
 
 
 class Info(NamedTuple):
@@ -31,7 +37,15 @@ class V5(Bot):
 
     def __init__(self):
         self.config: Config = Config(name='bot')
-        self._ext: ExtensionManager = ExtensionManager(bot=self, config=self.config.get('ext'))
+        # Loggers only enqueue records, and a background thread formats & writes them. Enabled by `logging.queue`.
+        if self.config.get('logging.queue'):
+            enableQueueLogging(
+                maxsize=self.config.get('logging.queue_size') or 10000,
+                policy=self.config.get('logging.drop_policy') or 'newest',
+                debugRate=self.config.get('logging.debug_rate'),
+                debugBurst=self.config.get('logging.debug_burst') or 100
+            )
+        self._ext: ExtensionManager = ExtensionManager(bot=self, config=self.config)
         self._logger: Logger = getLogger('core.Latte', LogLevels.DEBUG)
         self._libInfo = Info(
             name='V5Engine',
@@ -45,13 +59,46 @@ class V5(Bot):
         )
 
         # Application Commands
-        
+        self.__application_commands__: List[ApplicationCommand] = []
+        self._applicationId: Optional[int] = None   # Fetched on login.
+
+        # Shared REST client. Session is opened in V5.start() and closed in V5.close().
+        self._rest: RestClient = RestClient.fromConfig(self.config, headers=self.getAuthHeader())
+
+        # Gateway prefilter. Listeners subscribe to event types instead of receiving every frame.
+        self._gatewayFilter: GatewayFilter = GatewayFilter()
+
         super().__init__(
             command_prefix=self.config.get('prefix'),
             help_command=None,
             description="카페라테를 좋아하는 개발자가 만든 디스코드 봇이에요!"
         )
 
+        # Interaction router. Must be created after Bot.__init__, since it registers listener.
+        # Handlers not responding in `interactions.defer_after` seconds are deferred. (0 or false disables it)
+        deferAfter: Optional[float] = self.config.get('interactions.defer_after')
+        self._interactions: InteractionsAPI = InteractionsAPI(
+            self,
+            self._rest,
+            deferAfter=2.2 if deferAfter is None else (deferAfter or None)
+        )
+
+        # Optional HTTP endpoint receiving interactions as outgoing webhook. Enabled by `interactions.endpoint` section.
+        endpoint: Optional[JSON] = self.config.get('interactions.endpoint')
+        self._interactionServer: Optional[InteractionServer] = InteractionServer.fromConfig(
+            self._interactions,
+            endpoint
+        ) if endpoint else None
+
+        # Optional local endpoint exposing metrics in Prometheus text format. Enabled by `metrics.endpoint` section.
+        metricsEndpoint: Optional[JSON] = self.config.get('metrics.endpoint')
+        self._metricsServer: Optional[MetricsServer] = MetricsServer.fromConfig(
+            metricsEndpoint
+        ) if metricsEndpoint else None
+
+        # Gateway frames are recorded into `gateway.record` path while the bot runs, to be replayed offline.
+        self._recorder: Optional[GatewayRecorder] = None
+
     @property
     def logger(self) -> Logger:
         return self._logger
@@ -59,9 +106,106 @@ class V5(Bot):
     def debug(self, *args, **kwargs):
         return self._logger.debug(*args, **kwargs)
 
+    @property
+    def rest(self) -> RestClient:
+        return self._rest
+
+    @property
+    def applicationId(self) -> Optional[int]:
+        return self._applicationId
+
+    @property
+    def interactions(self) -> InteractionsAPI:
+        return self._interactions
+
+    @property
+    def gatewayFilter(self) -> GatewayFilter:
+        return self._gatewayFilter
+
+    @property
+    def interactionServer(self) -> Optional[InteractionServer]:
+        return self._interactionServer
+
+    @property
+    def metricsServer(self) -> Optional[MetricsServer]:
+        return self._metricsServer
+
+    @property
+    def ext(self) -> ExtensionManager:
+        return self._ext
+
+    @property
+    def recorder(self) -> Optional[GatewayRecorder]:
+        return self._recorder
+
+    def startRecording(self, path: str, eventTypes: Optional[List[str]] = None) -> GatewayRecorder:
+        """Start recording gateway frames. See GatewayReplay to replay the recording.
+        Args:
+            path (str): Path of the recording. (gzip compressed JSON lines)
+            eventTypes (Optional[List[str]]): Event types to record. Every frame is recorded if None.
+        """
+        if self._recorder is None:
+            self._recorder = GatewayRecorder(path, set(eventTypes) if eventTypes else None)
+            self._recorder.start()
+        return self._recorder
+
+    async def stopRecording(self) -> int:
+        """Stop recording gateway frames, and wait until the recording is written."""
+        if self._recorder is None:
+            return 0
+        recorder, self._recorder = self._recorder, None
+        return await recorder.stop()
+
+    def _onPrefixChange(self, key: str, old: Any, new: Any):
+        self.command_prefix = new
+        self._logger.info(f'Command prefix is changed to {new!r}.')
+
+    def dispatch(self, event_name: str, *args, **kwargs):
+        if event_name == 'socket_response':
+            # Payload is decoded by discord.py. Deliver it only to listeners subscribing its event type.
+            self._gatewayFilter.feed(args[0])
+            if self._recorder is not None:
+                self._recorder.record(args[0])
+        super().dispatch(event_name, *args, **kwargs)
+
     def run(self, *args, **kwargs):
         super().run(self.config.get('token'), *args, **kwargs)
 
+    async def start(self, *args, **kwargs):
+        await self._rest.open()
+        await self._rest.warmup()
+        if self._interactionServer is not None:
+            await self._interactionServer.start()
+        if self._metricsServer is not None:
+            await self._metricsServer.start()
+        if self.config.get('gateway.record'):
+            self.startRecording(self.config.get('gateway.record'), self.config.get('gateway.record_events'))
+        # Hot reload of bot config. Disabled by setting `config.hot_reload` to false.
+        if self.config.get('config.hot_reload') is not False:
+            self.config.subscribe('prefix', self._onPrefixChange)
+            self.config.subscribe('ext', self._ext.onConfigChange)
+            self.config.watch(interval=self.config.get('config.poll_interval') or 1.0)
+        # Threadsafe extensions are pre-imported concurrently, and lazy ones are loaded on first use of their commands.
+        await self._ext.loadAll()
+        await super().start(*args, **kwargs)
+
+    async def login(self, *args, **kwargs):
+        await super().login(*args, **kwargs)
+        self._applicationId = (await self.application_info()).id
+        await self.syncCommands()
+
+    async def close(self):
+        self.config.unwatch()
+        if self._interactionServer is not None:
+            await self._interactionServer.close()
+        if self._metricsServer is not None:
+            await self._metricsServer.close()
+        await self.stopRecording()
+        await self._rest.close()
+        await super().close()
+        # Extensions are unloaded in Bot.close, so their last writes are flushed after it.
+        await FileWriter.flushAll()
+
     # HTTP request util
     def getAuthHeader(self) -> JSON:
         return {
@@ -82,13 +226,14 @@ class V5(Bot):
         if isinstance(options, list):
             commandJson['options'] = [option for option in options if isinstance(option, dict)]
 
-        async with aiohttp.ClientSession() as s:
-            res = await s.post(
-                json=commandJson
-            )
-            command = ApplicationCommand(await res.json())
-            self.__application_commands__.append(command)
-            return command
+        commandData: JSON = await self._rest.request(
+            Route('POST', Route.GlobalCommands, application_id=self._applicationId),
+            json=commandJson
+        )
+        command = ApplicationCommand(commandData)
+        self.__application_commands__.append(command)
+        self._interactions.addCommand(command)
+        return command
 
     async def createGuildCommand(
             self,
@@ -104,11 +249,40 @@ class V5(Bot):
         if isinstance(options, list):
             commandJson['options'] = [option for option in options if isinstance(option, dict)]
 
-        async with aiohttp.ClientSession() as s:
-            res = await s.post(
-                url='',
-                json=commandJson
-            )
-            command = ApplicationCommand(await res.json())
-            self.__application_commands__.append(command)
-            return command
\ No newline at end of file
+        commandData: JSON = await self._rest.request(
+            Route('POST', Route.GuildCommands, application_id=self._applicationId, guild_id=guild_id),
+            json=commandJson
+        )
+        commandData.setdefault('guild_id', guild_id)
+        command = ApplicationCommand(commandData)
+        self.__application_commands__.append(command)
+        self._interactions.addCommand(command)
+        return command
+
+    async def syncCommands(self, force: bool = False) -> List[ApplicationCommand]:
+        """Synchronize application commands created with ApplicationCommand.create() with discord.
+        Remote commands are fetched once per scope, and only needed changes are sent.
+        If local definitions are not changed since last synchronization, commands are hydrated from
+        on-disk cache without any request.
+        Args:
+            force (bool): Ignore cache and always synchronize with discord.
+        Returns:
+            Synchronized application commands.
+        """
+        commands: List[ApplicationCommand] = [
+            command for command in ApplicationCommand.__commands__.values()
+            if command.application_id in (None, self._applicationId)
+        ]
+        cache = CommandCache(self.config.get('commands.cache') or CommandCache.defaultPath)
+        if force or not await cache.hydrate(self._applicationId, commands):
+            sync = CommandSync(self._rest, self._applicationId)
+            commands = await sync.sync(commands, pruneGlobal=bool(self.config.get('commands.prune_global')))
+            if not sync.failed:
+                # Failed scopes are synchronized again on next start.
+                await cache.store(self._applicationId, commands)
+        for command in self.__application_commands__:
+            self._interactions.removeCommand(command)
+        for command in commands:
+            self._interactions.addCommand(command)
+        self.__application_commands__ = commands
+        return commands
\ No newline at end of file
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Optional, Any, NoReturn, TYPE_CHECKING
+
+from aiohttp import web
+from nacl.signing import VerifyKey
+from nacl.exceptions import BadSignatureError
+
+from v5.models.slash import InteractionType, InteractionResponseType
+from v5.util.type_hints import JSON
+from v5.util.logging_util import getLogger, LogLevels
+
+if TYPE_CHECKING:
+    from v5.models.slash import InteractionsAPI
+
+
+__all__ = (
+    'InteractionServer',
+)
+
+logger = getLogger('core.webhook', LogLevels.DEBUG)
+
+
+class InteractionServer:
+    """HTTP endpoint receiving interactions as outgoing webhook. (Interactions Endpoint URL of the application)
+
+    Every request is verified with Ed25519 signature of discord, using VerifyKey created once from public key.
+    Interactions are dispatched through the same router as gateway interactions, and the initial response
+    is sent inline as the HTTP response instead of a separate REST request.
+    """
+
+    # Discord fails interactions not responded in 3 seconds.
+    responseTimeout: float = 3.0
+
+    def __init__(
+            self,
+            interactions: InteractionsAPI,
+            publicKey: str,
+            host: str = '0.0.0.0',
+            port: int = 8080,
+            path: str = '/interactions'
+    ):
+        """
+        Args:
+            interactions (InteractionsAPI): Interaction router shared with gateway path.
+            publicKey (str): Hex encoded public key of the application.
+            host (str): Host to bind.
+            port (int): Port to bind.
+            path (str): Path of the endpoint.
+        """
+        self._interactions: InteractionsAPI = interactions
+        self._verifyKey: VerifyKey = VerifyKey(bytes.fromhex(publicKey))
+        self._host: str = host
+        self._port: int = port
+        self._path: str = path
+        self._runner: Optional[web.AppRunner] = None
+        self.received: int = 0      # Number of requests received.
+        self.rejected: int = 0      # Number of requests with invalid signature.
+
+    @classmethod
+    def fromConfig(cls, interactions: InteractionsAPI, config: JSON) -> InteractionServer:
+        """Create InteractionServer using `interactions.endpoint` section of the config.
+        Args:
+            interactions (InteractionsAPI): Interaction router shared with gateway path.
+            config (JSON): {"public_key": <str>, "host": <str>, "port": <int>, "path": <str>}
+        """
+        return cls(
+            interactions,
+            publicKey=config['public_key'],
+            host=config.get('host', '0.0.0.0'),
+            port=config.get('port', 8080),
+            path=config.get('path', '/interactions')
+        )
+
+    def createApplication(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self._path, self.handle)
+        return app
+
+    @property
+    def isRunning(self) -> bool:
+        return self._runner is not None
+
+    async def start(self) -> NoReturn:
+        """Start listening on host:port."""
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.createApplication(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        logger.info(f'InteractionServer listening on http://{self._host}:{self._port}{self._path}')
+
+    async def close(self) -> NoReturn:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.debug('InteractionServer closed.')
+
+    def verify(self, signature: Optional[str], timestamp: Optional[str], body: bytes) -> bool:
+        """Verify Ed25519 signature of the request.
+        Args:
+            signature (str): Hex encoded value of X-Signature-Ed25519 header.
+            timestamp (str): Value of X-Signature-Timestamp header.
+            body (bytes): Raw request body.
+        """
+        if signature is None or timestamp is None:
+            return False
+        try:
+            self._verifyKey.verify(timestamp.encode('utf-8') + body, bytes.fromhex(signature))
+        except (BadSignatureError, ValueError):
+            # ValueError : signature is not hex string, or has invalid length.
+            return False
+        return True
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.received += 1
+        body: bytes = await request.read()
+        if not self.verify(
+                request.headers.get('X-Signature-Ed25519'),
+                request.headers.get('X-Signature-Timestamp'),
+                body
+        ):
+            self.rejected += 1
+            return web.Response(status=401, text='invalid request signature')
+
+        payload: JSON = json.loads(body)
+        if payload['type'] == InteractionType.PING.value:
+            return web.json_response({'type': InteractionResponseType.PONG.value})
+
+        responder: asyncio.Future = asyncio.get_event_loop().create_future()
+        dispatch: asyncio.Future = asyncio.ensure_future(self._dispatch(payload, responder))
+        await asyncio.wait((responder, dispatch), timeout=self.responseTimeout, return_when=asyncio.FIRST_COMPLETED)
+        if responder.done():
+            return web.json_response(responder.result())
+
+        # Handler finished (or timed out) without initial response. Discord shows failed interaction.
+        responder.cancel()
+        logger.warning(f'Interaction {payload["data"]["name"]} is not responded. Responding with error status.')
+        return web.Response(status=500, text='interaction is not responded')
+
+    async def _dispatch(self, payload: JSON, responder: asyncio.Future) -> Any:
+        try:
+            return await self._interactions.dispatch(payload, responder)
+        except Exception:
+            logger.exception(f'Exception while dispatching interaction {payload["data"]["name"]}')
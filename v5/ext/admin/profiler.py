@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import time
+from typing import Optional, List, Callable, NoReturn, Union
+
+from discord.ext import commands
+from v5.core import Latte
+from v5.ext.cogs import LatteCog
+from v5.models.slash import ApplicationCommand
+from v5.util.type_hints import CoroutineFunction
+from v5.util.profiling import Profiler, CProfiler, SamplingProfiler
+
+
+ProfileTarget = Union[ApplicationCommand, commands.Command]
+
+
+class ProfileSession:
+    """Profiling of a bounded time window, or of next N invocations of a command.
+
+    Callbacks of the command are wrapped only while the session is running, and restored when it finishes,
+    so commands have no profiling overhead at all when profiling is off.
+    Note that other tasks running on the event loop while a profiled invocation awaits are also recorded.
+    """
+
+    outputRoot: str = 'cache/profiles'
+
+    def __init__(
+            self,
+            profiler: Profiler,
+            name: str,
+            target: Optional[ProfileTarget] = None,
+            count: int = 1,
+            timeout: float = 600.0
+    ):
+        """
+        Args:
+            profiler (Profiler): Profiler recording the session.
+            name (str): Name of the session. Used as name of output files.
+            target (ProfileTarget): Command to profile. Profiles everything on the event loop if None.
+            count (int): Number of invocations of the target to profile.
+            timeout (float): Seconds to finish the session, even if target is not invoked `count` times.
+        """
+        self._profiler: Profiler = profiler
+        self._name: str = name
+        self._target: Optional[ProfileTarget] = target
+        self._remaining: int = count
+        self._active: int = 0
+        self._restore: Optional[Callable[[], NoReturn]] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._finished: asyncio.Future = asyncio.get_event_loop().create_future()
+        self._saving: bool = False
+        self._timeout: float = timeout
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def remaining(self) -> int:
+        """Number of invocations left to profile. Always 0 for window session."""
+        return self._remaining if self._target is not None else 0
+
+    @property
+    def finished(self) -> asyncio.Future:
+        """Future resolved with paths of output files when the session finishes."""
+        return self._finished
+
+    def start(self) -> NoReturn:
+        if self._target is None:
+            self._profiler.start()
+        elif isinstance(self._target, ApplicationCommand):
+            self._restore = self._target.wrapCallbacks(self._wrap)
+        else:
+            # Set private attribute, since setting Command.callback parses signature of the wrapper again.
+            original = self._target._callback
+            self._target._callback = self._wrap(original)
+            self._restore = functools.partial(setattr, self._target, '_callback', original)
+        self._timer = asyncio.get_event_loop().call_later(self._timeout, self.finish)
+
+    def _wrap(self, callback: CoroutineFunction) -> CoroutineFunction:
+        @functools.wraps(callback)
+        async def wrapper(*args, **kwargs):
+            if self._remaining <= 0:
+                return await callback(*args, **kwargs)
+            self._remaining -= 1
+            self._active += 1
+            self._profiler.start()
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                self._profiler.stop()
+                self._active -= 1
+                if self._remaining <= 0:
+                    self.finish()
+        return wrapper
+
+    def finish(self) -> NoReturn:
+        """Stop profiling and write the profile. Invocations already being profiled are waited."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._restore is not None:
+            self._restore()
+            self._restore = None
+        self._remaining = 0
+        if self._target is None:
+            self._profiler.stop()
+        if self._active == 0 and not self._saving:
+            self._saving = True
+            asyncio.ensure_future(self._save())
+
+    async def _save(self):
+        try:
+            paths = await self._profiler.save(
+                f'{self.outputRoot}/{self._name}-{time.strftime("%Y%m%d-%H%M%S")}'
+            )
+        except Exception as e:
+            self._finished.set_exception(e)
+        else:
+            self._finished.set_result(paths)
+
+
+class ProfilerCog(LatteCog):
+    """Owner-only profiling of commands and event loop, without redeploying the bot."""
+
+    profilers = {
+        'cprofile': CProfiler,
+        'sample': SamplingProfiler
+    }
+
+    def __init__(self, bot: Latte):
+        super(ProfilerCog, self).__init__(bot)
+        self._session: Optional[ProfileSession] = None
+
+    def cog_unload(self):
+        super(ProfilerCog, self).cog_unload()
+        if self._session is not None:
+            self._session.finish()
+
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        return await self.bot.is_owner(ctx.author)
+
+    def findTarget(self, name: str) -> Optional[ProfileTarget]:
+        """Find command to profile. Names starting with '/' are application commands, others are text commands."""
+        if name.startswith('/'):
+            applicationCommands: List[ApplicationCommand] = self.bot.__application_commands__
+            return next((command for command in applicationCommands if command.name == name[1:]), None)
+        return self.bot.get_command(name)
+
+    async def _run(self, ctx: commands.Context, session: ProfileSession) -> NoReturn:
+        if self._session is not None and not self._session.finished.done():
+            await ctx.send(f'Profile session `{self._session.name}` is already running.')
+            return
+        self._session = session
+        session.start()
+        try:
+            dump, collapsed = await session.finished
+        except Exception as e:
+            await ctx.send(f'Profile session `{session.name}` failed : {e!r}')
+        else:
+            await ctx.send(f'Profile session `{session.name}` is written to `{dump}` and `{collapsed}`.')
+
+    def _profiler(self, mode: str) -> Profiler:
+        if mode not in self.profilers:
+            raise commands.BadArgument(f'Profiler mode must be one of {", ".join(self.profilers)}.')
+        return self.profilers[mode]()
+
+    @commands.group(name='profile', invoke_without_command=True)
+    async def cmdProfile(self, ctx: commands.Context):
+        """Shows status of the profile session."""
+        session = self._session
+        if session is None or session.finished.done():
+            await ctx.send('Profiling is off.')
+        else:
+            left: str = f' ({session.remaining} invocations left)' if session.remaining else ''
+            await ctx.send(f'Profile session `{session.name}` is running.{left}')
+
+    @cmdProfile.command(name='command')
+    async def cmdProfileCommand(self, ctx: commands.Context, name: str, count: int = 1, mode: str = 'cprofile'):
+        """Profiles next N invocations of the command. Application commands are given as `/name`."""
+        target = self.findTarget(name)
+        if target is None:
+            await ctx.send(f'Command `{name}` is not found.')
+            return
+        await ctx.send(f'Profiling next {count} invocations of `{name}` with {mode}.')
+        await self._run(ctx, ProfileSession(self._profiler(mode), name.strip('/'), target=target, count=count))
+
+    @cmdProfile.command(name='window')
+    async def cmdProfileWindow(self, ctx: commands.Context, seconds: float, mode: str = 'sample'):
+        """Profiles everything running on the event loop for given seconds."""
+        await ctx.send(f'Profiling event loop for {seconds} seconds with {mode}.')
+        await self._run(ctx, ProfileSession(self._profiler(mode), 'window', timeout=seconds))
+
+    @cmdProfile.command(name='stop')
+    async def cmdProfileStop(self, ctx: commands.Context):
+        """Finishes running profile session now."""
+        if self._session is None or self._session.finished.done():
+            await ctx.send('Profiling is off.')
+            return
+        self._session.finish()
+
+
+def setup(bot: Latte):
+    """Function called when extension is loaded."""
+    bot.logger.debug(
+        'Registering extension "profiler"'
+    )
+    bot.add_cog(ProfilerCog(bot))
+
+
+def teardown(bot: Latte):
+    """Function called when extension is unloaded."""
+    bot.logger.debug(
+        'Removing extension "profiler"'
+    )
+    bot.remove_cog(bot.get_cog('Profiler'))
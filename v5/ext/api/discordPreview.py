@@ -1,11 +1,14 @@
-from typing import Union, List
+from typing import List
 
-import aiohttp
-import nacl
 from discord.ext import commands
 from v5.core import Latte
 from v5.ext.cogs import LatteCog
-from v5.models.discordAPI import ApplicationCommand, InteractionResponseType
+from v5.models.slash import ApplicationCommand, Interaction
+
+
+@ApplicationCommand.create(name='test', description='대충 테스트')
+async def cmdTest(interaction: Interaction):
+    await interaction.respond(content='대충 테스트', tts=False, embeds=[], allowed_mentions=[])
 
 
 class DiscordPreviewCog(LatteCog):
@@ -15,31 +18,6 @@ class DiscordPreviewCog(LatteCog):
         super(DiscordPreviewCog, self).__init__(bot)
         self._application_commands: List[ApplicationCommand]
 
-        self._publicKey = nacl
-
-    @listener
-    async def on_socket_raw_receive(self, msg: Union[bytes, str]):
-        print(f'[DiscordPreviewCog] [socket_raw_receive] msg : {msg}')
-        if msg["t"] != "INTERACTION_CREATE":
-            return
-        to_use = msg["d"]
-        print(to_use["data"]["name"])
-        if to_use["data"]["name"] == "test": # 커맨드 이름
-            req_url = f"https://discord.com/api/v8/interactions/{to_use['id']}/{to_use['token']}/callback"
-            _resp = {
-                "type": InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE.value,
-                "data": {
-                    "tts": False,
-                    "content": "대충 테스트",
-                    "embeds": [],
-                    "allowed_mentions": []
-                }
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post(req_url, json=_resp) as resp:
-                    print(resp.status)
-                    print(await resp.text())
-
     @commands.command(
         name='secretMessage',
         description=''
@@ -1,5 +1,7 @@
+from typing import List, Tuple
 from discord.ext.commands import Cog
 from v5.core import Latte
+from v5.util.config import ConfigListener
 import os
 
 
@@ -16,9 +18,7 @@ class LatteCog(Cog):
             bot (class: Latte): discord.py Bot instance, especially Latte instance.
         """
         self._bot = bot
-        print(os.getcwd())
-        print(__file__)
-        print(os.path.relpath(os.getcwd(), __file__))
+        self._configListeners: List[Tuple[str, ConfigListener]] = []
 
         self.log_prefix = os.path.relpath(os.getcwd(), __file__)   # LatteExt.py -> "LatteExt" -> [LatteExt] [info] ...
         bot.logger.info(
@@ -35,3 +35,17 @@ class LatteCog(Cog):
     @property
     def bot(self) -> Latte:
         return self._bot
+
+    def subscribeConfig(self, key: str, listener: ConfigListener):
+        """Subscribe bot config key. Subscription is removed when the cog is unloaded.
+        Args:
+            key (str): 'key1.key2' style key of bot config.
+            listener (ConfigListener): Function called with (key, old value, new value) when the value is reloaded.
+        """
+        self._bot.config.subscribe(key, listener)
+        self._configListeners.append((key, listener))
+
+    def cog_unload(self):
+        for key, listener in self._configListeners:
+            self._bot.config.unsubscribe(key, listener)
+        self._configListeners.clear()
\ No newline at end of file
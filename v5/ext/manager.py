@@ -1,16 +1,290 @@
-from discord.ext.commands import AutoShardedBot
+from __future__ import annotations
+
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Optional, Any, List, Dict, Tuple, Mapping, NamedTuple, NoReturn, TYPE_CHECKING
+from discord.ext import commands
+from discord.ext.commands import AutoShardedBot, ExtensionNotLoaded, ExtensionFailed
+
+from v5.util.logging_util import getLogger, LogLevels
+from v5.util.metrics import Histogram, registry
+
+if TYPE_CHECKING:
+    from v5.util.config import Config
+
+
+logger = getLogger('ext.manager', LogLevels.DEBUG)
+
+extensionLoadTime: Histogram = registry.histogram(
+    'v5_extension_load_seconds', 'Time taken to load or reload extensions.', ('extension', 'operation')
+)
+
+
+class ExtensionEntry(NamedTuple):
+    name: str
+    category: str
+    module: str
+    lazy: bool                  # Loaded on first use of one of its commands.
+    commands: Tuple[str, ...]   # Text commands of the extension, registered as placeholders while it is lazy.
+    threadsafe: bool            # Module has no import-time side effects, so it can be pre-imported on a thread.
+
+
+class ExtensionTiming(NamedTuple):
+    importTime: float   # Seconds pre-importing the module on the thread pool. 0 if it is only imported on the loop.
+    setupTime: float    # Seconds in load_extension : module body and setup of the extension. (event loop)
+    lazy: bool          # Whether the extension was loaded on first use.
+
+
+def _preImport(module: str) -> float:
+    """Import module with its dependencies on the thread pool, so that load_extension finds them in sys.modules.
+    load_extension executes the module body again on the event loop, so only threadsafe modules are pre-imported.
+    """
+    started: float = perf_counter()
+    importlib.import_module(module)
+    return perf_counter() - started
 
 
 class ExtensionManager:
-    def __init__(self, bot: AutoShardedBot, config):
-        self._config = config
+    """Manages extensions listed in ext map. (`ext` section of bot config)
+
+    # structure of ext map
+    {
+        "<category>": {
+            "<extension name>": "<module path of the extension>",
+            "<extension name>": {
+                "module": "<module path of the extension>",
+                "lazy": true,                       # Load on first use of one of the commands below.
+                "commands": ["<command name>"],
+                "threadsafe": true                  # Pre-import on a thread. (no side effects at import time)
+            }
+        }
+    }
+
+    Module bodies often touch the event loop or shared registries (ex: ApplicationCommand.create, Config),
+    so extensions are imported on the event loop thread unless they are marked threadsafe.
+
+    Options in bot config :
+        `extensions.workers` : Number of threads pre-importing threadsafe extensions. (default: up to 8)
+        `extensions.lazy` : Make every extension listing its commands lazy. (default: false)
+    """
+
+    def __init__(self, bot: AutoShardedBot, config: Config):
+        self._config: Config = config
         self._bot: AutoShardedBot = bot
+        self._timings: Dict[str, ExtensionTiming] = {}
+        self._lazyLoads: Dict[str, asyncio.Future] = {}
+        self._placeholders: Dict[str, commands.Command] = {}    # Command name -> placeholder of lazy extension
+
+    @property
+    def extMap(self) -> Mapping[str, Any]:
+        return self._config.get('ext') or {}
+
+    @property
+    def extensions(self) -> Dict[str, str]:
+        """Extension name -> module path of every extension in ext map."""
+        return self._flatten(self.extMap)
+
+    @property
+    def timings(self) -> Dict[str, ExtensionTiming]:
+        """Extension name -> import & setup time of extensions loaded by loadAll() or on first use."""
+        return self._timings
+
+    @staticmethod
+    def _entries(extMap: Optional[Mapping[str, Any]], lazy: bool = False) -> List[ExtensionEntry]:
+        entries: List[ExtensionEntry] = []
+        for category, extensions in (extMap or {}).items():
+            if not isinstance(extensions, Mapping):
+                continue
+            for name, value in extensions.items():
+                if isinstance(value, Mapping):
+                    entryCommands: Tuple[str, ...] = tuple(value.get('commands') or ())
+                    entries.append(ExtensionEntry(
+                        name,
+                        category,
+                        value['module'],
+                        bool(value.get('lazy', lazy)) and len(entryCommands) > 0,
+                        entryCommands,
+                        bool(value.get('threadsafe', False))
+                    ))
+                else:
+                    entries.append(ExtensionEntry(name, category, value, False, (), False))
+        return entries
+
+    @classmethod
+    def _byName(cls, extMap: Optional[Mapping[str, Any]], lazy: bool) -> Dict[str, ExtensionEntry]:
+        # Category only groups extensions in ext map, so moving an extension between categories is not a change.
+        return {entry.name: entry._replace(category='') for entry in cls._entries(extMap, lazy)}
+
+    @classmethod
+    def _flatten(cls, extMap: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+        return {entry.name: entry.module for entry in cls._entries(extMap)}
+
+    def entries(self) -> List[ExtensionEntry]:
+        return self._entries(self.extMap, bool(self._config.get('extensions.lazy')))
+
+    def find_category(self, name: str) -> Optional[str]:
+        """Find category of the extension in ext map."""
+        for category, extensions in self.extMap.items():
+            if isinstance(extensions, Mapping) and name in extensions:
+                return category
+        return None
 
     def load(self, name: str):
+        started: float = perf_counter()
         self._bot.load_extension(name)
+        extensionLoadTime.labels(name, 'load').observe(perf_counter() - started)
 
     def unload(self, name: str):
         self._bot.unload_extension(name)
 
     def reload(self, name: str):
+        started: float = perf_counter()
         self._bot.reload_extension(name)
+        extensionLoadTime.labels(name, 'reload').observe(perf_counter() - started)
+
+    async def loadAll(self) -> Dict[str, ExtensionTiming]:
+        """Load every extension in ext map.
+
+        Threadsafe extensions are pre-imported concurrently on a thread pool. Every extension is then loaded with
+        load_extension on the event loop in ext map order, as soon as its pre-import is done. Lazy extensions only
+        register placeholders of their commands. Extensions failing to load are logged and skipped.
+        Returns:
+            Extension name -> import & setup time of loaded extensions.
+        """
+        entries: List[ExtensionEntry] = [
+            entry for entry in self.entries() if entry.module not in self._bot.extensions
+        ]
+        eager: List[ExtensionEntry] = [entry for entry in entries if not entry.lazy]
+        for entry in entries:
+            if entry.lazy:
+                self._registerLazy(entry)
+        if not eager:
+            return self._timings
+
+        loop = asyncio.get_event_loop()
+        threadsafe: List[ExtensionEntry] = [entry for entry in eager if entry.threadsafe]
+        workers: int = self._config.get('extensions.workers') or max(1, min(8, len(threadsafe)))
+        started: float = perf_counter()
+        loaded: int = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='v5-ext-import') as executor:
+            preImports: Dict[str, asyncio.Future] = {
+                entry.name: loop.run_in_executor(executor, _preImport, entry.module) for entry in threadsafe
+            }
+            for entry in eager:
+                try:
+                    importTime: float = await self._preImported(entry, preImports.get(entry.name))
+                    self._setup(entry, importTime, lazy=False)
+                except commands.ExtensionError:
+                    logger.exception(f'Failed to load extension {entry.name} ({entry.module}).')
+                else:
+                    loaded += 1
+        logger.info(
+            f'Loaded {loaded} extensions in {(perf_counter() - started) * 1e3:.1f} ms '
+            f'with {workers} import workers for {len(threadsafe)} threadsafe extensions. '
+            f'({len(entries) - len(eager)} lazy extensions)'
+        )
+        return self._timings
+
+    @staticmethod
+    async def _preImported(entry: ExtensionEntry, preImport: Optional[asyncio.Future]) -> float:
+        if preImport is None:
+            return 0.0
+        try:
+            return await preImport
+        except Exception as e:
+            raise ExtensionFailed(entry.module, e) from e
+
+    def _setup(self, entry: ExtensionEntry, importTime: float, lazy: bool) -> ExtensionTiming:
+        started: float = perf_counter()
+        self._bot.load_extension(entry.module)
+        timing = self._timings[entry.name] = ExtensionTiming(importTime, perf_counter() - started, lazy)
+        extensionLoadTime.labels(entry.module, 'import').observe(timing.importTime)
+        extensionLoadTime.labels(entry.module, 'setup').observe(timing.setupTime)
+        logger.debug(
+            f'Extension {entry.name} ({entry.module}) is loaded{" on first use" if lazy else ""} : '
+            f'import {timing.importTime * 1e3:.1f} ms, setup {timing.setupTime * 1e3:.1f} ms'
+        )
+        return timing
+
+    # Lazy extensions
+    def _registerLazy(self, entry: ExtensionEntry) -> NoReturn:
+        async def placeholder(ctx: commands.Context):
+            await self.loadLazy(entry)
+            # Parse the message again, so that the real command is invoked with its arguments.
+            await self._bot.process_commands(ctx.message)
+
+        for name in entry.commands:
+            if self._bot.get_command(name) is None:
+                command = self._placeholders[name] = commands.Command(
+                    placeholder, name=name, hidden=True, ignore_extra=True
+                )
+                self._bot.add_command(command)
+        logger.debug(f'Extension {entry.name} ({entry.module}) is loaded on first use of {", ".join(entry.commands)}.')
+
+    async def loadLazy(self, entry: ExtensionEntry) -> NoReturn:
+        """Load lazy extension. Concurrent calls wait for the same load."""
+        loading: Optional[asyncio.Future] = self._lazyLoads.get(entry.name)
+        if loading is None:
+            loading = self._lazyLoads[entry.name] = asyncio.ensure_future(self._loadLazy(entry))
+        try:
+            await asyncio.shield(loading)
+        finally:
+            # exception() raises on cancelled future, so cancellation is checked first.
+            if loading.done() and (loading.cancelled() or loading.exception() is not None) \
+                    and self._lazyLoads.get(entry.name) is loading:
+                # Next use retries.
+                del self._lazyLoads[entry.name]
+
+    async def _loadLazy(self, entry: ExtensionEntry) -> NoReturn:
+        if entry.module in self._bot.extensions:
+            return
+        preImport: Optional[asyncio.Future] = None
+        if entry.threadsafe:
+            preImport = asyncio.get_event_loop().run_in_executor(None, _preImport, entry.module)
+        importTime: float = await self._preImported(entry, preImport)
+        # Placeholders are kept while importing, so that commands used meanwhile wait for the same load.
+        placeholders: List[commands.Command] = [
+            self._bot.remove_command(name) for name in entry.commands
+            if name in self._placeholders and self._bot.get_command(name) is self._placeholders[name]
+        ]
+        try:
+            self._setup(entry, importTime, lazy=True)
+        except Exception:
+            for command in placeholders:
+                if self._bot.get_command(command.name) is None:
+                    self._bot.add_command(command)
+            raise
+
+    def _unregisterLazy(self, entry: ExtensionEntry) -> NoReturn:
+        """Remove placeholders of the extension, and forget its lazy load so that it is loaded again when needed."""
+        for name in entry.commands:
+            placeholder: Optional[commands.Command] = self._placeholders.pop(name, None)
+            if placeholder is not None and self._bot.get_command(name) is placeholder:
+                self._bot.remove_command(name)
+        loading: Optional[asyncio.Future] = self._lazyLoads.pop(entry.name, None)
+        if loading is not None and not loading.done():
+            loading.cancel()
+
+    def onConfigChange(self, key: str, old: Optional[Mapping[str, Any]], new: Optional[Mapping[str, Any]]) -> NoReturn:
+        """Config listener of ext map. Loads added extensions, unloads removed ones, and reloads changed ones.
+        Lazy extensions only register placeholders of their commands, as loadAll() does.
+        """
+        lazy: bool = bool(self._config.get('extensions.lazy'))
+        before, after = self._byName(old, lazy), self._byName(new, lazy)
+        for name, entry in before.items():
+            if after.get(name) != entry:
+                self._unregisterLazy(entry)
+                try:
+                    self.unload(entry.module)
+                except ExtensionNotLoaded:
+                    continue
+                logger.info(f'Extension {name} ({entry.module}) is unloaded by config change.')
+        for name, entry in after.items():
+            if before.get(name) != entry:
+                if entry.lazy:
+                    self._registerLazy(entry)
+                else:
+                    self.load(entry.module)
+                    logger.info(f'Extension {name} ({entry.module}) is loaded by config change.')
\ No newline at end of file
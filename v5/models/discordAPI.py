@@ -1,8 +1,15 @@
 from __future__ import annotations
-from typing import ClassVar, Tuple
+import sys
+from collections import OrderedDict
+from string import Formatter
+from types import MappingProxyType
+from typing import ClassVar, Tuple, Dict, Any, Optional, Mapping, NoReturn
+from urllib.parse import quote
 
 
 class DiscordAPI:
+    """Url builder by method chaining. Every call builds the url again, so prefer Route on request paths."""
+
     APIBase: ClassVar[str] = 'https://discord.com/api/v8/'
 
     # Applications constants
@@ -32,26 +39,31 @@ class DiscordAPI:
             url += '/'
         for arg in args:
             url += f'{arg}/'
-        
+
         return url
 
     @property
     def url(self) -> str:
         return self._url
 
-    def user(self, user_id: int):
+    def user(self, user_id: int) -> DiscordAPI:
         """Route for `/users` endpoint."""
         if self._url != self.APIBase:
             raise ValueError('Invalid position of users/ endpoint')
         setattr(self, self.UserID, user_id)
         self._url += self._generateParamsUrl(self.Users, user_id)
+        return self
 
-    def guilds(self, guild_id: int):
+    def guilds(self, guild_id: int) -> DiscordAPI:
         """Route for `/guilds`, `/application/guilds` endpoint."""
-        if self._url != self.APIBase or getattr() not in self._url:
+        applicationUrl: Optional[str] = self.APIBase + self._generateParamsUrl(
+            self.Applications, getattr(self, self.ApplicationID)
+        ) if hasattr(self, self.ApplicationID) else None
+        if self._url != self.APIBase and self._url != applicationUrl:
             raise ValueError('Invalid position of guilds/ endpoint')
         setattr(self, self.GuildID, guild_id)
         self._url += self._generateParamsUrl(self.Guilds, guild_id)
+        return self
 
     def application(self, application_id: int) -> DiscordAPI:
         """Route for `/application` endpoint."""
@@ -61,13 +73,14 @@ class DiscordAPI:
         self._url += self._generateParamsUrl(self.Applications, application_id)
         return self # For method chaining
 
-    def commands(self, command_id: int):
-        """Route for `/application/commands` endpoint."""
-        if not getattr(self, 'application_id', False) and getattr(self, 'command_id', False):
-            # applcation_id 는 지정되었지만 command_id 는 지정되지 않았을 경우
+    def commands(self, command_id: Optional[int] = None) -> DiscordAPI:
+        """Route for `/application/commands` endpoint. Every command of the scope if command_id is not given."""
+        if not hasattr(self, self.ApplicationID) or hasattr(self, self.CommandID):
+            # application_id 가 지정되지 않았거나, commands/ 가 이미 추가되었을 경우
             raise ValueError('Invalid position of commands/ endpoint')
         setattr(self, self.CommandID, command_id)
-        self._url += self._generateParamsUrl(self.Commands, command_id)
+        self._url += self._generateParamsUrl(self.Commands, *(() if command_id is None else (command_id,)))
+        return self
 
     @classmethod
     def getGlobalCommandEndpoint(cls, application_id: int) -> str:
@@ -77,15 +90,156 @@ class DiscordAPI:
     def getGuildCommandEndpoint(cls, application_id: int, guild_id: int) -> str:
         return cls().application(application_id).guilds(guild_id).url + cls.Commands
 
-    def __divmod__(self, other):
-        if isinstance(other, str):
-            if other
-
-
-        raise TypeError('Cannot use division operator / with given type {}'.format(type(other)))
-
-
 
+class Route:
+    """REST api route. Holds HTTP method, path template and parameters of a request.
+
+    Routes are immutable and interned : creating a route with the same method, template and parameters
+    returns the same object. Url, rate limit key and bucket are computed once when the route is created,
+    from the template compiled once per (method, template).
+    Routes authorized by interaction token are not interned, since each token is a secret used by one interaction.
+    Those routes take `interaction_id` too, even if their path does not contain it : discord limits them per token,
+    and one token belongs to one interaction, so the id stands in for the token in rate limit keys and logs.
+
+    Usage:
+        Route('POST', 'applications/{application_id}/commands', application_id=1234)
+    """
+
+    __slots__ = ('method', 'path', 'params', 'relativeUrl', 'key', 'majorParams', 'bucket', 'isGlobal')
+
+    # Parameters which split rate limit buckets of same route. (https://discord.com/developers/docs/topics/rate-limits)
+    MajorParameters: ClassVar[Tuple[str, ...]] = (
+        'application_id',
+        'guild_id',
+        'channel_id',
+        'webhook_id',
+        'interaction_id'
+    )
+
+    # Route templates
+    GlobalCommands: ClassVar[str] = 'applications/{application_id}/commands'
+    GlobalCommand: ClassVar[str] = 'applications/{application_id}/commands/{command_id}'
+    GuildCommands: ClassVar[str] = 'applications/{application_id}/guilds/{guild_id}/commands'
+    GuildCommand: ClassVar[str] = 'applications/{application_id}/guilds/{guild_id}/commands/{command_id}'
+    InteractionCallback: ClassVar[str] = 'interactions/{interaction_id}/{interaction_token}/callback'
+    InteractionFollowup: ClassVar[str] = 'webhooks/{application_id}/{interaction_token}'
+    InteractionOriginal: ClassVar[str] = 'webhooks/{application_id}/{interaction_token}/messages/@original'
+
+    # Interned routes. Oldest routes are evicted over `internSize`.
+    internSize: ClassVar[int] = 4096
+    _interned: ClassVar[OrderedDict] = OrderedDict()
+    _templates: ClassVar[Dict[Tuple[str, str], _Template]] = {}
+
+    method: str
+    path: str
+    params: Mapping[str, Any]
+    relativeUrl: str    # Formatted path relative to API base. RestClient joins it with its configured API base.
+    key: str            # Route key without parameters. Used to find rate limit bucket hash of the route.
+    majorParams: str
+    bucket: str         # Local rate limit bucket key. (route template + major parameters)
+    isGlobal: bool      # Affected by global rate limit. Endpoints authorized by interaction token are not.
+
+    def __new__(cls, method: str, path: str, **params: Any) -> Route:
+        # Keyword order does not change the route. (frozenset is cheaper than sorting items)
+        identity: tuple = (method, path, frozenset(params.items()))
+        route: Optional[Route] = cls._interned.get(identity)
+        if route is not None:
+            return route
+        template: Optional[_Template] = cls._templates.get((method, path))
+        if template is None:
+            template = cls._templates[(method, path)] = _Template(method, path, cls.MajorParameters)
+        route = object.__new__(cls)
+        init = object.__setattr__
+        init(route, 'method', method)
+        init(route, 'path', path)
+        init(route, 'params', MappingProxyType(params))
+        init(route, 'relativeUrl', template.format(params))
+        init(route, 'key', template.key)
+        majorParams: str = ':'.join([str(params[name]) for name in template.majorFields])
+        init(route, 'majorParams', majorParams)
+        init(route, 'bucket', f'{template.key}:{majorParams}')
+        init(route, 'isGlobal', template.isGlobal)
+        if not template.isGlobal:
+            return route
+        interned = cls._interned
+        if len(interned) >= cls.internSize:
+            interned.popitem(last=False)
+        interned[identity] = route
+        return route
+
+    def __setattr__(self, key: str, value: Any) -> NoReturn:
+        raise AttributeError('Route is immutable.')
+
+    def __delattr__(self, key: str) -> NoReturn:
+        raise AttributeError('Route is immutable.')
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Route):
+            return NotImplemented
+        return self is other or (self.method == other.method and self.relativeUrl == other.relativeUrl)
+
+    def __hash__(self) -> int:
+        return hash((self.method, self.relativeUrl))
+
+    def __reduce__(self) -> tuple:
+        return _route, (self.method, self.path, dict(self.params))
 
+    @property
+    def url(self) -> str:
+        """Url of the route on default API base."""
+        return DiscordAPI.APIBase + self.relativeUrl
 
+    @classmethod
+    def command(
+            cls,
+            method: str,
+            application_id: int,
+            guild_id: Optional[int] = None,
+            command_id: Optional[int] = None
+    ) -> Route:
+        """Route of application command endpoints. Guild scope if guild_id is given, and single command if command_id is given."""
+        if guild_id is None:
+            if command_id is None:
+                return cls(method, cls.GlobalCommands, application_id=application_id)
+            return cls(method, cls.GlobalCommand, application_id=application_id, command_id=command_id)
+        if command_id is None:
+            return cls(method, cls.GuildCommands, application_id=application_id, guild_id=guild_id)
+        return cls(method, cls.GuildCommand, application_id=application_id, guild_id=guild_id, command_id=command_id)
 
+    @property
+    def redactedUrl(self) -> str:
+        """Path relative to API base with the interaction token left as placeholder. Used in logs and errors."""
+        if self.isGlobal:
+            return self.relativeUrl
+        return self.path.format_map({**self.params, 'interaction_token': '{interaction_token}'})
+
+    def __repr__(self) -> str:
+        return f'<Route(method={self.method}, url={self.redactedUrl})>'
+
+
+def _route(method: str, path: str, params: Dict[str, Any]) -> Route:
+    return Route(method, path, **params)
+
+
+class _Template:
+    """Route template compiled once : parameter names, major parameters and rate limit key."""
+
+    __slots__ = ('key', 'fields', 'majorFields', 'isGlobal', '_format')
+
+    def __init__(self, method: str, path: str, majorParameters: Tuple[str, ...]):
+        self.key: str = sys.intern(f'{method} {path}')
+        self.fields: Tuple[str, ...] = tuple(field for _, field, _, _ in Formatter().parse(path) if field)
+        self.isGlobal: bool = 'interaction_token' not in self.fields
+        # Interaction token routes are keyed by interaction_id, so that tokens never end up in rate limit keys.
+        self.majorFields: Tuple[str, ...] = tuple(
+            name for name in majorParameters
+            if name in self.fields or (name == 'interaction_id' and not self.isGlobal)
+        )
+        self._format = path.format_map
+
+    def format(self, params: Dict[str, Any]) -> str:
+        """Format path with parameters. String parameters are quoted, since they may contain any character."""
+        for value in params.values():
+            if isinstance(value, str):
+                return self._format({k: quote(v) if isinstance(v, str) else v for k, v in params.items()})
+        return self._format(params)
\ No newline at end of file
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import asyncio
+import copy
+import hashlib
+import json
 from enum import IntFlag, Enum
-from typing import Union, Optional, List, Callable, Coroutine, Any, NoReturn
+from typing import TYPE_CHECKING, Union, Optional, List, Dict, Callable, Coroutine, Any, NoReturn, ClassVar, Tuple, \
+    FrozenSet, Sequence
 
-import aiohttp
 import discord
 from discord.ext import commands
-from .discordAPI import DiscordAPI
+from .discordAPI import Route
 
 from v5.util.type_hints import JSON, CoroutineFunction
-from v5.util import JsonObject
+from v5.util.abstracts import JsonObject
+from v5.util.logging_util import getLogger, LogLevels
+from v5.util.metrics import MetricsRegistry, Histogram, Counter, registry
+
+if TYPE_CHECKING:
+    from v5.core.rest import RestClient
+
+logger = getLogger('models.slash', LogLevels.DEBUG)
 
 
 class InteractionType(Enum):
@@ -48,28 +58,31 @@ class InteractionResponseFlags(IntFlag):
 
 
 class ApplicationCommandOptionChoice(JsonObject):
+    __slots__ = ('_data',)
 
     def __init__(self, name: str, value: Union[str, int]) -> None:
-        self._name = name
-        self._value = value
+        self._data: JSON = {
+            'name': name,
+            'value': value
+        }
 
     @property
     def name(self) -> str:
-        return self._name
+        return self._data['name']
 
     @property
     def value(self) -> Union[str, int]:
-        return self._value
+        return self._data['value']
 
     @classmethod
     def fromJson(cls, data: JSON) -> SlashCommandOptionChoice:
-        return cls(name=data['name'], value=data['value'])
+        # Wrap json without copying it.
+        instance = cls.__new__(cls)
+        instance._data = data
+        return instance
 
     def toJson(self) -> JSON:
-        return {
-            'name': self._name,
-            'value': self._value
-        }
+        return copy.deepcopy(self._data)
 
 SlashCommandOptionChoice = ApplicationCommandOptionChoice   # Alias
 
@@ -86,12 +99,145 @@ class ApplicationCommandOptionType(Enum):
 
     @classmethod
     def parseType(cls, value) -> ApplicationCommandOptionType:
-        print(cls.__members__.values())
-        return tuple(filter(lambda m: m.value == value, cls.__members__.values()))[0]
+        return cls(value)   # Enum value lookup is a dict lookup.
 
 SlashCommandOptionType = ApplicationCommandOptionType   # Alias
 
 
+class OptionError(Exception):
+    """Exception raised when interaction option value does not match compiled option schema."""
+    def __init__(self, option: str, reason: str):
+        super(OptionError, self).__init__(option, reason)
+        self.option: str = option
+        self.reason: str = reason
+
+    def __repr__(self) -> str:
+        return f'<OptionError(option={self.option})>'
+
+    def __str__(self) -> str:
+        return f'Invalid value of option {self.option} : {self.reason}'
+
+
+# Converters of option values. Each converter receives raw value and `resolved` block of the interaction.
+def _convertString(value: Any, resolved: Optional[JSON]) -> str:
+    if not isinstance(value, str):
+        raise TypeError('expected string')
+    return value
+
+
+def _convertInteger(value: Any, resolved: Optional[JSON]) -> int:
+    if type(value) is not int:
+        raise TypeError('expected integer')
+    return value
+
+
+def _convertBoolean(value: Any, resolved: Optional[JSON]) -> bool:
+    if type(value) is not bool:
+        raise TypeError('expected boolean')
+    return value
+
+
+def _resolver(key: str) -> Callable[[Any, Optional[JSON]], Union[JSON, int]]:
+    """Create converter which resolves snowflake value using `resolved.<key>` block.
+    Snowflake is returned as int if the interaction has no resolved data."""
+    def convert(value: Any, resolved: Optional[JSON]) -> Union[JSON, int]:
+        if resolved is None:
+            return int(value)
+        try:
+            return resolved[key][value]
+        except KeyError:
+            return int(value)
+    return convert
+
+
+_resolveUser = _resolver('users')
+
+
+def _convertUser(value: Any, resolved: Optional[JSON]) -> Union[JSON, int]:
+    """Resolve user. Returns member json (with `user` field) in guilds, and user json in DMs."""
+    user = _resolveUser(value, resolved)
+    if resolved is not None and 'members' in resolved and value in resolved['members']:
+        return {**resolved['members'][value], 'user': user}
+    return user
+
+
+OptionConverters: Dict[ApplicationCommandOptionType, Callable[[Any, Optional[JSON]], Any]] = {
+    ApplicationCommandOptionType.STRING: _convertString,
+    ApplicationCommandOptionType.INTEGER: _convertInteger,
+    ApplicationCommandOptionType.BOOLEAN: _convertBoolean,
+    ApplicationCommandOptionType.USER: _convertUser,
+    ApplicationCommandOptionType.CHANNEL: _resolver('channels'),
+    ApplicationCommandOptionType.ROLE: _resolver('roles')
+}
+
+
+class OptionSchema:
+    """Compiled validator & converter of one application command option."""
+    __slots__ = ('name', 'required', 'choices', '_converter')
+
+    def __init__(
+        self,
+        name: str,
+        optionType: ApplicationCommandOptionType,
+        required: bool = False,
+        choices: Optional[FrozenSet[Union[str, int]]] = None
+    ):
+        self.name: str = name
+        self.required: bool = required
+        self.choices: Optional[FrozenSet[Union[str, int]]] = choices
+        self._converter: Callable[[Any, Optional[JSON]], Any] = OptionConverters[optionType]
+
+    def convert(self, value: Any, resolved: Optional[JSON] = None) -> Any:
+        """Validate and convert raw option value.
+        Raises:
+            OptionError: value does not match the schema.
+        """
+        try:
+            converted = self._converter(value, resolved)
+        except (TypeError, ValueError) as e:
+            raise OptionError(self.name, str(e))
+        if self.choices is not None and converted not in self.choices:
+            raise OptionError(self.name, f'{value!r} is not one of the choices')
+        return converted
+
+
+class ArgumentPlan:
+    """Compiled plan which converts options of an interaction into keyword arguments of the handler.
+    Built once per command (or subcommand) when it is registered to InteractionRouter.
+    Optional options not given by user are omitted, so parameter defaults of the handler apply.
+    """
+    __slots__ = ('_schemas', '_required')
+
+    def __init__(self, schemas: Sequence[OptionSchema]):
+        self._schemas: Dict[str, OptionSchema] = {schema.name: schema for schema in schemas}
+        self._required: FrozenSet[str] = frozenset(schema.name for schema in schemas if schema.required)
+
+    @classmethod
+    def compile(cls, options: Sequence[ApplicationCommandOption]) -> ArgumentPlan:
+        """Compile plan from value options. (subcommand and subcommand group options are ignored)"""
+        return cls([option.schema for option in options if option.schema is not None])
+
+    def __call__(self, values: Sequence[JSON], resolved: Optional[JSON] = None) -> Dict[str, Any]:
+        """Convert option values of an interaction.
+        Args:
+            values (Sequence[JSON]): `options` of interaction data. ({'name': ..., 'value': ...})
+            resolved (JSON): `resolved` block of interaction data.
+        Raises:
+            OptionError: Unknown option, invalid value, or missing required option.
+        """
+        arguments: Dict[str, Any] = {}
+        for value in values:
+            name = value['name']
+            schema = self._schemas.get(name)
+            if schema is None:
+                raise OptionError(name, 'unknown option')
+            arguments[name] = schema.convert(value.get('value'), resolved)
+        missing = [name for name in self._required if name not in arguments]
+        if missing:
+            raise OptionError(', '.join(missing), 'required option is missing')
+        return arguments
+
+
 class ApplicationCommandOption(JsonObject):
     """
     # structure
@@ -126,44 +272,24 @@ class ApplicationCommandOption(JsonObject):
     }
     """
 
+    __slots__ = ('_data', '_type', '_choices', '_options', '_schema')
+
     def __init__(self, data: JSON) -> None:
-        self._data = data
-        self._name: str = data['name']
-        self._description: str = data['description']
+        self._data: JSON = data     # Only representation of the option. Every field is read from here.
         self._type: ApplicationCommandOptionType = ApplicationCommandOptionType.parseType(data['type'])
-        self._default = data['default'] if data.get('default') is not None else False
-        self._required = data['required'] if data.get('required') is not None else False
-
-        # parse choices
-        choices = data.get('choices')
-        if choices is not None:
-            if self._type != ApplicationCommandOptionType.STRING or self._type != ApplicationCommandOptionType.INTEGER:
-                raise ValueError('Only commands with String and Integer CommandOptionType can have choices.')
-            choiceObjects = []
-            for choiceJson in choices:
-                choiceObjects.append(ApplicationCommandOptionChoice.fromJson(choiceJson))
-
-            self.choices = tuple(choiceObjects)
-
-        # parse options
-        options = data.get('options')
-        if options is not None:
-            if self._type != ApplicationCommandOptionType.SUB_COMMAND or self._type != ApplicationCommandOptionType.SUB_COMMAND_GROUP:
-                raise ValueError(
-                    'Only commands with SUB_COMMAND and SUB_COMMAND_GROUP CommandOptionType can have options.')
-            optionObjects = []
-            for choiceJson in choices:
-                optionObjects.append(ApplicationCommandOptionChoice.fromJson(choiceJson))
 
-            self.options = tuple(optionObjects)
+        # Nested choices, options and compiled schema are materialized on first access.
+        self._choices: Optional[Tuple[ApplicationCommandOptionChoice, ...]] = None
+        self._options: Optional[Tuple[ApplicationCommandOption, ...]] = None
+        self._schema: Union[OptionSchema, None, bool] = False    # False : not compiled yet.
 
     @property
     def name(self) -> str:
-        return self._name
+        return self._data['name']
 
     @property
     def description(self) -> str:
-        return self._description
+        return self._data['description']
 
     @property
     def type(self) -> ApplicationCommandOptionType:
@@ -171,18 +297,54 @@ class ApplicationCommandOption(JsonObject):
 
     @property
     def default(self) -> bool:
-        return self._default
+        return self._data.get('default') or False
 
     @property
     def required(self) -> bool:
-        return self._required
+        return self._data.get('required') or False
+
+    @property
+    def choices(self) -> Tuple[ApplicationCommandOptionChoice, ...]:
+        if self._choices is None:
+            choices = self._data.get('choices')
+            if choices and self._type not in (ApplicationCommandOptionType.STRING, ApplicationCommandOptionType.INTEGER):
+                raise ValueError('Only commands with String and Integer CommandOptionType can have choices.')
+            self._choices = tuple(ApplicationCommandOptionChoice.fromJson(choiceJson) for choiceJson in choices or ())
+        return self._choices
+
+    @property
+    def options(self) -> Tuple[ApplicationCommandOption, ...]:
+        if self._options is None:
+            options = self._data.get('options')
+            if options and self._type not in (ApplicationCommandOptionType.SUB_COMMAND, ApplicationCommandOptionType.SUB_COMMAND_GROUP):
+                raise ValueError(
+                    'Only commands with SUB_COMMAND and SUB_COMMAND_GROUP CommandOptionType can have options.')
+            self._options = tuple(ApplicationCommandOption.fromJson(optionJson) for optionJson in options or ())
+        return self._options
+
+    @property
+    def schema(self) -> Optional[OptionSchema]:
+        """Compiled schema of the option. None for subcommands and subcommand groups."""
+        if self._schema is False:
+            if self._type in OptionConverters:
+                # Choice values are read from raw json, choice objects are not needed.
+                choices = self._data.get('choices')
+                self._schema = OptionSchema(
+                    name=self._data['name'],
+                    optionType=self._type,
+                    required=self.required,
+                    choices=frozenset(choice['value'] for choice in choices) if choices else None
+                )
+            else:
+                self._schema = None
+        return self._schema
 
     @classmethod
     def fromJson(cls, data: JSON) -> ApplicationCommandOption:
         return cls(data)
 
     def toJson(self) -> JSON:
-        return self._data
+        return copy.deepcopy(self._data)
 
 SlashCommandOption = ApplicationCommandOption   # Alias
 
@@ -204,7 +366,7 @@ class ApplicationSubCommandGroup(ApplicationCommandOption):
         pass
 
     def toJson(self) -> JSON:
-        return self._data
+        return copy.deepcopy(self._data)
 
 SlashSubCommandGroup = ApplicationSubCommandGroup   # Alias
 
@@ -224,6 +386,53 @@ class ApplicationSubCommand(ApplicationCommandOption):
 SlashSubCommand = ApplicationSubCommand   # Alias
 
 
+# Keys which define an application command option. Others are ignored when comparing commands.
+OptionKeys: Tuple[str, ...] = ('type', 'name', 'description', 'required', 'default', 'choices', 'options')
+
+
+def _canonicalizeOption(data: JSON) -> JSON:
+    option: JSON = {}
+    for key in OptionKeys:
+        value = data.get(key)
+        if value is None or value is False or value == []:
+            # Omitted values and default values are same definition.
+            continue
+        if key == 'options':
+            value = [_canonicalizeOption(child) for child in value]
+        elif key == 'choices':
+            value = [{'name': choice['name'], 'value': choice['value']} for choice in value]
+        option[key] = value
+    return option
+
+
+def canonicalize(data: JSON) -> JSON:
+    """Strip fields set by discord and default values from application command json.
+    Local definition and remote command have same canonical form when they define same command.
+    Args:
+        data (JSON): json of the application command.
+    Returns:
+        canonical form of the command, which can be used as creation payload.
+    """
+    command: JSON = {
+        'name': data['name'],
+        'description': data['description']
+    }
+    options = data.get('options')
+    if options:
+        command['options'] = [_canonicalizeOption(option) for option in options]
+    return command
+
+
+def canonicalJson(data: JSON) -> str:
+    """Serialize canonical form of application command json into comparable string."""
+    return json.dumps(canonicalize(data), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def contentHash(data: JSON) -> str:
+    """sha256 hex digest of canonical json. Same definitions always have same hash."""
+    return hashlib.sha256(canonicalJson(data).encode('utf-8')).hexdigest()
+
+
 class ApplicationCommand(JsonObject):
     """
     V5 Application Command(a.k.a Slash Command) object.
@@ -270,6 +479,12 @@ class ApplicationCommand(JsonObject):
     }
     """
 
+    __slots__ = ('_callback', '_handlers', '_data', '_options', '_serialized', '_hash')
+
+    # Commands defined in code with ApplicationCommand.create(), keyed by (guild_id, name).
+    # Synchronized with discord by V5 on login. Defining a command again (ex: reloaded extension) replaces it.
+    __commands__: ClassVar[Dict[Tuple[Optional[int], str], ApplicationCommand]] = {}
+
     def __init__(
         self,
         data: JSON,
@@ -289,62 +504,96 @@ class ApplicationCommand(JsonObject):
             coro (CoroutineFunction): Callback function of this Slash Command.  (Can be optional to set later - fetching from api)
         """
         self._callback: Optional[CoroutineFunction] = coro    # Register Callback function. Can be set later.
-        self._application_id: int = data.get('application_id')
-        self._id: int = data['id']
-        self._name: str = data['name']
-        self._description: str = data['description']
-        options: Optional[List[JSON]] = data.get('options')
-        if isinstance(options, list):
-            self._options: Optional[List[ApplicationCommandOption]] = []
-            for option_json in options:
-                self._options.append(ApplicationCommandOption(option_json))
-
-        try:
-            # Find default option
-            self._defaultOption = tuple(filter(lambda opt: opt.option, self._options))[0]
-        except IndexError:
-            # In case there is no default option
-            self._defaultOption = None
-
-        self._data: JSON = data   # preserve original data
-
-    def invoke(self, *args, **kwargs) -> Coroutine[...]:
+        # Callbacks of subcommand paths. Created when the first subcommand handler is registered.
+        self._handlers: Optional[Dict[Tuple[str, ...], CoroutineFunction]] = None
+        self._data: JSON = data   # Only representation of the command. Every field is read from here.
+        self._options: Optional[List[ApplicationCommandOption]] = None    # Materialized on first access.
+        # Cached serialized canonical form and its hash. Invalidated on _patch and edit.
+        self._serialized: Optional[str] = None
+        self._hash: Optional[str] = None
+
+    def _invalidate(self) -> NoReturn:
+        self._options = None
+        self._serialized = None
+        self._hash = None
+
+    async def invoke(self, *args, path: Tuple[str, ...] = (), **kwargs) -> Any:
         """Safe call _func + patch additional hooks (check, before&after invoke)
+        Args:
+            path (Tuple[str, ...]): Subcommand path to invoke. ex) ('group', 'subcommand')
+                Falls back to callback of the command if the path has no handler.
         Returns:
-            Coroutine object of callback function.
+            Result of callback function.
         """
-        return await self._callback(*args, **kwargs)
+        callback: CoroutineFunction = self._handlers.get(path, self._callback) if self._handlers else self._callback
+        return await callback(*args, **kwargs)    # Latency and errors are recorded by InvocationStats.
 
     @property
-    def id(self) -> int:
-        return self._id
+    def id(self) -> Optional[int]:
+        """id of the command. Not registered commands do not have id yet."""
+        return self._data.get('id')
+
+    @property
+    def application_id(self) -> Optional[int]:
+        application_id = self._data.get('application_id')
+        return int(application_id) if application_id is not None else None
 
     @property
-    def application_id(self) -> int:
-        return self._application_id
+    def guild_id(self) -> Optional[int]:
+        """Guild where the command is registered. Global command if None."""
+        guild_id = self._data.get('guild_id')
+        return int(guild_id) if guild_id is not None else None
 
     @property
     def name(self) -> str:
-        return self._name
+        return self._data['name']
 
     @property
     def description(self) -> str:
-        return self._description
+        return self._data['description']
+
+    @property
+    def canonical(self) -> JSON:
+        """Canonical form of the command. Used as creation payload and to compare with remote commands."""
+        return canonicalize(self._data)
+
+    @property
+    def serialized(self) -> str:
+        """Serialized canonical form of the command. Same as canonicalJson(command.toJson())"""
+        if self._serialized is None:
+            self._serialized = canonicalJson(self._data)
+        return self._serialized
+
+    @property
+    def contentHash(self) -> str:
+        """Hash of canonical form of the command."""
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.serialized.encode('utf-8')).hexdigest()
+        return self._hash
 
     @property
     def options(self) -> Optional[List[ApplicationCommandOption]]:
-        return getattr(self, '_options', None)
+        if self._options is None:
+            options: Optional[List[JSON]] = self._data.get('options')
+            if not options:
+                return None
+            self._options = [ApplicationCommandOption(option_json) for option_json in options]
+        return self._options
 
     @property
     def defaultOption(self) -> Optional[ApplicationCommandOption]:
-        return self._defaultOption
+        for option in self.options or ():
+            if option.default:
+                return option
+        return None
 
     @classmethod
     def fromJson(cls, data: JSON) -> ApplicationCommand:
         return cls(data)     # Set coro later.
 
     def toJson(self) -> JSON:
-        return self._data   # Temporary
+        # Copy, so that callers can't change the command behind cached serialized form and hash.
+        return copy.deepcopy(self._data)
 
     # Callback Helpers
     def callback(self) -> Callable[[CoroutineFunction], CoroutineFunction]:
@@ -355,65 +604,105 @@ class ApplicationCommand(JsonObject):
             return coro
         return wrapper
 
+    def handler(self, *path: str) -> Callable[[CoroutineFunction], CoroutineFunction]:
+        """Register callback of a subcommand.
+        Usage:
+            @command.handler('group', 'subcommand')
+            async def onSubcommand(interaction: Interaction, **options): ...
+        Args:
+            *path (str): Names of subcommand group and subcommand.
+        """
+        def wrapper(coro: CoroutineFunction) -> CoroutineFunction:
+            if not asyncio.iscoroutinefunction(coro):
+                raise TypeError('Callback function must be coroutine function')
+            if self._handlers is None:
+                self._handlers = {}
+            self._handlers[path] = coro
+            return coro
+        return wrapper
+
+    def wrapCallbacks(self, wrap: Callable[[CoroutineFunction], CoroutineFunction]) -> Callable[[], NoReturn]:
+        """Replace callback and every subcommand handler with wrapped ones. (ex: to profile the command)
+        Args:
+            wrap (Callable): Function receiving original coroutine function and returning wrapped one.
+        Returns:
+            Function restoring original callbacks.
+        """
+        callback, handlers = self._callback, self._handlers
+        self._callback = wrap(callback)
+        if handlers is not None:
+            self._handlers = {path: wrap(handler) for path, handler in handlers.items()}
+
+        def restore() -> NoReturn:
+            self._callback, self._handlers = callback, handlers
+        return restore
+
     # Register Helpers
-    async def _register(self) -> JSON:
+    def _route(self, method: str) -> Route:
+        """Build route of this command. Routes to command list endpoint if the command is not registered yet."""
+        return Route.command(method, self.application_id, self.guild_id, self.id)
+
+    async def _register(self, rest: RestClient) -> JSON:
         """Post Slash Command's JSON data to V5's Slash Command endpoint. (Slash Command Creation)
+        Args:
+            rest (RestClient): V5's shared REST client.
         Returns:
             interaction (JSON) data used in SlashCommand._patch to update initial information (id, ...)
         """
-        loop = asyncio.get_event_loop()
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url=DiscordAPI().application(self._application_id).commands(self._id).url,
-                json=self._data
-            ) as response:
-                interaction: JSON = await response.json(encoding='utf-8')
-                return interaction
+        interaction: JSON = await rest.request(self._route('POST'), json=self.canonical)
+        return interaction
 
     def _patch(self, interaction: JSON) -> NoReturn:
         """Patch interaction (response from discord api call) to SlashCommand.
         Args:
             interaction (JSON):
         """
-        self._id = interaction['id']
-
         self._data.update(interaction)  # Update data.
+        self._invalidate()
 
     # Code-based creation
     @classmethod
     def create(
         cls,
-        application_id: int,
+        application_id: Optional[int] = None,
         name: Optional[str] = None,
+        description: Optional[str] = None,
+        guild_id: Optional[int] = None
     ) -> Callable[[CoroutineFunction], ApplicationCommand]:
-        """Create new Slash command.
+        """Create new Slash command. Command is synchronized with discord by V5 when the bot logs in.
         Args:
-            application_id (int):
+            application_id (int): Defaults to application of V5 which synchronizes the command.
             name (str): Name of the Slash Command.
-        Optional Args:
-            **kwargs (Any): Additional attributes of Slash Command.
+            description (str): Description of the Slash Command. Defaults to docstring of the callback.
+            guild_id (int): Guild where the command is registered. Global command if None.
         :return:
         """
         def wrapper(coro: CoroutineFunction) -> ApplicationCommand:
             data = {
-                'name': name if name is not None else coro.__name__
+                'application_id': application_id,
+                'guild_id': guild_id,
+                'name': name if name is not None else coro.__name__,
+                'description': description if description is not None else (coro.__doc__ or coro.__name__)
             }
-            instance = cls(application_id, data, coro)
-            createTask = asyncio.create_task(instance._register(), name=f'SlashCommand(name={name}).create')
-            createTask.add_done_callback(instance._patch)
+            instance = cls(data, coro)
+            cls.__commands__[(instance.guild_id, instance.name)] = instance
             return instance
         return wrapper
 
     async def edit(
         self,
+        rest: RestClient,
         **kwargs
     ) -> NoReturn:
-        async with aiohttp.ClientSession() as session:
-            resp = await session.patch(
-                url=DiscordAPI().application(self._application_id).commands(self._id).url,
-                data=self.toJson()
-            )
-            resp_json: JSON = await resp.json()
+        """Edit Slash Command.
+        Args:
+            rest (RestClient): V5's shared REST client.
+            **kwargs: Fields of the command to update. (name, description, options)
+        """
+        self._data.update(kwargs)
+        self._invalidate()
+        resp_json: JSON = await rest.request(self._route('PATCH'), json=self.canonical)
+        self._patch(resp_json)
 
 
     def subCommandGroup(self) -> ApplicationSubCommandGroup:
@@ -423,29 +712,427 @@ class ApplicationCommand(JsonObject):
         pass
 
 
+class Interaction:
+    """Interaction received from discord. Passed to application command handlers as first argument."""
+
+    def __init__(self, payload: JSON, rest: RestClient, responder: Optional[asyncio.Future] = None):
+        """
+        Args:
+            payload (JSON): `d` field of INTERACTION_CREATE event, or body of interaction webhook request.
+            rest (RestClient): REST client used to respond to the interaction.
+            responder (Optional[asyncio.Future]): Future receiving the initial response, if the interaction is received
+                over HTTP and responded inline. Initial response is sent with REST request if None.
+        """
+        self._payload: JSON = payload
+        self._rest: RestClient = rest
+        self._responder: Optional[asyncio.Future] = responder
+        self._id: int = int(payload['id'])
+        self._token: str = payload['token']
+        self._lock: asyncio.Lock = asyncio.Lock()   # Serializes initial response and deferral.
+        self._responded: bool = False   # Initial response (or deferral) is sent.
+        self._deferred: bool = False    # Initial response is a deferral. Next reply edits the original response.
+        self._edited: bool = False      # Deferred response is replaced with the real reply.
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def token(self) -> str:
+        return self._token
+
+    @property
+    def data(self) -> JSON:
+        """Application command data of the interaction. (id, name, options)"""
+        return self._payload['data']
+
+    @property
+    def guild_id(self) -> Optional[int]:
+        guild_id = self._payload.get('guild_id')
+        return int(guild_id) if guild_id is not None else None
+
+    @property
+    def channel_id(self) -> Optional[int]:
+        channel_id = self._payload.get('channel_id')
+        return int(channel_id) if channel_id is not None else None
+
+    @property
+    def member(self) -> Optional[JSON]:
+        return self._payload.get('member')
+
+    @property
+    def application_id(self) -> Optional[int]:
+        application_id = self._payload.get('application_id')
+        return int(application_id) if application_id is not None else None
+
+    @property
+    def raw(self) -> JSON:
+        return self._payload
+
+    @property
+    def responded(self) -> bool:
+        """Whether initial response (including deferral) is sent."""
+        return self._responded
+
+    @property
+    def deferred(self) -> bool:
+        return self._deferred
+
+    async def _callback(self, payload: JSON) -> NoReturn:
+        if self._responder is not None and not self._responder.done():
+            # Initial response is sent as body of the HTTP response. Saves one REST round-trip.
+            self._responder.set_result(payload)
+            self._responded = True
+            return
+        await self._rest.request(
+            Route('POST', Route.InteractionCallback, interaction_id=self._id, interaction_token=self._token),
+            json=payload
+        )
+        self._responded = True
+
+    async def respond(
+        self,
+        content: Optional[str] = None,
+        responseType: InteractionResponseType = InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+        **data: Any
+    ) -> Optional[JSON]:
+        """Send interaction response.
+        If the interaction is deferred, the reply replaces the deferred response,
+        and replies after the initial response are sent as follow-up messages.
+        Args:
+            content (str): Content of the message.
+            responseType (InteractionResponseType): Type of the response. Ignored after the initial response.
+            **data (Any): Additional fields of the response data. (tts, embeds, allowed_mentions, flags)
+        Returns:
+            Message json if the reply is sent as edit or follow-up, otherwise None.
+        """
+        if content is not None:
+            data['content'] = content
+        async with self._lock:
+            if not self._responded:
+                payload: JSON = {'type': responseType.value}
+                if data:
+                    payload['data'] = data
+                await self._callback(payload)
+                return None
+            if self._deferred and not self._edited:
+                self._edited = True
+                return await self.editOriginal(**data)
+        return await self.followup(**data)
+
+    async def defer(self) -> bool:
+        """Acknowledge the interaction with ACKNOWLEDGE_WITH_SOURCE, so that the real reply can be sent later.
+        Returns:
+            True if the deferral is sent, False if the interaction is already responded.
+        """
+        async with self._lock:
+            if self._responded:
+                return False
+            await self._callback({'type': InteractionResponseType.ACKNOWLEDGE_WITH_SOURCE.value})
+            self._deferred = True
+            return True
+
+    async def editOriginal(self, content: Optional[str] = None, **data: Any) -> JSON:
+        """Edit initial response of the interaction."""
+        if content is not None:
+            data['content'] = content
+        return await self._rest.request(
+            Route(
+                'PATCH', Route.InteractionOriginal,
+                application_id=self.application_id, interaction_id=self._id, interaction_token=self._token
+            ),
+            json=data
+        )
+
+    async def followup(self, content: Optional[str] = None, **data: Any) -> JSON:
+        """Send follow-up message of the interaction."""
+        if content is not None:
+            data['content'] = content
+        return await self._rest.request(
+            Route(
+                'POST', Route.InteractionFollowup,
+                application_id=self.application_id, interaction_id=self._id, interaction_token=self._token
+            ),
+            json=data
+        )
+
+
+class InvocationStats:
+    """Statistics of application command invocations. Backed by per command metrics of the registry,
+    so the same numbers are exposed through metrics endpoint. Totals are summed from them.
+    """
+
+    # Upper bounds of latency histogram buckets, in seconds. Last bucket has no upper bound.
+    Bounds: ClassVar[Tuple[float, ...]] = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0)
+
+    def __init__(self, metrics: MetricsRegistry = registry):
+        self._latency: Histogram = metrics.histogram(
+            'v5_command_latency_seconds', 'Latency of application command invocations.', ('command',), self.Bounds
+        )
+        self._deferred: Counter = metrics.counter(
+            'v5_interactions_deferred_total', 'Number of interactions deferred by deadline.'
+        )
+        self._failed: Counter = metrics.counter(
+            'v5_command_errors_total', 'Number of application command invocations raised exception.', ('command',)
+        )
+
+    @property
+    def invoked(self) -> int:
+        """Number of finished invocations."""
+        return sum(latency.count for _, latency in self._latency.samples())
+
+    @property
+    def deferred(self) -> int:
+        """Number of invocations deferred by deadline."""
+        return int(self._deferred.value)
+
+    @property
+    def failed(self) -> int:
+        """Number of invocations raised exception."""
+        return int(sum(failed.value for _, failed in self._failed.samples()))
+
+    @property
+    def buckets(self) -> List[int]:
+        buckets: List[int] = [0] * (len(self.Bounds) + 1)
+        for _, latency in self._latency.samples():
+            buckets = [*map(sum, zip(buckets, latency.counts))]
+        return buckets
+
+    def record(self, command: str, latency: float, deferred: bool, failed: bool = False) -> NoReturn:
+        """
+        Args:
+            command (str): Name of the invoked command.
+            latency (float): Seconds from dispatch to the handler finished.
+            deferred (bool): Whether the interaction is deferred by deadline.
+            failed (bool): Whether the handler raised exception.
+        """
+        self._latency.labels(command).observe(latency)
+        if deferred:
+            self._deferred.inc()
+        if failed:
+            self._failed.labels(command).inc()
+
+    @property
+    def deferralRate(self) -> float:
+        invoked: int = self.invoked
+        return self.deferred / invoked if invoked else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of histogram bucket containing q-th quantile of latency. (inf if it is in the last bucket)
+        Args:
+            q (float): Quantile between 0 and 1.
+        """
+        buckets: List[int] = self.buckets
+        target: float = q * sum(buckets)
+        count: int = 0
+        for index, bound in enumerate(self.Bounds):
+            count += buckets[index]
+            if count >= target and count > 0:
+                return bound
+        return float('inf')
+
+    def toJson(self) -> JSON:
+        return {
+            'invoked': self.invoked,
+            'deferred': self.deferred,
+            'failed': self.failed,
+            'deferral_rate': self.deferralRate,
+            'histogram': dict(zip([*map(str, self.Bounds), 'inf'], self.buckets))
+        }
+
+
+class CommandNode:
+    """Node of subcommand trie.
+    Root node is an application command, and children are its subcommand groups and subcommands.
+    """
+    __slots__ = ('name', 'command', 'path', 'plan', 'children', 'registeredId')
+
+    def __init__(self, name: str, command: ApplicationCommand, path: Tuple[str, ...], plan: ArgumentPlan):
+        self.name: str = name
+        self.command: ApplicationCommand = command
+        self.path: Tuple[str, ...] = path    # Subcommand path passed to ApplicationCommand.invoke
+        self.plan: ArgumentPlan = plan      # Compiled converter of options of this node.
+        self.children: Dict[str, CommandNode] = {}
+        # Id the root node is registered under. Id of the command may change later. (ex: patched by sync)
+        self.registeredId: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f'<CommandNode(command={self.command.name}, path={self.path})>'
+
+
+class InteractionRouter:
+    """Routes application command interactions to command handlers.
+
+    Commands are looked up by id (or name as fallback) in hash maps, and subcommands are resolved
+    by walking the trie precomputed from ApplicationCommandOption trees. So dispatch cost does not
+    grow with number of registered commands.
+    """
+
+    SubcommandTypes: ClassVar[Tuple[int, ...]] = (
+        ApplicationCommandOptionType.SUB_COMMAND.value,
+        ApplicationCommandOptionType.SUB_COMMAND_GROUP.value
+    )
+
+    def __init__(self):
+        self._byId: Dict[int, CommandNode] = {}
+        self._byName: Dict[Tuple[Optional[int], str], CommandNode] = {}    # (guild_id, name) -> node
+
+    def __len__(self) -> int:
+        return len(self._byName)
+
+    def _build(self, command: ApplicationCommand, name: str, path: Tuple[str, ...], options) -> CommandNode:
+        node = CommandNode(name, command, path, ArgumentPlan.compile(options))
+        for option in options:
+            if option.type.value in self.SubcommandTypes:
+                node.children[option.name] = self._build(command, option.name, path + (option.name,), option.options)
+        return node
+
+    def add(self, command: ApplicationCommand) -> CommandNode:
+        """Add command to the router, or rebuild its trie if the command is already added."""
+        self.remove(command)
+        root = self._build(command, command.name, (), command.options or ())
+        self._byName[(command.guild_id, command.name)] = root
+        if command.id is not None:
+            root.registeredId = int(command.id)
+            self._byId[root.registeredId] = root
+        return root
+
+    def remove(self, command: ApplicationCommand) -> Optional[CommandNode]:
+        """Remove command from the router."""
+        root = self._byName.pop((command.guild_id, command.name), None)
+        if root is not None and root.registeredId is not None and self._byId.get(root.registeredId) is root:
+            del self._byId[root.registeredId]
+        return root
+
+    def resolve(self, data: JSON, guild_id: Optional[int] = None) -> Optional[Tuple[CommandNode, List[JSON]]]:
+        """Find trie node of the interaction data.
+        Args:
+            data (JSON): Application command data of the interaction. (id, name, options)
+            guild_id (int): Guild where the interaction is created.
+        Returns:
+            Tuple of matched node and options of the subcommand, or None if no command matches.
+        """
+        node: Optional[CommandNode] = self._byId.get(int(data['id']))
+        if node is None:
+            node = self._byName.get((guild_id, data['name'])) or self._byName.get((None, data['name']))
+            if node is None:
+                return None
+
+        options: List[JSON] = data.get('options') or []
+        while options and options[0]['type'] in self.SubcommandTypes:
+            node = node.children.get(options[0]['name'])
+            if node is None:
+                return None
+            options = options[0].get('options') or []
+        return node, options
+
+
 class InteractionsAPI(object):
-    """Slash Command Helper"""
+    """Slash Command Helper. Receives interactions from gateway and dispatches them through InteractionRouter."""
     def __init__(
         self,
         client: Union[discord.Client, commands.Bot],
-        auto_load: bool = True
+        rest: RestClient,
+        auto_load: bool = True,
+        deferAfter: Optional[float] = 2.2
     ) -> None:
-        if isinstance(client, commands.Bot):
+        """
+        Args:
+            client (Union[discord.Client, commands.Bot]): Client receiving interactions.
+            rest (RestClient): REST client used to respond to interactions.
+            deferAfter (Optional[float]): Seconds to wait for handler's initial response before deferring the interaction.
+                Discord fails interactions not responded in 3 seconds. Automatic deferral is disabled if None.
+        """
+        if hasattr(client, 'gatewayFilter'):
+            # V5 prefilters gateway events, so only INTERACTION_CREATE payloads reach the router.
+            client.gatewayFilter.subscribe('INTERACTION_CREATE', self.on_socket_response)
+        elif isinstance(client, commands.Bot):
             client.add_listener(self.on_socket_response)
         elif isinstance(client, discord.Client):
             setattr(client, 'on_socket_response', self.on_socket_response)
         else:
             raise TypeError("parameter 'client' must be instance of either 'discord.Client' or 'discord.ext.commands.Bot'")
         self._discord = client
-        self._applicationId: int = (await client.application_info()).id
-        self._commands: List[ApplicationCommand] = []
+        self._rest: RestClient = rest
+        self._router: InteractionRouter = InteractionRouter()
+        self._deferAfter: Optional[float] = deferAfter
+        self._stats: InvocationStats = InvocationStats()
+
+    @property
+    def router(self) -> InteractionRouter:
+        return self._router
+
+    @property
+    def stats(self) -> InvocationStats:
+        return self._stats
+
+    def addCommand(self, command: ApplicationCommand) -> NoReturn:
+        self._router.add(command)
+
+    def removeCommand(self, command: ApplicationCommand) -> NoReturn:
+        self._router.remove(command)
 
     async def on_socket_response(self, msg: Any):
         """event handler for websocket's response.
 
-        :param msg:
+        :param msg: decoded gateway payload.
         :return:
         """
+        if msg.get('t') != 'INTERACTION_CREATE':
+            return
+        await self.dispatch(msg['d'])
+
+    async def dispatch(self, payload: JSON, responder: Optional[asyncio.Future] = None) -> Any:
+        """Invoke handler of the interaction.
+        Args:
+            payload (JSON): `d` field of INTERACTION_CREATE event, or body of interaction webhook request.
+            responder (Optional[asyncio.Future]): Future receiving the initial response. See Interaction.__init__
+        Returns:
+            Result of the handler.
+        """
+        if payload['type'] != InteractionType.APPLICATION_COMMAND.value:
+            return
+        guild_id = payload.get('guild_id')
+        resolved = self._router.resolve(payload['data'], int(guild_id) if guild_id is not None else None)
+        if resolved is None:
+            logger.warning(f'No application command matches interaction {payload["data"]["name"]}.')
+            return
+        node, options = resolved
+        try:
+            arguments = node.plan(options, payload['data'].get('resolved'))
+        except OptionError as e:
+            logger.warning(f'Interaction {payload["data"]["name"]} {node.path} has invalid options. {e}')
+            return
+        return await self.invoke(node, Interaction(payload, self._rest, responder), arguments)
+
+    async def invoke(self, node: CommandNode, interaction: Interaction, arguments: Dict[str, Any]) -> Any:
+        """Invoke handler with deadline. If the handler does not respond in time, the interaction is deferred
+        and the handler's reply is routed to the deferred response.
+        Args:
+            node (CommandNode): Resolved node of the command.
+            interaction (Interaction): Interaction passed to the handler.
+            arguments (Dict[str, Any]): Converted options.
+        Returns:
+            Result of the handler.
+        """
+        loop = asyncio.get_event_loop()
+        started: float = loop.time()
+        task: asyncio.Future = asyncio.ensure_future(node.command.invoke(interaction, path=node.path, **arguments))
+        failed: bool = True
+        try:
+            if self._deferAfter is not None:
+                await asyncio.wait((task,), timeout=self._deferAfter)
+                if not task.done() and await interaction.defer():
+                    logger.debug(
+                        f'Interaction {node.command.name} {node.path} is deferred after {loop.time() - started:.3f}s.'
+                    )
+            result = await task
+            failed = False
+            return result
+        finally:
+            if not task.done():
+                task.cancel()   # Dispatch itself is cancelled.
+            self._stats.record(node.command.name, loop.time() - started, interaction.deferred, failed)
 
     def slashCommand(
         self,
@@ -468,4 +1155,4 @@ class InteractionsAPI(object):
         """
 
 
-SlashClient = InteractionsAPI   # Alias
+SlashClient = InteractionsAPI   # Alias
\ No newline at end of file
@@ -4,8 +4,11 @@ Utility module for V5
 
 from .constants import DiscordInvites, Resources
 from .type_hints import *
-from .resources import ResourceType, ResourceFile, JsonFile
+from .resources import ResourceType, ResourceFile, JsonFile, JsonLinesFile, FileWriter, ResourceCache
+from .watcher import FileWatcher
 from .config import Config
+from .metrics import Counter, Gauge, Histogram, MetricsRegistry, registry
+from .profiling import Profiler, CProfiler, SamplingProfiler
 from .oop import ClassPropertyMeta, classproperty
 from .logging_util import getLogger, Logger, LogLevels
 from .tools import parsePyFileName, parseCogName
@@ -15,7 +18,10 @@ __all__ = (
         constants.__all__
         + type_hints.__all__
         + resources.__all__
+        + watcher.__all__
         + config.__all__
+        + metrics.__all__
+        + profiling.__all__
         + oop.__all__
         + logging_util.__all__
         + tools.__all__
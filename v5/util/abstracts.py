@@ -4,6 +4,7 @@ from .type_hints import JSON
 
 
 class JsonObject(metaclass=ABCMeta):
+    __slots__ = ()
 
     @classmethod
     @abstractmethod
@@ -1,79 +1,114 @@
+import os
+import sys
 import inspect
 import functools
+from types import CodeType
+from typing import Set, NoReturn
 from .type_hints import T
 
 
+__all__ = (
+    'ModulePrivateError',
+    'modulePrivate',
+    'setProduction',
+    'isProduction'
+)
+
+# Production mode strips access checks at decoration time, so decorated objects are the original objects.
+# Enabled when python runs with -O, or V5_PRODUCTION environment variable is set to non-zero value.
+_production: bool = not __debug__ or os.environ.get('V5_PRODUCTION', '0') not in ('', '0')
+
+
+def setProduction(enabled: bool) -> NoReturn:
+    """Enable or disable production mode. Only affects objects decorated after the call."""
+    global _production
+    _production = enabled
+
+
+def isProduction() -> bool:
+    return _production
+
+
 class ModulePrivateError(Exception):
     def __init__(self, o, *args, **kwargs):
-        super().__init__(*args)
         self._msg: str = 'Object {} is a module-private method.'.format(
             o.__name__
         )
+        super().__init__(self._msg, *args)
 
     @property
     def msg(self) -> str:
         return self._msg
 
 
-def modulePrivate(o: T) -> T:
-    # print('module-private decorator on object:', o)
-    setattr(o, '__private__', True)
-    if inspect.isfunction(o):
-        @functools.wraps(o)
-        def wrapper(*args, **kwargs):
-            outerFrame: inspect.FrameInfo = inspect.getouterframes(inspect.currentframe())[1]
-            originalFile: str = inspect.getfile(o)
-            if outerFrame.filename == originalFile:
-                # print('[Caller frame info]')
-                # print('filename =', outerFrame.filename)
-                # print('line number =', outerFrame.lineno)
-                # print('function =', outerFrame.function)
-                # print('code context =', outerFrame.code_context)
-                # print('Same module. Allow using object.')
-                return o(*args, **kwargs)
-            else:
-                # print('Different module. Deny using object.')
-                raise ModulePrivateError(o)
-        return wrapper
-    elif inspect.ismethod(o):
-        @functools.wraps(o)
-        def wrapper(*args, **kwargs):
-            outerFrame: inspect.FrameInfo = inspect.getouterframes(inspect.currentframe())[1]
-            originalFile: str = inspect.getfile(o)
-            if outerFrame.filename == originalFile:
-                # print('[Caller frame info]')
-                # print('filename =', outerFrame.filename)
-                # print('line number =', outerFrame.lineno)
-                # print('function =', outerFrame.function)
-                # print('code context =', outerFrame.code_context)
-                # print('Same module. Allow using object.')
-                # print('Same module. Allow using object.')
-                return o(*args, **kwargs)
-            else:
-                # print('Different module. Deny using object.')
+def _privateFunction(o, filename: str):
+    # Only code object of the immediate caller is checked, and allowed code objects are cached,
+    # so repeated calls from the same function cost a frame lookup and a set lookup.
+    allowed: Set[CodeType] = set()
+    getframe = sys._getframe
+
+    @functools.wraps(o)
+    def wrapper(*args, **kwargs):
+        code: CodeType = getframe(1).f_code
+        if code not in allowed:
+            if code.co_filename != filename:
                 raise ModulePrivateError(o)
-        return wrapper
-    elif inspect.isclass(o):
-        # Override '__new__' method to hook class object call.
-        # '__call__' defines class instance's callable feature, which is not suitable to hook class object call.
-        @functools.wraps(o.__new__)
-        def __new__(cls: type, *args, **kwargs):
-            outerFrame: inspect.FrameInfo = inspect.getouterframes(inspect.currentframe())[1]
-            originalFile: str = inspect.getfile(o)
-            if outerFrame.filename == originalFile:
-                # print('[Caller frame info]')
-                # print('filename =', outerFrame.filename)
-                # print('line number =', outerFrame.lineno)
-                # print('function =', outerFrame.function)
-                # print('code context =', outerFrame.code_context)
-                # print('Same module. Allow using object.')
-                # print('Same module. Allow using object.')
-                return cls.__new__(*args, **kwargs)
-            else:
-                # print('Different module. Deny using object.')
+            allowed.add(code)
+        return o(*args, **kwargs)
+    return wrapper
+
+
+def _privateClass(o: type) -> type:
+    module: str = o.__module__
+    filename: str = inspect.getfile(o)
+    allowed: Set[CodeType] = set()
+    getframe = sys._getframe
+    originalNew = o.__dict__.get('__new__')     # staticmethod, or None if inherited.
+    originalInitSubclass = o.__dict__.get('__init_subclass__')     # classmethod, or None if inherited.
+
+    # Override '__new__' method to hook class object call.
+    # '__call__' defines class instance's callable feature, which is not suitable to hook class object call.
+    # type.__call__ is not a python frame, so the immediate caller of __new__ is the code calling the class.
+    def __new__(cls, *args, **kwargs):
+        code: CodeType = getframe(1).f_code
+        if code not in allowed:
+            if code.co_filename != filename:
                 raise ModulePrivateError(o)
+            allowed.add(code)
+        if originalNew is not None:
+            return originalNew.__func__(cls, *args, **kwargs)
+        parentNew = super(o, cls).__new__
+        # object.__new__ rejects extra arguments once __new__ is overridden, so they are passed to __init__ only.
+        return parentNew(cls) if parentNew is object.__new__ else parentNew(cls, *args, **kwargs)
+
+    # Subclasses are checked once when they are defined, by the module they are defined in.
+    def __init_subclass__(cls, **kwargs):
+        if cls.__module__ != module:
+            raise ModulePrivateError(o)
+        if originalInitSubclass is not None:
+            originalInitSubclass.__func__(cls, **kwargs)
+        else:
+            super(o, cls).__init_subclass__(**kwargs)
+
+    if originalNew is not None:
+        functools.update_wrapper(__new__, originalNew.__func__)
+    o.__new__ = __new__
+    o.__init_subclass__ = classmethod(__init_subclass__)
+    return o
 
-        setattr(o, '__new__', __new__)
+
+def modulePrivate(o: T) -> T:
+    """Make function, method or class usable only in the module defining it.
+    In production mode, the object is only marked as private and returned as is.
+    """
+    setattr(o.__func__ if inspect.ismethod(o) else o, '__private__', True)
+    if _production:
         return o
+    if inspect.isfunction(o):
+        return _privateFunction(o, o.__code__.co_filename)
+    elif inspect.ismethod(o):
+        return _privateFunction(o, o.__func__.__code__.co_filename)
+    elif inspect.isclass(o):
+        return _privateClass(o)
     else:
-        raise ValueError('Cannot make this object into module-private!')
+        raise ValueError('Cannot make this object into module-private!')
\ No newline at end of file
@@ -1,10 +1,15 @@
 from __future__ import annotations
 import asyncio
 import json
+import logging
+import marshal
 import os
+import time
 from functools import reduce
-from typing import NoReturn, ClassVar, Final, Optional, Any, List, Dict
-from .resources import JsonFile
+from types import MappingProxyType
+from typing import NoReturn, ClassVar, Final, Optional, Any, List, Dict, Tuple, Set, Mapping, Callable
+from .resources import JsonFile, atomicWrite
+from .watcher import FileWatcher
 from .type_hints import JSON
 from .abstracts import JsonObject
 from .logging_util import getLogger, LogLevels
@@ -18,21 +23,69 @@ logger = getLogger('utils.config', LogLevels.DEBUG)
 
 __instance_storage__: Dict[str, Config] = {}
 
+# Called with (key, old value, new value) when value of subscribed key is changed. Can be coroutine function.
+ConfigListener = Callable[[str, Any, Any], Any]
+
+
+_Containers = (dict, list, tuple, MappingProxyType)
+
+
+def freeze(content: Any) -> Any:
+    """Make immutable snapshot of json content. dict -> MappingProxyType, list -> tuple"""
+    # Exact type checks are much cheaper than isinstance checks against Mapping ABC, and scalars are not recursed.
+    if type(content) in (dict, MappingProxyType):
+        return MappingProxyType({
+            key: freeze(value) if type(value) in _Containers else value for key, value in content.items()
+        })
+    if type(content) in (list, tuple):
+        return tuple([freeze(value) if type(value) in _Containers else value for value in content])
+    return content
+
+
+def thaw(content: Any) -> Any:
+    """Make json serializable copy of frozen snapshot."""
+    if isinstance(content, Mapping):
+        return {key: thaw(value) for key, value in content.items()}
+    if isinstance(content, tuple):
+        return [thaw(value) for value in content]
+    return content
+
+
+def changedKeys(old: Any, new: Any, prefix: str = '') -> Set[str]:
+    """Dotted key paths whose values are different in old and new content. Only the topmost changed keys are listed."""
+    if old is new:
+        return set()
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        changed: Set[str] = set()
+        for key in old.keys() | new.keys():
+            path = f'{prefix}.{key}' if prefix else key
+            if key not in old or key not in new:
+                changed.add(path)
+            elif old[key] != new[key]:
+                changed |= changedKeys(old[key], new[key], path)
+        return changed
+    return {prefix} if old != new else set()
+
 
 class Config(JsonObject):
     """Configuration storage & manager"""
 
     root: Final[ClassVar[str]] = 'config'
+    # Directory of parsed snapshots. Warm starts load the snapshot instead of parsing json.
+    cacheRoot: ClassVar[str] = os.path.join('cache', 'config')
+    # 'key1.key2.key3' -> ('key1', 'key2', 'key3'). Key paths do not depend on content, so shared by every config.
+    __key_paths__: ClassVar[Dict[str, Tuple[str, ...]]] = {}
 
     @classmethod
     def fromJson(cls, name: str, content: JSON) -> Config:
         return cls(name=name, content=content)
 
     def toJson(self) -> JSON:
-        return self._content
+        return thaw(self._content)
 
     @property
-    def raw(self) -> JSON:
+    def raw(self) -> Mapping[str, Any]:
+        """Immutable snapshot of current content. Replaced as a whole when the config is reloaded."""
         return self._content
 
     def __call__(self, *args, **kwargs):
@@ -47,15 +100,21 @@ class Config(JsonObject):
             return super().__call__(*args, **kwargs)
 
     def __init__(self, name: str, content: Optional[JSON] = None):
+        """Load config synchronously, parsing the file at most once.
+        Args:
+            name (str): Name of the config. Content is stored in `config/<name>.json`
+            content (Optional[JSON]): Initial content. Written into the file instead of reading it.
+        """
+        started: float = time.perf_counter()
         self._name = name
         self._file: JsonFile = JsonFile(path=os.path.join(self.root, f'{name}.json'), content=content)
-        self._content: JSON = self.__internal__read()
+        self._snapshotPath: str = os.path.join(self.cacheRoot, f'{name}.marshal')
+        self._content: Mapping[str, Any] = freeze(content if content is not None else self.__internal__read())
+        self._cache: Dict[str, Any] = {}    # key -> resolved value. Replaced whenever content changes.
+        self._listeners: Dict[str, List[ConfigListener]] = {}
+        self._watcher: Optional[FileWatcher] = None
         logger.debug(f'JsonFile {self._file} attached to config {name}')
-        contentLoad: asyncio.Task = asyncio.get_event_loop().create_task(self.load(), name=f'Config[name={name}].load')
-        contentLoad.add_done_callback(self.__setAvailable)
-        logger.debug(
-            f'Scheduling content load coro in event loop. current task : {contentLoad}'
-        )
+        logger.info(f'{self!r} loaded in {(time.perf_counter() - started) * 1000:.2f} ms.')
         __instance_storage__[name] = self
 
     @property
@@ -63,44 +122,178 @@ class Config(JsonObject):
         return self._file
 
     async def load(self) -> NoReturn:
-        self._content = await self._file.read()
-        logger.debug(f'result of config load : {self._content}')
+        """Read the file again off the event loop. Same as Config.reload"""
+        await self.reload()
+
+    async def reload(self) -> Set[str]:
+        """Reparse the file off the event loop, and swap content with new snapshot.
+        Returns:
+            Changed key paths.
+        """
+        content: JSON = await asyncio.get_event_loop().run_in_executor(None, self.__internal__read)
+        changed = self._swap(freeze(content))
+        logger.info(f'{self!r} reloaded. changed keys : {sorted(changed)}')
+        return changed
+
+    def _swap(self, new: Mapping[str, Any]) -> Set[str]:
+        """Replace content with immutable snapshot, and notify listeners of changed keys."""
+        old: Mapping[str, Any] = self._content
+        # Single assignments, so Config.get never sees half-updated content.
+        self._cache = {}
+        self._content = new
+        changed: Set[str] = changedKeys(old, new)
+        if changed:
+            self._notify(old, new, changed)
+        return changed
+
+    def subscribe(self, key: str, listener: ConfigListener) -> NoReturn:
+        """Call listener when value of the key (or its children) is changed by reload.
+        Args:
+            key (str): 'key1.key2' style key.
+            listener (ConfigListener): Function called with (key, old value, new value).
+        """
+        self._listeners.setdefault(key, []).append(listener)
+
+    def unsubscribe(self, key: str, listener: ConfigListener) -> NoReturn:
+        listeners = self._listeners.get(key)
+        if listeners is not None and listener in listeners:
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[key]
+
+    def _notify(self, old: Mapping[str, Any], new: Mapping[str, Any], changed: Set[str]) -> NoReturn:
+        for key, listeners in tuple(self._listeners.items()):
+            if not any(
+                    path == key or path.startswith(f'{key}.') or key.startswith(f'{path}.') for path in changed
+            ):
+                continue
+            oldValue, newValue = self._resolve(old, key), self._resolve(new, key)
+            for listener in tuple(listeners):
+                try:
+                    result = listener(key, oldValue, newValue)
+                    if asyncio.iscoroutine(result):
+                        asyncio.ensure_future(result)
+                except Exception:
+                    logger.exception(f'Exception in config listener {listener!r} of key {key}')
+
+    def watch(self, interval: float = 1.0) -> NoReturn:
+        """Reload config when the file is changed. Uses inotify if available, otherwise polls mtime.
+        Args:
+            interval (float): Polling interval in seconds, used when inotify is not available.
+        """
+        if self._watcher is None:
+            self._watcher = FileWatcher(self._file.relativePath, self.reload, interval=interval)
+            self._watcher.start()
+
+    def unwatch(self) -> NoReturn:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
 
     def isLoaded(self) -> bool:
         return bool(self._content)
 
     def __internal__read(self) -> JSON:
-        with open(file=self._file._relPath, mode='rt', encoding='utf-8') as f:
-            text = f.read()
-        return json.loads(text)
+        """Read content of the file. Uses the parsed snapshot if the file is not changed since it is made.
+        Snapshot is keyed by mtime and size of the file.
+        """
+        try:
+            f = open(file=self._file.relativePath, mode='rb')
+        except FileNotFoundError:
+            logger.warning(f'{self!r} : {self._file.relativePath} does not exist. Using empty config.')
+            return {}
+        with f:
+            stat = os.fstat(f.fileno())
+            key = (stat.st_mtime_ns, stat.st_size)
+            try:
+                with open(self._snapshotPath, mode='rb') as snapshot:
+                    cachedKey, content = marshal.loads(snapshot.read())
+                if tuple(cachedKey) == key:
+                    logger.debug(f'{self!r} : Parsed snapshot {self._snapshotPath} is up to date.')
+                    return content
+            except (OSError, EOFError, ValueError, TypeError):
+                pass    # Snapshot does not exist, or is broken.
+            content: JSON = json.loads(f.read().decode('utf-8'))
 
-    def __setAvailable(self, result):
-        logger.debug(result)
-        logger.debug(f'Config file {self._name} finished loading and is now available!')
+        try:
+            # Snapshot holds every secret of the config (ex: bot token), so only the owner can read it.
+            os.makedirs(self.cacheRoot, mode=0o700, exist_ok=True)
+            atomicWrite(self._snapshotPath, marshal.dumps((key, content)), mode=0o600)
+        except (OSError, ValueError) as e:
+            # Snapshot is only an optimization.
+            logger.warning(f'{self!r} : Failed to write parsed snapshot {self._snapshotPath}. ({e!r})')
+        return content
 
     async def save(self) -> NoReturn:
         await self._file.write(self._content)
+        self.invalidate()
+
+    def set(self, key: str, value: Any, save: bool = True) -> NoReturn:
+        """Set item in config. Content is replaced with new snapshot sharing unchanged parts.
+        Args:
+            key (str): 'key1.key2.key3' style key. Missing parents are created.
+            value (Any): Json compatible value.
+            save (bool): Queue write of the file. Writes of successive calls are coalesced. Await Config.flush to
+                wait for the write.
+        """
+        def assoc(node: Any, path: Tuple[str, ...]) -> Any:
+            if not path:
+                return freeze(value)
+            node = node if isinstance(node, Mapping) else {}
+            return MappingProxyType({**node, path[0]: assoc(node.get(path[0]), path[1:])})
+
+        self._swap(assoc(self._content, self.compileKey(key)))
+        if save:
+            self._file.submit(self._content)
+
+    async def flush(self) -> NoReturn:
+        """Wait until queued writes of the config are written."""
+        await self._file.flush()
+
+    def invalidate(self) -> NoReturn:
+        """Clear cached values of Config.get."""
+        self._cache = {}
+
+    @classmethod
+    def compileKey(cls, key: str) -> Tuple[str, ...]:
+        """Split 'key1.key2.key3' style key into key path tuple. Compiled key paths are cached."""
+        path = cls.__key_paths__.get(key)
+        if path is None:
+            path = cls.__key_paths__[key] = tuple(k for k in key.split('.') if k)
+        return path
 
     def get(self, key: str) -> Optional[Any]:
-        """Retrieve item in config using eval [EXPERIMENT]
+        """Retrieve item in config using compiled key path.
         Usage:
             Config.get(key1.key2.key3) == Config.raw[key1][key2][key3]
         Args:
             key (str):
                 'key1.key2.key3' style dictionary keys. This will be split using '.', and used to get content.
-        :return:
+        Returns:
+            Value of the key, or None if the key does not exist.
         """
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
 
-        logger.debug(f'{self!r}.get - key : {key}')
+        value: Any = self._resolve(self._content, key)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'{self!r}.get - key : {key} resolved. (found={value is not None})')
+        self._cache[key] = value
+        return value
+
+    @classmethod
+    def _resolve(cls, content: Mapping[str, Any], key: str) -> Optional[Any]:
+        value: Any = content
         try:
-            res = eval(r'self._content' + ''.join(f"['{k}']" for k in key.split('.') if k))
-            logger.debug(f'get2 : {res}')
-            return res
-        except (KeyError, AttributeError):
-            # None.get(key) -> AttributeError
+            for k in cls.compileKey(key):
+                value = value[k]
+        except (KeyError, TypeError, IndexError):
+            # Key does not exist, or parent value is not a dictionary.
             # In case of this, return None.
-            logger.debug(f'{self!r}.get - Cannot find corresponding data in config. Return None.')
             return None
+        return value
 
     def __repr__(self):
         return f'Config<{self._name}>'
@@ -1,13 +1,21 @@
+import atexit
 import logging
+import queue
+import threading
+import time
 from enum import Enum
-from typing import Optional, Union
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Union, Dict, Set
 from sys import stdout
 
 
 __all__ = (
     'Logger',
     'LogLevels',
-    'getLogger'
+    'getLogger',
+    'enableQueueLogging',
+    'disableQueueLogging',
+    'loggingStats'
 )
 
 # Logger class
@@ -50,16 +58,203 @@ class LogLevels(Enum):
     DEBUG = logging.DEBUG
 
 
+class DropPolicy(Enum):
+    NEWEST = 'newest'   # Drop the record being logged when the queue is full.
+    OLDEST = 'oldest'   # Drop the oldest queued record to make room.
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler for bounded queue. Records below `keepLevel` never block the logging thread, and are dropped
+    when the queue is full. Records at or above `keepLevel` are never dropped : they wait for room in the queue.
+    Records are not formatted here. Formatting happens in the listener thread.
+    """
+
+    def __init__(self, queue_: queue.Queue, policy: DropPolicy = DropPolicy.NEWEST, keepLevel: int = logging.WARNING):
+        super(BoundedQueueHandler, self).__init__(queue_)
+        self.policy: DropPolicy = policy
+        self.keepLevel: int = keepLevel
+        self.queued: int = 0
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args only, since they may be mutated after logging. Time, colors and traceback are formatted later.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if record.levelno >= self.keepLevel:
+            # Listener thread keeps draining the queue, so blocking put always finishes.
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                if self.policy is DropPolicy.NEWEST or not self._replaceOldest(record):
+                    return
+        self.queued += 1
+
+    def _replaceOldest(self, record: logging.LogRecord) -> bool:
+        """Replace the oldest queued record with the record, unless the oldest one must be kept."""
+        with self.queue.mutex:
+            records = self.queue.queue
+            if not records or getattr(records[0], 'levelno', self.keepLevel) >= self.keepLevel:
+                return False
+            records.popleft()
+            records.append(record)
+            return True
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Queue may be full. Listener thread is still draining it, so blocking put always finishes.
+        self.queue.put(self._sentinel)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket limiting records at or below `level` per logger. More severe records always pass."""
+
+    def __init__(self, rate: float, burst: int, level: int = logging.DEBUG):
+        """
+        Args:
+            rate (float): Records allowed per second on average.
+            burst (int): Records allowed at once.
+            level (int): Records at or below this level are limited.
+        """
+        super(RateLimitFilter, self).__init__()
+        self.rate: float = rate
+        self.burst: int = burst
+        self.level: int = level
+        self.limited: int = 0
+        self._tokens: float = burst
+        self._last: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.limited += 1
+            return False
+
+
+# Loggers made with getLogger, and their formatters.
+_loggers: Dict[str, logging.Formatter] = {}
+_queueHandler: Optional[BoundedQueueHandler] = None
+_listener: Optional[_Listener] = None
+_rateLimiters: Set[RateLimitFilter] = set()
+_debugRate: Optional[float] = None
+_debugBurst: int = 0
+
+
+def _consoleHandler(formatter: logging.Formatter) -> logging.Handler:
+    console_handler = logging.StreamHandler(stream=stdout)
+    console_handler.setFormatter(formatter)
+    return console_handler
+
+
+def _attachQueue(logger: Logger) -> None:
+    for handler in tuple(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_queueHandler)
+    if _debugRate is not None:
+        limiter = RateLimitFilter(_debugRate, _debugBurst)
+        _rateLimiters.add(limiter)
+        logger.addFilter(limiter)
+
+
 def getLogger(name: str, level: Optional[Union[LogLevels, int]] = LogLevels.DEBUG, formatter: logging.Formatter = _Formatter) -> Logger:
     if isinstance(level, LogLevels):
         level = level.value
     logger = logging.getLogger(name)
     logger.propagate = False    # Make child logger not use parent's logging handlers. - prevent log duplicates
     logger.setLevel(level)
+    if name not in _loggers:
+        _loggers[name] = formatter
+        if _queueHandler is not None:
+            _attachQueue(logger)
     if not logger.handlers:
-        console_handler = logging.StreamHandler(stream=stdout)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        logger.addHandler(_consoleHandler(formatter))
     return logger
 
 
+class _FormatterHandler(logging.Handler):
+    """Handler of listener thread. Formats records with the formatter of their logger, and writes them to stdout."""
+
+    def __init__(self):
+        super(_FormatterHandler, self).__init__()
+        self._stream = stdout
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            formatter = _loggers.get(record.name, _Formatter)
+            self._stream.write(formatter.format(record) + '\n')
+            self._stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def enableQueueLogging(
+        maxsize: int = 10000,
+        policy: Union[DropPolicy, str] = DropPolicy.NEWEST,
+        debugRate: Optional[float] = None,
+        debugBurst: int = 100
+) -> None:
+    """Make every V5 logger share one QueueHandler, and format & write records in a single background thread.
+    Logging calls on event loop thread only enqueue records.
+    Args:
+        maxsize (int): Maximum number of queued records.
+        policy (Union[DropPolicy, str]): Which record to drop when the queue is full. WARNING and above are never
+            dropped, so OLDEST policy only replaces the oldest record if it is below WARNING.
+        debugRate (Optional[float]): Maximum DEBUG records per second of each logger. Not limited if None.
+        debugBurst (int): DEBUG records allowed at once, per logger.
+    """
+    global _queueHandler, _listener, _debugRate, _debugBurst
+    if _queueHandler is not None:
+        return
+    records: queue.Queue = queue.Queue(maxsize)
+    _queueHandler = BoundedQueueHandler(records, DropPolicy(policy))
+    _debugRate, _debugBurst = debugRate, debugBurst
+    _listener = _Listener(records, _FormatterHandler())
+    _listener.start()
+    for name in _loggers:
+        _attachQueue(logging.getLogger(name))
+
+
+def disableQueueLogging() -> None:
+    """Write every queued record, stop the listener thread, and make loggers write synchronously again."""
+    global _queueHandler, _listener, _debugRate
+    if _queueHandler is None:
+        return
+    _listener.stop()    # Processes every queued record before returning.
+    for name, formatter in _loggers.items():
+        logger = logging.getLogger(name)
+        logger.removeHandler(_queueHandler)
+        for limiter in _rateLimiters:
+            logger.removeFilter(limiter)
+        if not logger.handlers:
+            logger.addHandler(_consoleHandler(formatter))
+    _rateLimiters.clear()
+    _queueHandler, _listener, _debugRate = None, None, None
+
+
+def loggingStats() -> Dict[str, int]:
+    """Counters of queue logging mode."""
+    return {
+        'queued': _queueHandler.queued if _queueHandler is not None else 0,
+        'dropped': _queueHandler.dropped if _queueHandler is not None else 0,
+        'rate_limited': sum(limiter.limited for limiter in _rateLimiters)
+    }
+
+
+atexit.register(disableQueueLogging)
+
+
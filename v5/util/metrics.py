@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+from typing import Optional, List, Dict, Tuple, Sequence, ClassVar, NoReturn
+
+from .logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'registry'
+)
+
+logger = getLogger('utils.metrics', LogLevels.DEBUG)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatLabels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _formatValue(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(metaclass=ABCMeta):
+    """Base of metrics. A metric with label names holds one child per label values.
+    Children are created once and should be kept by hot paths, so that recording is a single attribute update.
+    """
+    type: ClassVar[str] = 'untyped'
+    __slots__ = ('name', 'help', 'labelNames', '_children')
+
+    def __init__(self, name: str, help: str, labelNames: Sequence[str] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.labelNames: Tuple[str, ...] = tuple(labelNames)
+        self._children: Dict[LabelValues, Metric] = {}
+
+    def labels(self, *values: str) -> Metric:
+        """Get child of the label values. Created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelNames):
+                raise ValueError(f'{self.name} has labels {self.labelNames}, but {values} is given.')
+            child = self._children[values] = self._newChild()
+        return child
+
+    @abstractmethod
+    def _newChild(self) -> Metric:  ...
+
+    def samples(self) -> List[Tuple[LabelValues, Metric]]:
+        return [((), self)] if not self.labelNames else list(self._children.items())
+
+    def expose(self) -> List[str]:
+        """Lines of text exposition format."""
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for values, child in self.samples():
+            lines.extend(child._exposeSample(self.name, self.labelNames, values))
+        return lines
+
+    @abstractmethod
+    def _exposeSample(self, name: str, labelNames: Sequence[str], values: LabelValues) -> List[str]:  ...
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+    type = 'counter'
+    __slots__ = ('value',)
+
+    def __init__(self, name: str = '', help: str = '', labelNames: Sequence[str] = ()):
+        super(Counter, self).__init__(name, help, labelNames)
+        self.value: float = 0
+
+    def _newChild(self) -> Counter:
+        return Counter()
+
+    def inc(self, amount: float = 1) -> NoReturn:
+        self.value += amount
+
+    def _exposeSample(self, name: str, labelNames: Sequence[str], values: LabelValues) -> List[str]:
+        return [f'{name}{_formatLabels(labelNames, values)} {_formatValue(self.value)}']
+
+
+class Gauge(Counter):
+    """Value which can go up and down."""
+    type = 'gauge'
+    __slots__ = ()
+
+    def _newChild(self) -> Gauge:
+        return Gauge()
+
+    def set(self, value: float) -> NoReturn:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> NoReturn:
+        self.value -= amount
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets. Bucket counts are preallocated, and never resized."""
+    type = 'histogram'
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    # Default bounds in seconds. Upper bound of the last bucket is +Inf.
+    defaultBounds: ClassVar[Tuple[float, ...]] = (
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    )
+
+    def __init__(
+            self,
+            name: str = '',
+            help: str = '',
+            labelNames: Sequence[str] = (),
+            bounds: Optional[Sequence[float]] = None
+    ):
+        super(Histogram, self).__init__(name, help, labelNames)
+        self.bounds: Tuple[float, ...] = tuple(sorted(bounds or self.defaultBounds))
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)   # Non-cumulative. Last one is +Inf bucket.
+        self.sum: float = 0.0
+
+    def _newChild(self) -> Histogram:
+        return Histogram(bounds=self.bounds)
+
+    def observe(self, value: float) -> NoReturn:
+        # Buckets are inclusive upper bounds. (le)
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def _exposeSample(self, name: str, labelNames: Sequence[str], values: LabelValues) -> List[str]:
+        lines: List[str] = []
+        cumulative: int = 0
+        for bound, count in zip((*self.bounds, float('inf')), self.counts):
+            cumulative += count
+            le = f'le="{_formatValue(float(bound))}"'
+            lines.append(f'{name}_bucket{_formatLabels(labelNames, values, le)} {cumulative}')
+        lines.append(f'{name}_sum{_formatLabels(labelNames, values)} {_formatValue(self.sum)}')
+        lines.append(f'{name}_count{_formatLabels(labelNames, values)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of named metrics. Metrics are created once and returned again for same name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get(self, cls: type, name: str, help: str, labelNames: Sequence[str], **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, labelNames, **kwargs)
+        elif type(metric) is not cls:
+            raise TypeError(f'Metric {name} is already registered as {metric.type}.')
+        return metric
+
+    def counter(self, name: str, help: str, labelNames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelNames)
+
+    def gauge(self, name: str, help: str, labelNames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelNames)
+
+    def histogram(
+            self,
+            name: str,
+            help: str,
+            labelNames: Sequence[str] = (),
+            bounds: Optional[Sequence[float]] = None
+    ) -> Histogram:
+        return self._get(Histogram, name, help, labelNames, bounds=bounds)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """Every metric in text exposition format. (Prometheus text format 0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+# Default registry used by V5.
+registry: MetricsRegistry = MetricsRegistry()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import cProfile
+from abc import ABCMeta, abstractmethod
+import marshal
+import os
+import sys
+import threading
+from typing import Optional, List, Dict, Tuple, Set, NoReturn
+
+from .resources import ResourceFile, ResourceType
+from .logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'Profiler',
+    'CProfiler',
+    'SamplingProfiler'
+)
+
+logger = getLogger('utils.profiling', LogLevels.DEBUG)
+
+# (file name, line number, function name). Same key as pstats uses.
+FunctionKey = Tuple[str, int, str]
+# function -> (primitive calls, total calls, inline time, cumulative time, callers)
+PStats = Dict[FunctionKey, Tuple[int, int, float, float, Dict[FunctionKey, tuple]]]
+
+
+def _label(function: FunctionKey) -> str:
+    filename, line, name = function
+    if filename == '~':
+        return name     # Builtin function. ex) <built-in method time.sleep>
+    return f'{name} ({os.path.basename(filename)}:{line})'.replace(';', ',')
+
+
+class Profiler(metaclass=ABCMeta):
+    """Base of profilers. start() and stop() may be nested or repeated, and results are accumulated.
+
+    Results are available in two forms :
+    - pstats dump, readable with `python -m pstats <file>` or snakeviz.
+    - collapsed stacks (`frame;frame;frame weight` lines), readable with flamegraph.pl or speedscope.
+    """
+
+    def __init__(self):
+        self._depth: int = 0
+
+    @property
+    def isRunning(self) -> bool:
+        return self._depth > 0
+
+    def start(self) -> NoReturn:
+        self._depth += 1
+        if self._depth == 1:
+            self._enable()
+
+    def stop(self) -> NoReturn:
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._disable()
+
+    @abstractmethod
+    def _enable(self) -> NoReturn:  ...
+
+    @abstractmethod
+    def _disable(self) -> NoReturn:  ...
+
+    @abstractmethod
+    def stats(self) -> PStats:
+        """Profile in pstats format."""
+
+    @abstractmethod
+    def collapsed(self) -> Dict[str, int]:
+        """Collapsed stack -> weight."""
+
+    def dump(self) -> bytes:
+        """Profile serialized like pstats.Stats.dump_stats does."""
+        return marshal.dumps(self.stats())
+
+    def collapsedText(self) -> str:
+        stacks = sorted(self.collapsed().items(), key=lambda item: item[1], reverse=True)
+        return ''.join(f'{stack} {weight}\n' for stack, weight in stacks)
+
+    async def save(self, path: str) -> Tuple[str, str]:
+        """Write pstats dump into `<path>.pstats`, and collapsed stacks into `<path>.collapsed.txt`.
+        Args:
+            path (str): Path of the output files without extension.
+        Returns:
+            Paths of pstats dump and collapsed stacks.
+        """
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        dump = ResourceFile(f'{path}.pstats', ResourceType.BYTES, content=self.dump())
+        collapsed = ResourceFile(f'{path}.collapsed.txt', ResourceType.TEXT, content=self.collapsedText())
+        await dump.flush()
+        await collapsed.flush()
+        logger.info(f'Profile is written to {dump.relativePath} and {collapsed.relativePath}')
+        return dump.relativePath, collapsed.relativePath
+
+
+class CProfiler(Profiler):
+    """Deterministic profiler using cProfile. Measures every call in the thread while it is running.
+
+    cProfile does not record full stacks, so collapsed stacks are rebuilt by following the most expensive
+    caller of each function up to the root. Stacks are exact for call trees, and approximate for functions
+    called from multiple places.
+    """
+
+    maxDepth: int = 64
+
+    def __init__(self):
+        super(CProfiler, self).__init__()
+        self._profile: cProfile.Profile = cProfile.Profile()
+
+    def _enable(self) -> NoReturn:
+        self._profile.enable()
+
+    def _disable(self) -> NoReturn:
+        self._profile.disable()
+
+    def stats(self) -> PStats:
+        self._profile.create_stats()
+        return self._profile.stats
+
+    def collapsed(self) -> Dict[str, int]:
+        stats: PStats = self.stats()
+        result: Dict[str, int] = {}
+        for function, (_, _, inlineTime, _, _) in stats.items():
+            weight = int(inlineTime * 1e6)     # microseconds
+            if weight <= 0:
+                continue
+            stack: List[str] = [_label(function)]
+            visited: Set[FunctionKey] = {function}
+            current: FunctionKey = function
+            while len(stack) < self.maxDepth:
+                callers = stats[current][4]
+                # Caller spent the most cumulative time calling current function.
+                caller = max(callers, key=lambda key: callers[key][3], default=None)
+                if caller is None or caller in visited or caller not in stats:
+                    break
+                stack.append(_label(caller))
+                visited.add(caller)
+                current = caller
+            key = ';'.join(reversed(stack))
+            result[key] = result.get(key, 0) + weight
+        return result
+
+
+class SamplingProfiler(Profiler):
+    """Statistical profiler sampling stack of the profiled thread from a background thread.
+    Overhead is bounded by sampling interval, regardless of how many calls the profiled code makes.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval (float): Seconds between samples.
+        """
+        super(SamplingProfiler, self).__init__()
+        self._interval: float = interval
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopEvent: threading.Event = threading.Event()
+        self._samples: Dict[Tuple[FunctionKey, ...], int] = {}     # stack (root first) -> number of samples
+
+    @property
+    def samples(self) -> int:
+        return sum(self._samples.values())
+
+    def _enable(self) -> NoReturn:
+        # Samples the thread which started profiling. (event loop thread)
+        self._target = threading.get_ident()
+        self._stopEvent.clear()
+        self._thread = threading.Thread(target=self._run, name='v5-sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def _disable(self) -> NoReturn:
+        self._stopEvent.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> NoReturn:
+        currentFrames = sys._current_frames
+        samples = self._samples
+        while not self._stopEvent.wait(self._interval):
+            frame = currentFrames().get(self._target)
+            stack: List[FunctionKey] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                key = tuple(reversed(stack))
+                samples[key] = samples.get(key, 0) + 1
+
+    def stats(self) -> PStats:
+        # Number of samples converted into seconds. Call counts are numbers of samples containing the function.
+        interval: float = self._interval
+        inline: Dict[FunctionKey, int] = {}
+        inclusive: Dict[FunctionKey, int] = {}
+        callers: Dict[FunctionKey, Dict[FunctionKey, int]] = {}
+        for stack, count in tuple(self._samples.items()):
+            inline[stack[-1]] = inline.get(stack[-1], 0) + count
+            for function in set(stack):
+                inclusive[function] = inclusive.get(function, 0) + count
+            for caller, callee in set(zip(stack, stack[1:])):
+                edges = callers.setdefault(callee, {})
+                edges[caller] = edges.get(caller, 0) + count
+        return {
+            function: (
+                count,
+                count,
+                inline.get(function, 0) * interval,
+                count * interval,
+                {
+                    caller: (edge, edge, 0.0, edge * interval)
+                    for caller, edge in callers.get(function, {}).items()
+                }
+            )
+            for function, count in inclusive.items()
+        }
+
+    def collapsed(self) -> Dict[str, int]:
+        result: Dict[str, int] = {}
+        for stack, count in tuple(self._samples.items()):
+            key = ';'.join(map(_label, stack))
+            result[key] = result.get(key, 0) + count
+        return result
@@ -1,8 +1,15 @@
+from __future__ import annotations
 import asyncio
+import codecs
 import json
+import mmap
 import os
+import stat
+import tempfile
+from collections import OrderedDict
 from enum import Enum
-from typing import Union, Dict, NoReturn, Literal, Optional
+from typing import Union, Dict, List, Tuple, Callable, NoReturn, Literal, Optional, Any, Mapping, ClassVar, \
+    BinaryIO, AsyncIterator, AsyncIterable, Iterable
 import aiofile
 
 from .logging_util import getLogger, Logger, LogLevels
@@ -11,20 +18,317 @@ from .type_hints import JSON
 __all__ = (
     'ResourceType',
     'ResourceFile',
-    'JsonFile'
+    'JsonFile',
+    'JsonLinesFile',
+    'FileWriter',
+    'ResourceCache'
 )
 
 
 logger = getLogger(name='utils.resources', level=LogLevels.DEBUG)
 
 
+def _openTemp(path: str) -> Tuple[BinaryIO, str]:
+    """Open temporary file in the directory of the path."""
+    directory, name = os.path.split(path)
+    fd, temp = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    return os.fdopen(fd, 'wb'), temp
+
+
+def _commitTemp(f: BinaryIO, temp: str, path: str, mode: Optional[int] = None) -> NoReturn:
+    """fsync and close temporary file, and rename it over the path. Temporary file is removed on failure.
+    The file keeps permission of the replaced file, unless `mode` is given.
+    """
+    try:
+        with f:
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(temp, mode)
+        elif os.path.exists(path):
+            os.chmod(temp, stat.S_IMODE(os.stat(path).st_mode))    # mkstemp creates file with 0600.
+        os.replace(temp, path)
+    except BaseException:
+        _discardTemp(f, temp)
+        raise
+    _fsyncDirectory(os.path.dirname(path))
+
+
+def _discardTemp(f: BinaryIO, temp: str) -> NoReturn:
+    f.close()
+    if os.path.exists(temp):
+        os.unlink(temp)
+
+
+def atomicWrite(path: str, data: bytes, mode: Optional[int] = None) -> NoReturn:
+    """Write data into temporary file in the same directory, fsync it, and rename it over the path.
+    Readers see either old or new content, never truncated file.
+    Args:
+        path (str): Path of the file.
+        data (bytes): Content of the file.
+        mode (Optional[int]): Permission of the file. Keeps permission of the replaced file if None.
+    """
+    path = os.path.abspath(path)
+    f, temp = _openTemp(path)
+    try:
+        f.write(data)
+    except BaseException:
+        _discardTemp(f, temp)
+        raise
+    _commitTemp(f, temp, path, mode)
+
+
+def _fsyncDirectory(directory: str) -> NoReturn:
+    try:
+        # fsync directory, so the rename itself is durable.
+        dirFd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Directories can not be opened on some platforms.
+    try:
+        os.fsync(dirFd)
+    finally:
+        os.close(dirFd)
+
+
+class FileWriter:
+    """Write-behind queue of one file path.
+
+    Submitted contents are not written immediately. Contents submitted in `delay` seconds are coalesced,
+    and only the latest one is encoded and written with atomicWrite in the default executor.
+    Writes of one path never run concurrently.
+    """
+
+    # path -> writer. Every ResourceFile of same path shares one writer.
+    __writers__: Dict[str, FileWriter] = {}
+    delay: float = 0.05
+    streamBuffer: int = 64 * 1024   # Bytes of streamed chunks batched into one write.
+
+    @classmethod
+    def of(cls, path: str) -> FileWriter:
+        path = os.path.abspath(path)
+        writer = cls.__writers__.get(path)
+        if writer is None:
+            writer = cls.__writers__[path] = cls(path)
+        return writer
+
+    @classmethod
+    async def flushAll(cls) -> NoReturn:
+        """Write every pending content of every path."""
+        await asyncio.gather(*(writer.flush() for writer in tuple(cls.__writers__.values())))
+
+    def __init__(self, path: str):
+        self._path: str = path
+        self._pending: Optional[Tuple[Any, Callable[[Any], bytes]]] = None    # (content, encoder)
+        self._waiters: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self.submitted: int = 0     # Number of submitted contents.
+        self.writes: int = 0        # Number of writes actually issued.
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def isPending(self) -> bool:
+        return self._pending is not None
+
+    def submit(self, content: Any, encoder: Callable[[Any], bytes]) -> asyncio.Future:
+        """Queue content to be written. Replaces content not written yet.
+        Args:
+            content (Any): Content to write.
+            encoder (Callable[[Any], bytes]): Function encoding content into bytes. Called right before writing.
+        Returns:
+            Future resolved when the content (or newer content) is written.
+        """
+        loop = asyncio.get_event_loop()
+        self.submitted += 1
+        self._pending = (content, encoder)
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self._timer is None:
+            self._timer = loop.call_later(self.delay, lambda: asyncio.ensure_future(self.flush()))
+        return waiter
+
+    async def flush(self) -> NoReturn:
+        """Write pending content now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            while self._pending is not None:
+                (content, encoder), waiters = self._pending, self._waiters
+                self._pending, self._waiters = None, []
+                try:
+                    data: bytes = encoder(content)
+                    await asyncio.get_event_loop().run_in_executor(None, atomicWrite, self._path, data)
+                    self.writes += 1
+                    ResourceFile.cache.invalidate(self._path)
+                except Exception as e:
+                    logger.exception(f'Failed to write {self._path}')
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                else:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(None)
+
+    async def stream(self, chunks: Union[AsyncIterable[Any], Iterable[Any]], encoder: Callable[[Any], bytes]) -> int:
+        """Write chunks into temporary file as they are produced, and replace the file atomically at the end.
+        Only one chunk is held in memory at a time. Pending content is written before the stream.
+        Args:
+            chunks (Union[AsyncIterable[Any], Iterable[Any]]): Chunks to write. (ex: async generator)
+            encoder (Callable[[Any], bytes]): Function encoding each chunk into bytes.
+        Returns:
+            Number of bytes written.
+        """
+        await self.flush()
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            f, temp = await loop.run_in_executor(None, _openTemp, self._path)
+            buffer: bytearray = bytearray()
+            written: int = 0
+            try:
+                if not hasattr(chunks, '__aiter__'):
+                    chunks = _aiter(chunks)
+                async for chunk in chunks:
+                    buffer += encoder(chunk)
+                    # Small chunks are batched, so that the executor is not used for every chunk.
+                    if len(buffer) >= self.streamBuffer:
+                        await loop.run_in_executor(None, f.write, bytes(buffer))
+                        written += len(buffer)
+                        buffer.clear()
+                if buffer:
+                    await loop.run_in_executor(None, f.write, bytes(buffer))
+                    written += len(buffer)
+            except BaseException:
+                _discardTemp(f, temp)
+                raise
+            await loop.run_in_executor(None, _commitTemp, f, temp, self._path)
+            self.writes += 1
+            ResourceFile.cache.invalidate(self._path)
+        return written
+
+
+async def _aiter(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in iterable:
+        yield item
+
+
 class ResourceType(Enum):
     BYTES = 'b'
     TEXT = 't'
 
 
+# (absolute path, mtime_ns, size, resource type, encoding)
+CacheKey = Tuple[str, int, int, ResourceType, Optional[str]]
+CachedContent = Union[bytes, str, memoryview]
+
+
+class ResourceCache:
+    """Size-bounded LRU cache of resource contents, keyed by path and mtime (and size) of the file.
+
+    Changed files are detected with os.stat, so stale contents are never served.
+    BYTES resources larger than `mmapThreshold` are mapped with mmap and served as read-only memoryview,
+    so they are neither copied into memory nor counted twice by page cache.
+    Concurrent misses of same resource share one read.
+    """
+
+    def __init__(self, maxBytes: int = 64 * 1024 * 1024, mmapThreshold: int = 1024 * 1024):
+        """
+        Args:
+            maxBytes (int): Maximum total size of cached contents.
+            mmapThreshold (int): BYTES resources of this size or larger are served through mmap.
+        """
+        self.maxBytes: int = maxBytes
+        self.mmapThreshold: int = mmapThreshold
+        self._entries: OrderedDict[CacheKey, CachedContent] = OrderedDict()
+        self._keys: Dict[str, CacheKey] = {}    # path -> key of cached content
+        self._loading: Dict[CacheKey, asyncio.Future] = {}
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def toJson(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    async def get(self, path: str, resType: ResourceType, encoding: Optional[str] = None) -> CachedContent:
+        """Get content of the resource, reading the file only if it is not cached or changed.
+        Raises:
+            FileNotFoundError: Resource does not exist.
+        """
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        key: CacheKey = (path, info.st_mtime_ns, info.st_size, resType, encoding)
+        content = self._entries.get(key)
+        if content is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return content
+
+        loading = self._loading.get(key)
+        if loading is not None:
+            self.hits += 1
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        loading = self._loading[key] = asyncio.get_event_loop().run_in_executor(None, self._load, key)
+        try:
+            content = await loading
+        finally:
+            del self._loading[key]
+        self._store(key, content)
+        return content
+
+    def _load(self, key: CacheKey) -> CachedContent:
+        path, _, size, resType, encoding = key
+        with open(path, 'rb') as f:
+            if resType == ResourceType.BYTES and size >= self.mmapThreshold:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            data: bytes = f.read()
+        return data.decode(encoding) if resType == ResourceType.TEXT else data
+
+    def _store(self, key: CacheKey, content: CachedContent) -> NoReturn:
+        size: int = key[2]
+        if size > self.maxBytes:
+            return
+        self.invalidate(key[0])     # Drop stale content of the path.
+        self._entries[key] = content
+        self._keys[key[0]] = key
+        self.size += size
+        while self.size > self.maxBytes:
+            oldKey, _ = self._entries.popitem(last=False)
+            del self._keys[oldKey[0]]
+            self.size -= oldKey[2]
+            self.evictions += 1
+
+    def invalidate(self, path: str) -> NoReturn:
+        """Drop cached content of the path. Mapped memory is released when every memoryview of it is released."""
+        key = self._keys.pop(os.path.abspath(path), None)
+        if key is not None:
+            del self._entries[key]
+            self.size -= key[2]
+
+    def clear(self) -> NoReturn:
+        self._entries.clear()
+        self._keys.clear()
+        self.size = 0
+
+
 class ResourceFile:
     """Object holding resource data."""
+
+    # Shared cache of every resource read.
+    cache: ClassVar[ResourceCache] = ResourceCache()
+
     def __init__(
             self,
             path: str,
@@ -39,16 +343,27 @@ class ResourceFile:
             resType: ResourceType Enum value which indicates the file must be managed as bytes or text.
         """
         self._relPath: str = path
-        print(path)
         self._resType: ResourceType = resType
         if resType == resType.TEXT:
             self._encoding = encoding
-        print(self.exists())
-        if not self.exists():
-            asyncio.get_event_loop().create_task(self.create())
-
         if content is not None:
-            asyncio.get_event_loop().create_task(self.write(content))
+            self._writeInitial(content)
+        elif not self.exists():
+            self._writeInitial(self.empty)
+
+    def _writeInitial(self, content: Union[str, bytes]) -> NoReturn:
+        """Write content given on construction. On the event loop, it is queued in order on the writer of the path,
+        so creation never overwrites content given to another file of the path. Without running event loop
+        (ex: worker thread), it is written synchronously, so construction never needs a loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._validate(content)
+            atomicWrite(self._relPath, self._encode(content))
+            self.cache.invalidate(self._relPath)
+        else:
+            self.submit(content)
 
     @property
     def relativePath(self) -> str:
@@ -58,17 +373,16 @@ class ResourceFile:
     def resourceType(self) -> str:
         return self._resType.value
 
+    @property
+    def empty(self) -> Union[str, bytes]:
+        """Content of newly created file."""
+        return '' if self._resType == ResourceType.TEXT else bytes()
+
     def exists(self) -> bool:
         return os.path.exists(self._relPath)
 
     async def create(self, content: Optional[Union[str, bytes]] = None) -> bool:
-        if content is None:
-            if self._resType == ResourceType.TEXT:
-                content = ''
-            elif self._resType == ResourceType.BYTES:
-                content = bytes()
-
-        await self.write(content)
+        await self.write(self.empty if content is None else content)
 
     def open(
             self,
@@ -82,35 +396,165 @@ class ResourceFile:
             params['encoding'] = self._encoding
         return aiofile.async_open(**params)
 
-    async def read(self) -> Union[bytes, str]:
+    @property
+    def writer(self) -> FileWriter:
+        return FileWriter.of(self._relPath)
+
+    async def flush(self) -> NoReturn:
+        """Write pending content of this file now."""
+        await self.writer.flush()
+
+    async def read(self, cached: bool = False, view: bool = False) -> Union[bytes, str, memoryview]:
+        """Read whole content of the file.
+        Args:
+            cached (bool): Read through ResourceFile.cache. Only for resources read often (ex: assets), since cached
+                contents stay in memory until they are evicted.
+            view (bool): Return cached BYTES resources mapped with mmap as read-only memoryview, instead of copying
+                them into bytes. (See ResourceCache.mmapThreshold)
+        """
+        if self.writer.isPending:
+            await self.flush()  # Read own writes.
+        if cached:
+            content = await self.cache.get(self._relPath, self._resType, getattr(self, '_encoding', None))
+            return bytes(content) if isinstance(content, memoryview) and not view else content
         async with self.open('r') as f:
             return await f.read()
 
-    async def readLine(self) -> str:
-        async with self.open('r') as f:
-            return await f.readLine()
+    async def readLine(self) -> Union[str, bytes]:
+        """Read first line of the file, including line separator."""
+        async for line in self.iterLines():
+            return line
+        return self.empty
 
-    async def write(self, content: Union[bytes, str]) -> NoReturn:
+    async def iterChunks(self, size: int = 64 * 1024) -> AsyncIterator[Union[str, bytes]]:
+        """Read the file chunk by chunk. Only one chunk is held in memory at a time.
+        Args:
+            size (int): Size of a chunk read from the file, in bytes.
+        """
+        if self.writer.isPending:
+            await self.flush()
+        # Text is decoded here with incremental decoder, so multibyte characters split between chunks are kept.
+        decoder = codecs.getincrementaldecoder(self._encoding)() if self._resType == ResourceType.TEXT else None
+        async with aiofile.async_open(file_name=self._relPath, mode='rb') as f:
+            while True:
+                chunk: bytes = await f.read(size)
+                if not chunk:
+                    break
+                if decoder is None:
+                    yield chunk
+                else:
+                    text: str = decoder.decode(chunk)
+                    if text:
+                        yield text
+        if decoder is not None:
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+
+    async def iterLines(self, size: int = 64 * 1024) -> AsyncIterator[Union[str, bytes]]:
+        """Read the file line by line, including line separators. Memory is bounded by chunk size and line length.
+        Args:
+            size (int): Size of chunks read from the file.
+        """
+        newline = '\n' if self._resType == ResourceType.TEXT else b'\n'
+        buffer = self.empty
+        async for chunk in self.iterChunks(size):
+            buffer += chunk
+            start: int = 0
+            end: int = buffer.find(newline)
+            while end != -1:
+                yield buffer[start:end + 1]
+                start = end + 1
+                end = buffer.find(newline, start)
+            buffer = buffer[start:]
+        if buffer:
+            yield buffer
+
+    def _encode(self, content: Union[bytes, str]) -> bytes:
+        return content.encode(self._encoding) if self._resType == ResourceType.TEXT else content
+
+    def _validate(self, content: Union[bytes, str]) -> NoReturn:
         if self._resType == ResourceType.TEXT and not isinstance(content, str):
             raise TypeError('Text file is only able to write string contents in order to prevent file problems.')
         elif self._resType == ResourceType.BYTES and not isinstance(content, bytes):
             raise TypeError('Bytes file is only able to write bytes contents in order to prevent file problems.')
-        async with self.open('w') as f:
-            await f.write(content)
+
+    def submit(self, content: Union[bytes, str]) -> asyncio.Future:
+        """Queue content to be written atomically, without waiting. Successive contents are coalesced.
+        Returns:
+            Future resolved when the content (or newer content) is written.
+        """
+        self._validate(content)
+        return self.writer.submit(content, self._encode)
+
+    async def write(self, content: Union[bytes, str]) -> NoReturn:
+        """Write content now, without waiting for the debounce delay. Contents submitted meanwhile are written
+        together.
+        """
+        written: asyncio.Future = self.submit(content)
+        await self.writer.flush()
+        await written
+
+    async def writeStream(self, chunks: Union[AsyncIterable[Union[bytes, str]], Iterable[Union[bytes, str]]]) -> int:
+        """Write chunks produced by (async) iterable with bounded memory. File is replaced atomically when done.
+        Returns:
+            Number of bytes written.
+        """
+        def encode(chunk: Union[bytes, str]) -> bytes:
+            if self._resType == ResourceType.TEXT and not isinstance(chunk, str):
+                raise TypeError('Text file is only able to write string contents in order to prevent file problems.')
+            elif self._resType == ResourceType.BYTES and not isinstance(chunk, (bytes, bytearray, memoryview)):
+                raise TypeError('Bytes file is only able to write bytes contents in order to prevent file problems.')
+            return self._encode(chunk)
+
+        return await self.writer.stream(chunks, encode)
 
 
 class JsonFile(ResourceFile):
     """ResourceHolder specialized to manage configurations."""
     def __init__(self, path: str, content: Optional[JSON]):
-        super(JsonFile, self).__init__(path, ResourceType.TEXT)
+        super(JsonFile, self).__init__(path, ResourceType.TEXT, content=content)
 
-        if content is not None:
-            asyncio.create_task(self.write(content))
+    @property
+    def empty(self) -> JSON:
+        return {}
 
-    async def read(self) -> JSON:
-        text: str = await super(JsonFile, self).read()
+    async def read(self, cached: bool = False) -> JSON:
+        text: str = await super(JsonFile, self).read(cached)
         return json.loads(text)
 
-    async def write(self, content: JSON) -> NoReturn:
-        text: str = json.dumps(obj=content, indent=4, ensure_ascii=False)
-        await super(JsonFile, self).write(text)
+    def _encode(self, content: JSON) -> bytes:
+        # Serialized right before writing, so coalesced contents are serialized only once.
+        return json.dumps(obj=content, indent=4, ensure_ascii=False, default=self._default).encode(self._encoding)
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        # Read-only mappings. (ex: snapshot of Config)
+        if isinstance(obj, Mapping):
+            return dict(obj)
+        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+    def _validate(self, content: JSON) -> NoReturn:
+        pass    # Any json compatible content. Serialization errors are raised by the write.
+
+
+class JsonLinesFile(ResourceFile):
+    """ResourceFile of JSON lines. (one json value per line) Records are read and written incrementally."""
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        super(JsonLinesFile, self).__init__(path, ResourceType.TEXT, encoding=encoding)
+
+    async def iterRecords(self) -> AsyncIterator[Any]:
+        """Decode records one by one. Blank lines are skipped."""
+        async for line in self.iterLines():
+            if line.strip():
+                yield json.loads(line)
+
+    async def writeRecords(self, records: Union[AsyncIterable[Any], Iterable[Any]]) -> int:
+        """Write records produced by (async) iterable, one per line. File is replaced atomically when done.
+        Returns:
+            Number of bytes written.
+        """
+        return await self.writer.stream(records, self._encodeRecord)
+
+    def _encodeRecord(self, record: Any) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode(self._encoding)
\ No newline at end of file
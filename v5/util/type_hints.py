@@ -1,4 +1,4 @@
-from typing import Union, Dict, Callable, Coroutine, Any
+from typing import Union, Dict, Callable, Coroutine, Any, TypeVar
 
 __all__ = (
     'JSON',
@@ -10,5 +10,6 @@ __all__ = (
 
 JSON = YAML = Dict[str, Union[str, int, float, bool, dict, list]]
 Function = Callable[..., Any]
-CoroutineFunction = Callable[..., Coroutine[...]]
+CoroutineFunction = Callable[..., Coroutine[Any, Any, Any]]
 Class = type    # Class is made using metaclass, type.
+T = TypeVar('T')    # Generic type of decorated objects. (ex: access_modifier.modulePrivate)
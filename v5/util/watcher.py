@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Optional, Tuple, NoReturn
+
+from .type_hints import CoroutineFunction
+from .logging_util import getLogger, LogLevels
+
+
+__all__ = (
+    'FileWatcher',
+)
+
+logger = getLogger('utils.watcher', LogLevels.DEBUG)
+
+# inotify constants. (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EventHeader = struct.Struct('iIII')    # wd, mask, cookie, len
+
+
+def _loadInotify() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') and hasattr(libc, 'inotify_add_watch') else None
+
+
+class FileWatcher:
+    """Calls coroutine function when the file is changed.
+
+    Uses inotify on linux, watching the parent directory so that files replaced with rename are also detected.
+    Falls back to polling mtime and size of the file on other platforms.
+    Successive changes in `debounce` seconds are coalesced into one callback.
+    """
+
+    def __init__(self, path: str, callback: CoroutineFunction, interval: float = 1.0, debounce: float = 0.1):
+        """
+        Args:
+            path (str): Path of the file to watch.
+            callback (CoroutineFunction): Coroutine function called without arguments when the file is changed.
+            interval (float): Polling interval in seconds. Used only when inotify is not available.
+            debounce (float): Seconds to wait for successive changes before calling callback.
+        """
+        self._path: str = os.path.abspath(path)
+        self._callback: CoroutineFunction = callback
+        self._interval: float = interval
+        self._debounce: float = debounce
+        self._fd: Optional[int] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._running: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def mode(self) -> Optional[str]:
+        """'inotify', 'poll', or None if not watching."""
+        if self._fd is not None:
+            return 'inotify'
+        if self._poller is not None:
+            return 'poll'
+        return None
+
+    def start(self) -> NoReturn:
+        """Start watching. Must be called in running event loop."""
+        if self.mode is not None:
+            return
+        libc = _loadInotify()
+        if libc is not None and self._startInotify(libc):
+            logger.debug(f'Watching {self._path} with inotify.')
+            return
+        self._poller = asyncio.ensure_future(self._poll(self._signature()))
+        logger.debug(f'Watching {self._path} by polling every {self._interval} seconds.')
+
+    def close(self) -> NoReturn:
+        """Stop watching."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if self._fd is not None:
+            asyncio.get_event_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    def _startInotify(self, libc: ctypes.CDLL) -> bool:
+        fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        directory: str = os.path.dirname(self._path)
+        if libc.inotify_add_watch(fd, directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY) < 0:
+            os.close(fd)
+            return False
+        try:
+            asyncio.get_event_loop().add_reader(fd, self._onReadable)
+        except NotImplementedError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def _onReadable(self) -> NoReturn:
+        name: bytes = os.path.basename(self._path).encode()
+        try:
+            data: bytes = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        offset: int = 0
+        changed: bool = False
+        while offset < len(data):
+            _, _, _, length = _EventHeader.unpack_from(data, offset)
+            offset += _EventHeader.size
+            if data[offset:offset + length].rstrip(b'\0') == name:
+                changed = True
+            offset += length
+        if changed:
+            self._schedule()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            # File is being replaced.
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _poll(self, last: Optional[Tuple[int, int]]) -> NoReturn:
+        while True:
+            await asyncio.sleep(self._interval)
+            current = self._signature()
+            if current is not None and current != last:
+                last = current
+                self._schedule()
+
+    def _schedule(self) -> NoReturn:
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = asyncio.get_event_loop().call_later(self._debounce, self._fire)
+
+    def _fire(self) -> NoReturn:
+        self._pending = None
+        if self._running is not None and not self._running.done():
+            # Previous callback is still running. Check again after debounce.
+            self._schedule()
+            return
+        self._running = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> NoReturn:
+        try:
+            await self._callback()
+        except Exception:
+            logger.exception(f'Exception in file watcher callback of {self._path}')